@@ -0,0 +1,178 @@
+# analytics/active_addresses.py
+# Distinct active-address estimates from the BTC transaction stream using HyperLogLog sketches.
+# One sketch (2**12 one-byte registers = 4 KB, ~1.6% standard error) per minute, hour and UTC
+# day. Sketches merge by element-wise max, so estimates for longer windows are built from the
+# sketches alone, never from raw address sets. Hour and day sketches are persisted under
+# config.settings.data_dir so history survives restarts.
+
+import atexit
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from config.settings import data_dir
+from data_sources.address_labels import address_hash
+
+HLL_PRECISION = 12
+# How many sketches of each granularity are kept
+KEEP_MINUTES = 120
+KEEP_HOURS = 7 * 24
+KEEP_DAYS = 365
+# Persist at most this often from the ingest path
+SAVE_INTERVAL_SECONDS = 300
+SKETCH_PATH = os.path.join(data_dir, "active_addresses.npz")
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes."""
+
+    __slots__ = ("p", "m", "registers")
+
+    def __init__(self, p=HLL_PRECISION, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = registers if registers is not None else np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))  # guard bit bounds the rank
+        # rank = position of the first 1-bit in the remaining 64 - p bits. The top 53 bits convert to
+        # float64 exactly and frexp's exponent is their bit length (the guard bit keeps them nonzero).
+        _, bit_length = np.frexp((rest >> np.uint64(11)).astype(np.float64))
+        rank = (54 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, items):
+        self.add_hashes([address_hash(item) for item in items])
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def copy(self):
+        return HyperLogLog(self.p, self.registers.copy())
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # linear counting for small cardinalities
+        return float(raw)
+
+
+class ActiveAddressCounter:
+    """Per-minute / hour / day HyperLogLog sketches keyed by epoch bucket start (seconds)."""
+
+    GRANULARITY = {"minute": (60, KEEP_MINUTES), "hour": (3600, KEEP_HOURS), "day": (86400, KEEP_DAYS)}
+
+    def __init__(self, path=SKETCH_PATH):
+        self.path = path
+        self.sketches = {g: OrderedDict() for g in self.GRANULARITY}
+        self.lock = Lock()
+        self._save_lock = Lock()
+        self._last_save = time.monotonic()
+        self._dirty = False
+        self.load()
+
+    def add(self, addresses, time_s=None):
+        if not addresses:
+            return
+        time_s = int(time_s or time.time())
+        hashes = np.fromiter((address_hash(a) for a in addresses), dtype=np.uint64, count=len(addresses))
+        with self.lock:
+            for granularity, (seconds, keep) in self.GRANULARITY.items():
+                buckets = self.sketches[granularity]
+                start = time_s - time_s % seconds
+                sketch = buckets.get(start)
+                if sketch is None:
+                    sketch = buckets[start] = HyperLogLog()
+                    # buckets arrive in time order; keep the newest ``keep``
+                    while len(buckets) > keep:
+                        buckets.popitem(last=False)
+                sketch.add_hashes(hashes)
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= SAVE_INTERVAL_SECONDS
+            if due:
+                self._last_save = time.monotonic()  # claim the save so other workers skip it
+        if due:
+            self.save()
+
+    def series(self, granularity="hour"):
+        """DataFrame of (time, active_addresses) for every kept bucket of ``granularity``."""
+        with self.lock:
+            items = [(start, sketch.estimate()) for start, sketch in self.sketches[granularity].items()]
+        frame = pd.DataFrame(items, columns=["time", "active_addresses"])
+        frame["time"] = pd.to_datetime(frame["time"], unit="s")
+        return frame.sort_values("time").reset_index(drop=True)
+
+    def window_estimate(self, seconds, granularity="minute"):
+        """Distinct addresses over the last ``seconds`` by merging the covered sketches."""
+        cutoff = time.time() - seconds
+        merged = HyperLogLog()
+        with self.lock:
+            for start, sketch in self.sketches[granularity].items():
+                if start >= cutoff:
+                    merged.merge(sketch)
+        return merged.estimate()
+
+    # ---------------------------------------------------------------- persistence
+    def save(self):
+        """Snapshot the sketches under the lock and write them through a unique temp file.
+
+        The save lock serializes writers (two ingest workers can both find a save due), so an
+        older snapshot never replaces a newer one.
+        """
+        with self._save_lock:
+            self._save()
+
+    def _save(self):
+        with self.lock:
+            if not self._dirty:
+                return
+            arrays = {}
+            for granularity in ("hour", "day"):
+                buckets = self.sketches[granularity]
+                arrays[f"{granularity}_starts"] = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+                arrays[f"{granularity}_registers"] = (np.stack([s.registers for s in buckets.values()])
+                                                      if buckets else np.zeros((0, 1 << HLL_PRECISION), np.uint8))
+            self._dirty = False
+            self._last_save = time.monotonic()
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + ".", suffix=".tmp.npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path) as npz:
+            for granularity in ("hour", "day"):
+                starts, registers = npz[f"{granularity}_starts"], npz[f"{granularity}_registers"]
+                if registers.shape[1:] != (1 << HLL_PRECISION,):
+                    continue  # precision changed: start fresh
+                order = np.argsort(starts)
+                self.sketches[granularity] = OrderedDict(
+                    (int(starts[i]), HyperLogLog(registers=registers[i].copy())) for i in order
+                )
+
+
+active_addresses = ActiveAddressCounter()
+atexit.register(active_addresses.save)
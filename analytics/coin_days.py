@@ -0,0 +1,289 @@
+# analytics/coin_days.py
+# Streaming coin-days-destroyed (CDD) / dormancy engine over the blockchain.info transaction stream.
+#
+# Every transaction's outputs are recorded in an output-age index (creation time per output,
+# keyed by a 64-bit hash of blockchain.info's (tx_index, n)); every input (``prev_out``) is resolved against it
+# to get the age of the coins being spent. Per hour we aggregate:
+#   cdd              sum(value_btc * age_days) of resolved inputs
+#   spent_btc        value of resolved inputs
+#   lth_spent_btc    resolved value older than LTH_AGE_DAYS (long-term holder spending)
+#   unresolved_btc   inputs whose creating output is not in the index
+# Dormancy = cdd / spent_btc (average age in days of the coins spent).
+#
+# The index keeps new outputs in a dict and folds them into sorted numpy arrays
+# (uint64 key, uint32 creation time) once the dict grows past MERGE_EVERY, so lookups are one
+# dict probe plus a vectorized searchsorted for the whole input batch. Resolving an input also
+# forgets its output (popped from the dict, tombstoned with time 0 in the arrays and dropped on
+# the next merge), so the index tracks unspent outputs instead of growing forever. Merges only
+# sort the new keys and insert them into the arrays; periodic saves snapshot the arrays under
+# the lock and write them on a background thread. The index is persisted to disk and can be
+# seeded with older outputs (e.g. from a node export) so long-term spends resolve:
+#   python -m analytics.coin_days seed outputs.csv     # columns: tx_index, n, time (epoch s)
+#
+# tx_index values reach ~2^53, so (tx_index, n) does not fit 64 bits; packing it would drop
+# high bits and make distinct outputs share keys. The key is instead splitmix64(splitmix64(
+# tx_index) + n): distinct outputs collide with probability 2^-64 per pair, i.e. a lookup
+# against N indexed outputs resolves a wrong creation time with probability ~N / 2^64
+# (~5e-11 at a billion outputs).
+
+import atexit
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from config.settings import data_dir
+
+LTH_AGE_DAYS = 155
+MERGE_EVERY = 200_000
+KEEP_HOURS = 30 * 24
+SAVE_INTERVAL_SECONDS = 600
+INDEX_PATH = os.path.join(data_dir, "output_age_index.npz")
+# Stored with the index; files written with another key scheme are ignored on load
+KEY_VERSION = 2
+SATOSHIS_PER_BTC = 10**8
+FIELDS = ("cdd", "spent_btc", "lth_spent_btc", "unresolved_btc")
+
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _splitmix64(x):
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def output_key(tx_index, n):
+    """64-bit hash key of an output from blockchain.info's tx_index and output position."""
+    return _splitmix64((_splitmix64(int(tx_index) & _MASK64) + int(n)) & _MASK64)
+
+
+def _splitmix64_array(x):
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def output_keys(tx_index, n):
+    """Vectorized ``output_key`` over arrays of tx_index and n."""
+    tx_index = np.asarray(tx_index, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        return _splitmix64_array(_splitmix64_array(tx_index) + np.asarray(n, dtype=np.uint64))
+
+
+class OutputAgeIndex:
+    """Output creation times of unspent outputs: recent dict + sorted arrays, persisted as .npz."""
+
+    def __init__(self, path=INDEX_PATH, merge_every=MERGE_EVERY):
+        self.path = path
+        self.merge_every = merge_every
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.times = np.zeros(0, dtype=np.uint32)   # 0 marks an output spent since the last merge
+        self.recent = {}
+        self.tombstones = 0
+        self.lock = Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-age-save")
+        self.load()
+
+    def __len__(self):
+        return len(self.keys) - self.tombstones + len(self.recent)
+
+    def add(self, keys, created_s):
+        with self.lock:
+            for key in keys:
+                self.recent[key] = created_s
+            self._dirty = True
+            if len(self.recent) >= self.merge_every:
+                self._merge_locked()
+
+    def add_many(self, keys, times):
+        """Bulk insert (seeding); keys and times are arrays."""
+        with self.lock:
+            self._merge_locked(np.asarray(keys, dtype=np.uint64), np.asarray(times, dtype=np.uint32))
+            self._dirty = True
+
+    def _merge_locked(self, extra_keys=None, extra_times=None):
+        """Fold ``recent`` (and extra arrays) into the sorted arrays, dropping tombstones.
+
+        Only the new keys are sorted; they overwrite existing keys in place or are inserted
+        at their searchsorted positions.
+        """
+        parts_k, parts_t = [], []
+        if self.recent:
+            parts_k.append(np.fromiter(self.recent.keys(), dtype=np.uint64, count=len(self.recent)))
+            parts_t.append(np.fromiter(self.recent.values(), dtype=np.uint32, count=len(self.recent)))
+            self.recent = {}
+        if extra_keys is not None:
+            parts_k.append(extra_keys)
+            parts_t.append(extra_times)
+        if self.tombstones:
+            live = self.times != 0
+            self.keys, self.times = self.keys[live], self.times[live]
+            self.tombstones = 0
+        if not parts_k:
+            return
+        keys, times = np.concatenate(parts_k), np.concatenate(parts_t)
+        order = np.argsort(keys, kind="stable")
+        keys, times = keys[order], times[order]
+        # keep the last occurrence of duplicate keys
+        keep = np.append(keys[1:] != keys[:-1], True) if len(keys) else np.zeros(0, bool)
+        keys, times = keys[keep], times[keep]
+        pos = np.searchsorted(self.keys, keys)
+        known = pos < len(self.keys)
+        known[known] = self.keys[pos[known]] == keys[known]
+        self.times[pos[known]] = times[known]
+        new = ~known
+        self.keys = np.insert(self.keys, pos[new], keys[new])
+        self.times = np.insert(self.times, pos[new], times[new])
+
+    def lookup(self, keys, forget=False):
+        """Creation time (epoch s) per key, 0 where unknown. ``forget`` drops the found keys."""
+        keys = list(keys)
+        out = np.zeros(len(keys), dtype=np.int64)
+        with self.lock:
+            missing = []
+            for i, key in enumerate(keys):
+                created = self.recent.pop(key, None) if forget else self.recent.get(key)
+                if created is None or forget:
+                    missing.append(i)  # forgetting also clears an older copy in the arrays
+                if created is not None:
+                    out[i] = created
+            if missing and len(self.keys):
+                wanted = np.fromiter((keys[i] for i in missing), dtype=np.uint64, count=len(missing))
+                pos = np.minimum(np.searchsorted(self.keys, wanted), len(self.keys) - 1)
+                hit = (self.keys[pos] == wanted) & (self.times[pos] != 0)
+                rows = np.asarray(missing)[hit]
+                out[rows] = np.where(out[rows] > 0, out[rows], self.times[pos[hit]])
+                if forget and hit.any():
+                    self.times[pos[hit]] = 0
+                    self.tombstones += int(hit.sum())
+            if forget and out.any():
+                self._dirty = True
+        return out
+
+    def _snapshot_locked(self):
+        self._merge_locked()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        # merges replace the key array but tombstones write into times, so copy that one
+        return self.keys, self.times.copy()
+
+    def _write(self, keys, times):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, keys=keys, times=times, key_version=KEY_VERSION)
+        os.replace(tmp, self.path)
+
+    def save(self):
+        with self.lock:
+            if not self._dirty:
+                return
+            keys, times = self._snapshot_locked()
+        self._write(keys, times)
+
+    def maybe_save(self):
+        """Snapshot under the lock and write it on the save thread (keeps the ingest path fast)."""
+        with self.lock:
+            if not self._dirty or time.monotonic() - self._last_save < SAVE_INTERVAL_SECONDS:
+                return
+            keys, times = self._snapshot_locked()
+        self._saver.submit(self._write, keys, times)
+
+    def close(self):
+        """Wait for a pending background write, then save what is left (atexit)."""
+        self._saver.shutdown(wait=True)
+        self.save()
+
+    def load(self):
+        if os.path.exists(self.path):
+            with np.load(self.path) as npz:
+                if "key_version" in npz and int(npz["key_version"]) == KEY_VERSION:
+                    self.keys, self.times = npz["keys"], npz["times"]
+
+
+class CoinDaysEngine:
+    """Hourly CDD / dormancy / LTH spending aggregates fed with decoded transactions."""
+
+    def __init__(self, index=None, keep_hours=KEEP_HOURS):
+        self.index = index if index is not None else OutputAgeIndex()
+        self.keep_hours = keep_hours
+        self.hours = OrderedDict()  # hour start (epoch s) -> np.array(FIELDS)
+        self.lock = Lock()
+
+    def update(self, tx, now_s=None):
+        """Record a decoded blockchain.info ``x`` transaction: resolve its inputs, index its outputs."""
+        now_s = int(now_s or tx.get("time") or time.time())
+        inputs = [inp.get("prev_out") or {} for inp in tx.get("inputs", [])]
+        spent = [(p["tx_index"], p["n"], p.get("value", 0)) for p in inputs if "tx_index" in p and "n" in p]
+        now_s = int(now_s or time.time())
+        if spent:
+            created = self.index.lookup((output_key(t, n) for t, n, _ in spent), forget=True)
+            value_btc = np.array([value for _, _, value in spent], dtype=np.float64) / SATOSHIS_PER_BTC
+            resolved = created > 0
+            age_days = np.where(resolved, (now_s - created) / 86400.0, 0.0).clip(min=0)
+            totals = np.array([
+                float(np.sum(value_btc * age_days)),
+                float(value_btc[resolved].sum()),
+                float(value_btc[resolved & (age_days >= LTH_AGE_DAYS)].sum()),
+                float(value_btc[~resolved].sum()),
+            ])
+            hour = now_s - now_s % 3600
+            with self.lock:
+                bucket = self.hours.get(hour)
+                if bucket is None:
+                    bucket = self.hours[hour] = np.zeros(len(FIELDS))
+                    while len(self.hours) > self.keep_hours:
+                        self.hours.popitem(last=False)
+                bucket += totals
+
+        tx_index = tx.get("tx_index")
+        if tx_index is not None:
+            outs = tx.get("out", [])
+            self.index.add((output_key(tx_index, o.get("n", i)) for i, o in enumerate(outs)), now_s)
+        self.index.maybe_save()
+
+    def series(self):
+        """Hourly DataFrame: time, cdd, spent_btc, lth_spent_btc, unresolved_btc, dormancy."""
+        with self.lock:
+            items = [(hour, *bucket) for hour, bucket in self.hours.items()]
+        frame = pd.DataFrame(items, columns=("time",) + FIELDS)
+        frame["time"] = pd.to_datetime(frame["time"], unit="s", utc=True)
+        frame["dormancy"] = frame["cdd"] / frame["spent_btc"].where(frame["spent_btc"] > 0)
+        return frame.sort_values("time").reset_index(drop=True)
+
+
+coin_days = CoinDaysEngine()
+atexit.register(coin_days.index.close)
+
+
+def load_dormancy(metric, **_):
+    """Metric registry loader for the Dormancy view."""
+    return coin_days.series()[["time", "dormancy", "cdd", "lth_spent_btc"]]
+
+
+def seed(path, chunk_rows=5_000_000):
+    """Seed the output-age index from a CSV of tx_index, n, time (epoch seconds)."""
+    index = coin_days.index
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        keys = output_keys(chunk["tx_index"].to_numpy(dtype=np.uint64), chunk["n"].to_numpy(dtype=np.uint64))
+        index.add_many(keys, chunk["time"].to_numpy(dtype=np.uint32))
+    index.save()
+    return len(index)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Output-age index maintenance.")
+    parser.add_argument("command", choices=["seed"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+    print(f"indexed outputs: {seed(args.path):,}")
@@ -0,0 +1,137 @@
+# analytics/mempool_stats.py
+# Streaming statistics over every unconfirmed BTC transaction seen on the blockchain.info feed.
+# All state lives in fixed-size per-minute slots (a ring of MAX_MINUTES minutes):
+#   count / volume / fee / size totals per minute
+#   a fee-rate histogram per minute on fixed log-spaced bins (a mergeable sketch: any window's
+#   distribution is the sum of its rows, quantiles are read from the cumulative counts)
+#   input- and output-count histograms per minute
+# Memory is constant (~0.5 MB) regardless of transaction rate.
+
+from bisect import bisect_right
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+# 24h of 1-minute slots
+MAX_MINUTES = 24 * 60
+# Fee-rate bins (sat/vB), log-spaced; values outside fall into the first / last bin
+FEE_RATE_MIN = 0.1
+FEE_RATE_MAX = 10_000
+FEE_RATE_BINS = 100
+FEE_RATE_EDGES = np.logspace(np.log10(FEE_RATE_MIN), np.log10(FEE_RATE_MAX), FEE_RATE_BINS + 1)
+# Input / output count buckets: lower bounds (1, 2, 3, 4, 5-9, 10-19, 20-49, 50+)
+IO_BOUNDS = np.array([1, 2, 3, 4, 5, 10, 20, 50])
+IO_LABELS = ["1", "2", "3", "4", "5-9", "10-19", "20-49", "50+"]
+# plain lists for per-transaction bisect (cheaper than numpy calls on scalars)
+_FEE_EDGES_LIST = FEE_RATE_EDGES.tolist()
+_IO_BOUNDS_LIST = IO_BOUNDS.tolist()
+
+
+class MempoolStats:
+    """Per-minute mempool aggregates over a fixed ring of minutes."""
+
+    def __init__(self, max_minutes=MAX_MINUTES):
+        self.max_minutes = max_minutes
+        self.minute = np.full(max_minutes, -1, dtype=np.int64)  # epoch minute held by each slot
+        self.count = np.zeros(max_minutes, dtype=np.int64)
+        self.volume_sat = np.zeros(max_minutes, dtype=np.int64)
+        self.fee_sat = np.zeros(max_minutes, dtype=np.int64)
+        self.size_bytes = np.zeros(max_minutes, dtype=np.int64)
+        self.fee_hist = np.zeros((max_minutes, FEE_RATE_BINS), dtype=np.int32)
+        self.vin_hist = np.zeros((max_minutes, len(IO_BOUNDS)), dtype=np.int32)
+        self.vout_hist = np.zeros((max_minutes, len(IO_BOUNDS)), dtype=np.int32)
+        self.total = 0
+        self.newest_minute = -1
+        self.lock = Lock()
+
+    def _slot(self, minute):
+        slot = minute % self.max_minutes
+        if self.minute[slot] != minute:
+            # slot last held an older minute: recycle it
+            self.minute[slot] = minute
+            self.count[slot] = self.volume_sat[slot] = self.fee_sat[slot] = self.size_bytes[slot] = 0
+            self.fee_hist[slot] = 0
+            self.vin_hist[slot] = 0
+            self.vout_hist[slot] = 0
+        return slot
+
+    def update(self, time_s, value_sat, fee_sat, size_bytes, vin, vout):
+        """Add one transaction (fields as produced by utils.tx_prefilter.summary)."""
+        minute = int(time_s) // 60
+        with self.lock:
+            if minute <= self.newest_minute - self.max_minutes:
+                return  # older than the ring
+            self.newest_minute = max(self.newest_minute, minute)
+            slot = self._slot(minute)
+            self.count[slot] += 1
+            self.volume_sat[slot] += value_sat
+            self.fee_sat[slot] += fee_sat
+            self.size_bytes[slot] += size_bytes
+            if size_bytes > 0 and fee_sat > 0:
+                fee_bin = bisect_right(_FEE_EDGES_LIST, fee_sat / size_bytes) - 1
+                self.fee_hist[slot, min(max(fee_bin, 0), FEE_RATE_BINS - 1)] += 1
+            self.vin_hist[slot, max(bisect_right(_IO_BOUNDS_LIST, vin) - 1, 0)] += 1
+            self.vout_hist[slot, max(bisect_right(_IO_BOUNDS_LIST, vout) - 1, 0)] += 1
+            self.total += 1
+
+    def _window_slots(self, minutes, now_s=None):
+        """Slots holding minutes within the last ``minutes`` minutes, ordered by time."""
+        newest = int(now_s) // 60 if now_s is not None else self.newest_minute
+        mask = (self.minute > newest - minutes) & (self.minute <= newest) & (self.minute >= 0)
+        slots = np.flatnonzero(mask)
+        return slots[np.argsort(self.minute[slots])]
+
+    def series(self, minutes=MAX_MINUTES, now_s=None):
+        """Per-minute DataFrame: count, volume (BTC), total fee (BTC), median / p90 fee rate."""
+        with self.lock:
+            slots = self._window_slots(minutes, now_s)
+            hist = self.fee_hist[slots].astype(np.int64)
+            frame = pd.DataFrame({
+                "time": pd.to_datetime(self.minute[slots] * 60, unit="s"),
+                "tx_count": self.count[slots],
+                "volume_btc": self.volume_sat[slots] / 1e8,
+                "fees_btc": self.fee_sat[slots] / 1e8,
+            })
+        frame["fee_rate_p50"] = _hist_quantiles(hist, 0.5)
+        frame["fee_rate_p90"] = _hist_quantiles(hist, 0.9)
+        return frame
+
+    def fee_rate_histogram(self, minutes=60, now_s=None):
+        """Merged fee-rate histogram of the window: (bin edges, counts)."""
+        with self.lock:
+            counts = self.fee_hist[self._window_slots(minutes, now_s)].sum(axis=0)
+        return FEE_RATE_EDGES, counts
+
+    def fee_rate_quantiles(self, minutes=60, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9, 0.99), now_s=None):
+        _, counts = self.fee_rate_histogram(minutes, now_s)
+        return {q: float(_hist_quantiles(counts, q)[0]) for q in quantiles}
+
+    def io_distribution(self, minutes=60, now_s=None):
+        """Input / output count distribution of the window as a DataFrame indexed by bucket."""
+        with self.lock:
+            slots = self._window_slots(minutes, now_s)
+            vin = self.vin_hist[slots].sum(axis=0)
+            vout = self.vout_hist[slots].sum(axis=0)
+        return pd.DataFrame({"inputs": vin, "outputs": vout}, index=IO_LABELS)
+
+
+def _hist_quantiles(hist, q):
+    """Quantile ``q`` of each fee-rate histogram row, interpolated geometrically inside the bin.
+
+    ``hist`` is (rows, bins); returns one value per row (NaN for rows without data).
+    """
+    hist = np.atleast_2d(hist)
+    cum = np.cumsum(hist, axis=1)
+    total = cum[:, -1]
+    target = q * total
+    # first bin whose cumulative count reaches the target
+    idx = np.minimum((cum < target[:, None]).sum(axis=1), FEE_RATE_BINS - 1)
+    rows = np.arange(len(hist))
+    below = cum[rows, idx] - hist[rows, idx]
+    frac = np.clip((target - below) / np.maximum(hist[rows, idx], 1), 0, 1)
+    lo, hi = FEE_RATE_EDGES[idx], FEE_RATE_EDGES[idx + 1]
+    return np.where(total > 0, lo * (hi / lo) ** frac, np.nan)
+
+
+mempool_stats = MempoolStats()
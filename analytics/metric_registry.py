@@ -0,0 +1,186 @@
+# analytics/metric_registry.py
+# Registry of On-Chain page metrics. Each metric declares how its body is produced:
+#   loader    "module:function" returning raw data (e.g. a cached Dune query)      optional
+#   compute   "module:function" turning raw data into what the renderer needs      optional
+#   renderer  "module:function" returning the Dash component tree for the body
+#   ttl       cache policy (seconds) for the loaded / rendered result; None = not cached
+# Targets are imported with importlib on first use, so heavy modules (Dune client, pandas
+# pipelines, UTXO engines, ...) are only loaded when a metric is first opened.
+#
+# Dash only picks up callbacks that exist before the first request, so metrics whose
+# renderer module defines its own callbacks set ``callbacks=True``; those modules are imported
+# by ``import_callback_modules()`` when the page loads.
+
+import importlib
+from threading import Lock
+
+import pandas as pd
+
+from config.settings import onchain_metric_queries, onchain_history_start
+from data_sources.dune_cache import get_dune_cache, get_query_result, metric_ttl
+
+
+class MetricSpec:
+    __slots__ = ("name", "category", "renderer", "loader", "compute", "ttl", "callbacks", "params", "_resolved")
+
+    def __init__(self, name, category, renderer, loader=None, compute=None, ttl=None,
+                 callbacks=False, params=None):
+        self.name = name
+        self.category = category
+        self.renderer = renderer
+        self.loader = loader
+        self.compute = compute
+        self.ttl = ttl
+        self.callbacks = callbacks
+        self.params = params or {}
+        self._resolved = {}
+
+    def _target(self, attr):
+        """Import (once) and return the callable named by ``attr``."""
+        fn = self._resolved.get(attr)
+        if fn is None:
+            path = getattr(self, attr)
+            if callable(path):
+                fn = path
+            else:
+                module_name, func_name = path.split(":")
+                fn = getattr(importlib.import_module(module_name), func_name)
+            self._resolved[attr] = fn
+        return fn
+
+    def load(self):
+        data = self._target("loader")(self.name, **self.params) if self.loader else None
+        if self.compute:
+            data = self._target("compute")(data)
+        return data
+
+    def build(self):
+        """Load, compute and render without any caching."""
+        renderer = self._target("renderer")
+        if self.loader or self.compute:
+            return renderer(self.load(), self.name)
+        return renderer()
+
+    def render(self):
+        """Body for this metric, served through the Dune cache when a TTL is set."""
+        if self.ttl is None:
+            return self.build()
+        return get_dune_cache().memoize(self.name, self.build, ttl=self.ttl)
+
+    def warm(self):
+        """Refresh the cached body now (used by the prefetch scheduler)."""
+        if self.ttl is not None:
+            get_dune_cache().warm(self.name, self.build)
+
+
+_registry = {}
+_registry_lock = Lock()
+
+
+def register(spec):
+    with _registry_lock:
+        _registry[spec.name] = spec
+    return spec
+
+
+def get(name):
+    return _registry.get(name)
+
+
+def all_metrics():
+    with _registry_lock:
+        return list(_registry.values())
+
+
+def render(name):
+    """Component tree for metric ``name`` or None if it is not registered."""
+    spec = get(name)
+    return spec.render() if spec else None
+
+
+def import_callback_modules():
+    """Import renderer modules that define Dash callbacks (must run before the first request)."""
+    for spec in all_metrics():
+        if spec.callbacks:
+            spec._target("renderer")
+
+
+# ---------------------------------------------------------------- generic Dune-backed metrics
+def load_dune_metric(metric, query_id, params=None, since_param=None, time_column=None):
+    """Loader for metrics configured in config.settings.onchain_metric_queries.
+
+    With ``since_param`` the series is synced incrementally into the local time series store
+    (only rows at or after the last stored timestamp are queried) and read back from there.
+    """
+    if not since_param:
+        return get_query_result(query_id, params, metric=metric)
+    from data_sources.timeseries_store import get_timeseries_store
+
+    def fetch_since(since):
+        query_params = dict(params or {})
+        query_params[since_param] = since.tz_convert(None).to_pydatetime()
+        return get_dune_cache().fetch(query_id, query_params, ttl=metric_ttl(metric))
+
+    store = get_timeseries_store()
+    store.sync(metric, fetch_since, time_column, initial_since=pd.Timestamp(onchain_history_start, tz="UTC"))
+    return store.read(metric, time_column=time_column)
+
+
+def render_timeseries(df, metric):
+    """Default renderer: first column as x, every numeric column as a line."""
+    from dash import html, dcc
+    import plotly.graph_objects as go
+
+    if df is None or df.empty:
+        return html.Div(f"No data for {metric} yet.", style={"color": "#9ca3af"})
+    x = df.columns[0]
+    fig = go.Figure([go.Scatter(x=df[x], y=df[col], name=col, mode="lines")
+                     for col in df.columns[1:] if df[col].dtype.kind in "fi"])
+    fig.update_layout(title=metric, template="plotly_dark", plot_bgcolor="#1e1e2f",
+                      paper_bgcolor="#1e1e2f", font_color="#ffffff", margin=dict(l=40, r=40, t=50, b=40))
+    return html.Div([
+        html.H3(metric, style={"fontSize": "30px", "color": "#38bdf8", "fontWeight": "bold"}),
+        dcc.Graph(figure=fig, style={"height": "520px"}),
+    ])
+
+
+# ---------------------------------------------------------------- built-in metrics
+register(MetricSpec(
+    "Exchange Netflow", "Market Liquidity",
+    renderer="analytics.market_liquidity.exchange_netflow:render_exchange_netflow_layout",
+    ttl=metric_ttl("Exchange Netflow"),
+))
+register(MetricSpec(
+    "Tx Count/Volume", "Network Activity",
+    renderer="analytics.network_activity.tx_count_volume:render_tx_count_volume_layout",
+    callbacks=True,  # live view on the in-process mempool stream, no cache
+))
+register(MetricSpec(
+    "Active Addresses", "Network Activity",
+    renderer="analytics.network_activity.active_addresses:render_active_addresses_layout",
+    callbacks=True,
+))
+register(MetricSpec(
+    "Dormancy", "Holders Behavior",
+    loader="analytics.coin_days:load_dormancy",  # live hourly aggregates from the BTC stream, no cache
+    renderer=render_timeseries,
+))
+
+# computed locally from UTXO snapshots (analytics.utxo_metrics), backfilled into the time series store
+for _metric in ("MVRV Ratio", "NUPL", "SOPR", "Realized Cap", "Delta Cap"):
+    register(MetricSpec(
+        _metric, "Profitability" if _metric in ("MVRV Ratio", "NUPL", "SOPR") else "Market Valuation",
+        loader="analytics.utxo_metrics:load_metric",
+        renderer=render_timeseries,
+        ttl=metric_ttl(_metric),
+    ))
+
+for _metric, _query in onchain_metric_queries.items():
+    if _metric not in _registry:
+        register(MetricSpec(
+            _metric, None,
+            loader=load_dune_metric,
+            renderer=render_timeseries,
+            ttl=metric_ttl(_metric),
+            params={key: value for key, value in _query.items() if key in ("query_id", "params", "since_param", "time_column")},
+        ))
@@ -0,0 +1,86 @@
+# analytics/network_activity/tx_count_volume.py
+# On-Chain page: "Network Activity → Tx Count/Volume".
+# Rendered from analytics.mempool_stats, which is fed by the Trade Assistant's blockchain.info
+# stream (every unconfirmed transaction), so no extra data source is needed.
+
+import dash
+from dash import html, dcc, Input, Output
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from analytics.mempool_stats import mempool_stats, MAX_MINUTES
+from utils import metrics
+
+REFRESH_INTERVAL = 15 * 1000
+WINDOWS = {"1h": 60, "6h": 6 * 60, "24h": MAX_MINUTES}
+
+CHART_LAYOUT = dict(
+    template="plotly_dark",
+    plot_bgcolor="#1e1e2f",
+    paper_bgcolor="#1e1e2f",
+    font_color="#ffffff",
+    margin=dict(l=40, r=40, t=50, b=40),
+)
+
+
+def render_tx_count_volume_layout():
+    return html.Div([
+        html.H3("Tx Count / Volume", style={"fontSize": "30px", "color": "#38bdf8", "fontWeight": "bold"}),
+        html.P(
+            "Unconfirmed BTC transactions per minute from the live mempool stream: count, output volume, "
+            "fee-rate quantiles and input/output count distribution.",
+            style={"color": "#9ca3af"}
+        ),
+        dcc.Dropdown(
+            id="tx-activity-window",
+            options=[{"label": label, "value": label} for label in WINDOWS],
+            value="1h",
+            clearable=False,
+            style={"width": "120px", "marginBottom": "10px"},
+        ),
+        html.Div(id="tx-activity-summary", style={"color": "#e2e8f0", "marginBottom": "10px"}),
+        dcc.Graph(id="tx-activity-chart", style={"height": "520px"}),
+        dcc.Graph(id="tx-activity-distribution", style={"height": "360px"}),
+        dcc.Interval(id="tx-activity-interval", interval=REFRESH_INTERVAL, n_intervals=0),
+    ])
+
+
+@dash.callback(
+    Output("tx-activity-chart", "figure"),
+    Output("tx-activity-distribution", "figure"),
+    Output("tx-activity-summary", "children"),
+    Input("tx-activity-interval", "n_intervals"),
+    Input("tx-activity-window", "value"),
+)
+@metrics.instrument()
+def update_tx_activity(n, window):
+    minutes = WINDOWS.get(window, 60)
+    series = mempool_stats.series(minutes)
+    if series.empty:
+        fig = go.Figure()
+        fig.update_layout(**CHART_LAYOUT)
+        fig.add_annotation(text="Waiting for mempool transactions...", xref="paper", yref="paper", showarrow=False)
+        return fig, fig, ""
+
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        row_heights=[0.6, 0.4], specs=[[{"secondary_y": True}], [{}]])
+    fig.add_trace(go.Bar(x=series["time"], y=series["tx_count"], name="Tx / min", marker_color="#38bdf8"), row=1, col=1)
+    fig.add_trace(go.Scatter(x=series["time"], y=series["volume_btc"], name="Volume (BTC)", line=dict(color="#F0B90B")),
+                  row=1, col=1, secondary_y=True)
+    fig.add_trace(go.Scatter(x=series["time"], y=series["fee_rate_p50"], name="Fee rate p50", line=dict(color="#0ECB81")), row=2, col=1)
+    fig.add_trace(go.Scatter(x=series["time"], y=series["fee_rate_p90"], name="Fee rate p90", line=dict(color="#F6465D")), row=2, col=1)
+    fig.update_yaxes(title_text="sat/B", type="log", row=2, col=1)
+    fig.update_layout(title="Mempool Activity per Minute", **CHART_LAYOUT)
+
+    io = mempool_stats.io_distribution(minutes)
+    dist = go.Figure([
+        go.Bar(x=io.index, y=io["inputs"], name="Inputs"),
+        go.Bar(x=io.index, y=io["outputs"], name="Outputs"),
+    ])
+    dist.update_layout(title="Input / Output Count Distribution", barmode="group",
+                       xaxis_title="count per tx", **CHART_LAYOUT)
+
+    q = mempool_stats.fee_rate_quantiles(minutes, quantiles=(0.1, 0.5, 0.9))
+    summary = (f"{int(series['tx_count'].sum()):,} tx, {series['volume_btc'].sum():,.1f} BTC in window · "
+               f"fee rate p10 / p50 / p90: {q[0.1]:.1f} / {q[0.5]:.1f} / {q[0.9]:.1f} sat/B")
+    return fig, dist, summary
@@ -0,0 +1,161 @@
+# analytics/options_aggregates.py
+# Chain-wide options aggregates computed for all expiries at once with matrix operations.
+#
+# The chain is scattered into dense [expiry x strike] matrices (call / put OI, volume, gamma
+# exposure) over the union strike grid with one np.add.at each. From those:
+#   max pain   payout[e, s] = call_oi[e] @ max(S_s - K, 0) + put_oi[e] @ max(K - S_s, 0)
+#              i.e. two (E x G) @ (G x G) products, argmin per expiry over the strikes that
+#              expiry actually lists (instead of an O(strikes^2) loop per expiry)
+#   OI / volume by strike and put/call ratios per expiry and in total
+#   GEX        gamma * OI * spot^2 * 1% per contract: dollar gamma per 1 % move, calls
+#              positive and puts negative (dealers assumed long calls / short puts to clients)
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+CHART_LAYOUT = dict(template="plotly_dark", plot_bgcolor="#1e1e2f", paper_bgcolor="#1e1e2f",
+                    font_color="#ffffff", margin=dict(l=40, r=20, t=50, b=40))
+
+
+class OptionsAggregates:
+    """Dense per-expiry / per-strike aggregates of one chain snapshot."""
+
+    def __init__(self, frame, spot, gamma=None):
+        self.spot = spot
+        expiry_codes, self.expiries = pd.factorize(frame["expiry"], sort=False)
+        strikes = frame["strike"].to_numpy(dtype=np.float64)
+        self.strikes, strike_codes = np.unique(strikes, return_inverse=True)
+        shape = (len(self.expiries), len(self.strikes))
+        is_call = (frame["side"] == "C").to_numpy()
+        oi = frame["open_interest"].fillna(0.0).to_numpy(dtype=np.float64)
+        volume = frame["volume"].fillna(0.0).to_numpy(dtype=np.float64)
+        gamma = frame["gamma"] if gamma is None else gamma.reindex(frame.index).fillna(frame["gamma"])
+        gamma = np.nan_to_num(gamma.to_numpy(dtype=np.float64))
+
+        def scatter(values, mask):
+            out = np.zeros(shape)
+            np.add.at(out, (expiry_codes[mask], strike_codes[mask]), values[mask])
+            return out
+
+        self.listed = scatter(np.ones(len(frame)), np.ones(len(frame), dtype=bool)) > 0
+        self.call_oi = scatter(oi, is_call)
+        self.put_oi = scatter(oi, ~is_call)
+        self.call_volume = scatter(volume, is_call)
+        self.put_volume = scatter(volume, ~is_call)
+        dollar_gamma = gamma * oi * (spot or 0.0) ** 2 * 0.01
+        self.gex = scatter(dollar_gamma, is_call) - scatter(dollar_gamma, ~is_call)
+        self.expiry_ts = (frame.groupby(expiry_codes)["expiry_ts"].first().to_numpy()
+                          if len(frame) else np.zeros(0, dtype=np.int64))
+
+    def max_pain(self):
+        """Max-pain strike per expiry (NaN where the expiry has no open interest)."""
+        if not len(self.strikes):
+            return np.zeros(0)
+        diff = self.strikes[None, :] - self.strikes[:, None]        # [K, S] = S - K
+        payout = self.call_oi @ np.maximum(diff, 0.0) + self.put_oi @ np.maximum(-diff, 0.0)
+        payout = np.where(self.listed, payout, np.inf)
+        pain = self.strikes[np.argmin(payout, axis=1)]
+        has_oi = (self.call_oi + self.put_oi).sum(axis=1) > 0
+        return np.where(has_oi, pain, np.nan)
+
+    def per_expiry(self):
+        call_oi, put_oi = self.call_oi.sum(axis=1), self.put_oi.sum(axis=1)
+        call_volume, put_volume = self.call_volume.sum(axis=1), self.put_volume.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return pd.DataFrame({
+                "expiry": np.asarray(self.expiries),
+                "expiry_ts": self.expiry_ts,
+                "max_pain": self.max_pain(),
+                "call_oi": call_oi,
+                "put_oi": put_oi,
+                "pcr_oi": np.where(call_oi > 0, put_oi / call_oi, np.nan),
+                "call_volume": call_volume,
+                "put_volume": put_volume,
+                "pcr_volume": np.where(call_volume > 0, put_volume / call_volume, np.nan),
+                "net_gex": self.gex.sum(axis=1),
+            }).sort_values("expiry_ts").reset_index(drop=True)
+
+    def by_strike(self):
+        """OI, volume and GEX per strike summed over all expiries."""
+        return pd.DataFrame({
+            "strike": self.strikes,
+            "call_oi": self.call_oi.sum(axis=0),
+            "put_oi": self.put_oi.sum(axis=0),
+            "call_volume": self.call_volume.sum(axis=0),
+            "put_volume": self.put_volume.sum(axis=0),
+            "net_gex": self.gex.sum(axis=0),
+        })
+
+    def totals(self):
+        call_oi, put_oi = self.call_oi.sum(), self.put_oi.sum()
+        call_volume, put_volume = self.call_volume.sum(), self.put_volume.sum()
+        return {
+            "call_oi": float(call_oi), "put_oi": float(put_oi),
+            "pcr_oi": float(put_oi / call_oi) if call_oi else np.nan,
+            "call_volume": float(call_volume), "put_volume": float(put_volume),
+            "pcr_volume": float(put_volume / call_volume) if call_volume else np.nan,
+            "net_gex": float(self.gex.sum()),
+        }
+
+    # ---------------------------------------------------------------- signals / plots
+    def signals(self):
+        """Short text signals for the Options page's signals block."""
+        if not len(self.expiries):
+            return []
+        totals = self.totals()
+        per_expiry = self.per_expiry()
+        out = []
+        front = per_expiry.dropna(subset=["max_pain"]).head(1)
+        if len(front) and self.spot:
+            pain = front["max_pain"].iloc[0]
+            gap = (pain - self.spot) / self.spot * 100
+            out.append(f"Max pain for {front['expiry'].iloc[0]} is {pain:,.0f} ({gap:+.1f}% vs index "
+                       f"{self.spot:,.0f}); price tends to gravitate towards it into expiry.")
+        if np.isfinite(totals["pcr_oi"]):
+            tone = "bearish hedging" if totals["pcr_oi"] > 1 else "call-heavy positioning"
+            out.append(f"Put/Call OI ratio {totals['pcr_oi']:.2f} (volume {totals['pcr_volume']:.2f}): {tone}.")
+        if totals["net_gex"]:
+            regime = ("positive: dealer hedging dampens moves" if totals["net_gex"] > 0
+                      else "negative: dealer hedging amplifies moves")
+            sign = "-" if totals["net_gex"] < 0 else ""
+            out.append(f"Net gamma exposure {sign}${abs(totals['net_gex']) / 1e6:,.1f}M per 1% move ({regime}).")
+        by_strike = self.by_strike()
+        if by_strike["call_oi"].any():
+            out.append(f"Largest call OI at {by_strike.loc[by_strike['call_oi'].idxmax(), 'strike']:,.0f}, "
+                       f"largest put OI at {by_strike.loc[by_strike['put_oi'].idxmax(), 'strike']:,.0f}.")
+        return out
+
+    def figures(self):
+        """OI by strike, GEX by strike and max pain per expiry charts."""
+        by_strike = self.by_strike()
+        per_expiry = self.per_expiry()
+
+        oi_fig = go.Figure([
+            go.Bar(x=by_strike["strike"], y=by_strike["call_oi"], name="Call OI", marker_color="#0ECB81"),
+            go.Bar(x=by_strike["strike"], y=-by_strike["put_oi"], name="Put OI", marker_color="#F6465D"),
+        ])
+        oi_fig.update_layout(title="Open Interest by Strike (All Expiries)", barmode="relative",
+                             xaxis_title="Strike", yaxis_title="Contracts", **CHART_LAYOUT)
+
+        gex_fig = go.Figure(go.Bar(x=by_strike["strike"], y=by_strike["net_gex"] / 1e6,
+                                   marker_color=np.where(by_strike["net_gex"] >= 0, "#0ECB81", "#F6465D")))
+        gex_fig.update_layout(title="Net Gamma Exposure by Strike ($M per 1% move)",
+                              xaxis_title="Strike", yaxis_title="$M", **CHART_LAYOUT)
+
+        pain_fig = go.Figure(go.Scatter(x=per_expiry["expiry"].astype(str), y=per_expiry["max_pain"],
+                                        mode="lines+markers", line=dict(color="#F0B90B"), name="Max Pain"))
+        if self.spot:
+            pain_fig.add_hline(y=self.spot, line_dash="dot", line_color="#38bdf8")
+        pain_fig.update_layout(title="Max Pain by Expiry", xaxis_title="Expiry", yaxis_title="Price",
+                               xaxis_type="category", **CHART_LAYOUT)
+        for fig in (oi_fig, gex_fig):
+            if self.spot:
+                fig.add_vline(x=self.spot, line_dash="dot", line_color="#38bdf8")
+        return [oi_fig, gex_fig, pain_fig]
+
+
+def aggregate_chain(snapshot, greeks=None):
+    """Aggregates of a utils.options_chain snapshot (greeks from options_pricing.chain_greeks)."""
+    gamma = greeks["gamma"] if greeks is not None else None
+    return OptionsAggregates(snapshot.frame, snapshot.index_price, gamma)
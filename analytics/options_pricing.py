@@ -0,0 +1,158 @@
+# analytics/options_pricing.py
+# Vectorized Black-Scholes pricing, greeks and implied volatility for whole options chains.
+#
+# Every function takes numpy arrays (or scalars that broadcast) so a full BTC / ETH chain is
+# priced in one pass instead of a per-contract Python loop. The IV solver runs Newton steps on
+# all contracts at once, keeps a per-contract [low, high] bracket that shrinks with every
+# evaluation, and falls back to bisection wherever a Newton step would leave the bracket or
+# vega is too small, so it always converges for prices inside the no-arbitrage bounds.
+# Convergence is judged against the time value (price minus intrinsic), not the full price:
+# a deep in-the-money price is mostly intrinsic value, so a relative-to-price stop would
+# accept sigmas that miss the little volatility information the price carries.
+#
+# Units: T in years, sigma as a decimal (0.55 = 55 %), vega per 1 vol point, theta per day.
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+RISK_FREE_RATE = 0.0
+MIN_VOL, MAX_VOL = 1e-4, 5.0
+IV_TOLERANCE = 1e-6
+IV_MAX_ITER = 60
+# Below this time value (fraction of spot) the price carries no usable volatility information
+MIN_TIME_VALUE = 1e-6
+MS_PER_YEAR = 365.0 * 24 * 3600 * 1000
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def _pdf(x):
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def _d1_d2(S, K, T, sigma, r):
+    vol_t = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_t
+    return d1, d1 - vol_t
+
+
+def bs_price(S, K, T, sigma, is_call, r=RISK_FREE_RATE):
+    """Black-Scholes price of calls (``is_call`` True) and puts."""
+    S, K, T, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (S, K, T, sigma)))
+    d1, d2 = _d1_d2(S, K, T, sigma, r)
+    discount = K * np.exp(-r * T)
+    call = S * ndtr(d1) - discount * ndtr(d2)
+    return np.where(is_call, call, call - S + discount)  # put-call parity
+
+
+def bs_greeks(S, K, T, sigma, is_call, r=RISK_FREE_RATE):
+    """Dict of delta, gamma, vega (per vol point) and theta (per day) arrays."""
+    S, K, T, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (S, K, T, sigma)))
+    d1, d2 = _d1_d2(S, K, T, sigma, r)
+    sqrt_t = np.sqrt(T)
+    pdf_d1 = _pdf(d1)
+    discount = K * np.exp(-r * T)
+    call_delta = ndtr(d1)
+    decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+    call_theta = decay - r * discount * ndtr(d2)
+    put_theta = decay + r * discount * ndtr(-d2)
+    return {
+        "delta": np.where(is_call, call_delta, call_delta - 1.0),
+        "gamma": pdf_d1 / (S * sigma * sqrt_t),
+        "vega": S * pdf_d1 * sqrt_t / 100.0,
+        "theta": np.where(is_call, call_theta, put_theta) / 365.0,
+    }
+
+
+def implied_vol(price, S, K, T, is_call, r=RISK_FREE_RATE, tol=IV_TOLERANCE, max_iter=IV_MAX_ITER):
+    """Implied volatility per contract; NaN outside the arbitrage bounds or without time value."""
+    price, S, K, T = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (price, S, K, T)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+    discount = K * np.exp(-r * T)
+    lower = np.where(is_call, np.maximum(S - discount, 0.0), np.maximum(discount - S, 0.0))
+    upper = np.where(is_call, S, discount)
+    valid = (np.isfinite(price) & (T > 0) & (S > 0) & (K > 0)
+             & (price - lower > MIN_TIME_VALUE * S) & (price < upper))
+
+    iv = np.full(price.shape, np.nan)
+    idx = np.flatnonzero(valid)
+    if not len(idx):
+        return iv
+    p, s, k, t, c = price.flat[idx], S.flat[idx], K.flat[idx], T.flat[idx], is_call.flat[idx]
+    time_value = p - lower.flat[idx]
+    lo, hi = np.full(len(idx), MIN_VOL), np.full(len(idx), MAX_VOL)
+    # Brenner-Subrahmanyam start, clipped into the bracket
+    sigma = np.clip(np.sqrt(2 * np.pi / t) * p / s, 0.05, 2.0)
+    active = np.arange(len(idx))
+
+    for _ in range(max_iter):
+        sg, ss, kk, tt, cc = sigma[active], s[active], k[active], t[active], c[active]
+        diff = bs_price(ss, kk, tt, sg, cc, r) - p[active]
+        d1, _ = _d1_d2(ss, kk, tt, sg, r)
+        vega = ss * _pdf(d1) * np.sqrt(tt)
+        # price is increasing in sigma: shrink the bracket around the root
+        hi[active] = np.where(diff > 0, sg, hi[active])
+        lo[active] = np.where(diff <= 0, sg, lo[active])
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = sg - diff / vega
+        bad = ~np.isfinite(newton) | (newton <= lo[active]) | (newton >= hi[active])
+        done = (np.abs(diff) < tol * time_value[active]) | (hi[active] - lo[active] < tol)
+        sigma[active] = np.where(done, sg, np.where(bad, 0.5 * (lo[active] + hi[active]), newton))
+        active = active[~done]
+        if not len(active):
+            break
+
+    iv.flat[idx] = sigma
+    return iv
+
+
+def years_to_expiry(expiry_ts, now_ms=None):
+    """Year fractions from epoch-ms expiry timestamps (floored at one minute)."""
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    return np.maximum((np.asarray(expiry_ts, dtype=np.float64) - now_ms) / MS_PER_YEAR, 60_000 / MS_PER_YEAR)
+
+
+def chain_greeks(frame, spot, now_ms=None, r=RISK_FREE_RATE):
+    """IV and greeks for a chain frame (strike, side, expiry_ts, mark_price columns).
+
+    Returns a DataFrame with the same index and columns strike, iv, delta, gamma, vega, theta.
+    """
+    if frame.empty or not spot:
+        return pd.DataFrame(index=frame.index, columns=["strike", "iv", "delta", "gamma", "vega", "theta"], dtype=float)
+    K = frame["strike"].to_numpy(dtype=np.float64)
+    T = years_to_expiry(frame["expiry_ts"].to_numpy(), now_ms)
+    is_call = (frame["side"] == "C").to_numpy()
+    iv = implied_vol(frame["mark_price"].to_numpy(dtype=np.float64), spot, K, T, is_call, r)
+    greeks = bs_greeks(spot, K, T, iv, is_call, r)
+    return pd.DataFrame({"strike": K, "iv": iv, **greeks}, index=frame.index)
+
+
+def add_greeks(df, greeks):
+    """Append IV (%), Delta, Gamma, Vega and Theta columns to an analysis table.
+
+    Rows are matched on a symbol column when the table has one, otherwise on strike.
+    """
+    if df is None or df.empty or greeks is None or greeks.empty:
+        return df
+    columns = pd.DataFrame({
+        "IV": (greeks["iv"] * 100).round(2),
+        "Delta": greeks["delta"].round(4),
+        "Gamma": greeks["gamma"].round(6),
+        "Vega": greeks["vega"].round(2),
+        "Theta": greeks["theta"].round(2),
+    }, index=greeks.index)
+    lowered = {str(col).lower().replace(" ", "").replace("_", ""): col for col in df.columns}
+    if "symbol" in lowered:
+        keys = df[lowered["symbol"]].astype(str)
+    else:
+        strike_col = next((lowered[name] for name in ("strike", "strikeprice") if name in lowered), None)
+        if strike_col is None:
+            return df
+        columns.index = greeks["strike"].to_numpy()
+        keys = pd.to_numeric(df[strike_col], errors="coerce")
+    columns = columns[~columns.index.duplicated()]
+    joined = columns.reindex(keys.to_numpy())
+    joined.index = df.index
+    return pd.concat([df.drop(columns=[c for c in columns.columns if c in df.columns]), joined], axis=1)
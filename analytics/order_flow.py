@@ -0,0 +1,220 @@
+# analytics/order_flow.py
+# Streaming order-flow analytics per symbol over the Binance trade stream.
+# Maintains cumulative volume delta (CVD), aggressor imbalance over rolling windows,
+# trade-size buckets and per-candle footprint bars, all updated incrementally from
+# new trades only (nothing is re-scanned on refresh).
+
+from collections import OrderedDict, deque
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from analytics.volume_profile import default_tick_size
+
+# Rolling windows for aggressor imbalance (label -> seconds)
+IMBALANCE_WINDOWS = {"1m": 60, "5m": 5 * 60, "15m": 15 * 60}
+# Trade-size buckets by notional value (quote currency); a trade falls in the last bucket whose bound it reaches
+SIZE_BUCKETS = {"small": 0, "medium": 10_000, "large": 100_000}
+# Footprint candle length and how many candles are kept (24h of 1m candles)
+CANDLE_SECONDS = 60
+# Binance kline intervals -> pandas resample rules ("1M" would be minutes / rejected by pandas)
+RESAMPLE_RULES = {
+    "1m": "1min", "3m": "3min", "5m": "5min", "15m": "15min", "30m": "30min",
+    "1h": "1h", "2h": "2h", "4h": "4h", "6h": "6h", "8h": "8h", "12h": "12h",
+    "1d": "1D", "3d": "3D", "1w": "1W", "1M": "1MS",
+}
+MAX_CANDLES = 24 * 60
+
+
+class FootprintCandle:
+    """OHLC + aggressor volume of one candle, with buy/sell volume per price level."""
+
+    __slots__ = ("open", "high", "low", "close", "buy", "sell", "cvd", "levels", "size_delta")
+
+    def __init__(self, price):
+        self.open = self.high = self.low = self.close = price
+        self.buy = 0.0
+        self.sell = 0.0
+        self.cvd = 0.0
+        self.levels = {}  # price bucket -> [buy, sell]
+        self.size_delta = dict.fromkeys(SIZE_BUCKETS, 0.0)
+
+    @property
+    def delta(self):
+        return self.buy - self.sell
+
+
+class OrderFlowEngine:
+    """Incremental order-flow state for one symbol.
+
+    ``update`` accepts trade batches that may overlap earlier ones; trades are
+    de-duplicated by Binance trade id and must arrive in id order across batches.
+    """
+
+    def __init__(self, candle_seconds=CANDLE_SECONDS, max_candles=MAX_CANDLES, tick_size=None):
+        self.candle_seconds = candle_seconds
+        self.max_candles = max_candles
+        self.tick_size = tick_size
+        self.last_trade_id = -1
+        self.cvd = 0.0
+        self.trade_count = 0
+        self.candles = OrderedDict()  # candle start (epoch s) -> FootprintCandle
+        # per-window deque of (second, buy, sell, large_delta) plus running sums
+        self._windows = {label: deque() for label in IMBALANCE_WINDOWS}
+        self._window_sums = {label: np.zeros(3) for label in IMBALANCE_WINDOWS}
+        self.lock = Lock()
+
+    # ---------------------------------------------------------------- ingest
+    def update(self, trades):
+        """Feed raw Binance trade dicts (``id``, ``time``, ``price``, ``qty``, ``isBuyerMaker``)."""
+        fresh = [t for t in trades if t.get("id", -1) > self.last_trade_id] if trades else []
+        if not fresh:
+            return 0
+        fresh.sort(key=lambda t: t["id"])
+        self.last_trade_id = fresh[-1]["id"]
+
+        ts = np.array([t["time"] for t in fresh], dtype=np.int64) // 1000
+        price = np.array([float(t["price"]) for t in fresh])
+        qty = np.array([float(t["qty"]) for t in fresh])
+        is_sell = np.array([bool(t["isBuyerMaker"]) for t in fresh])
+        self._ingest(ts, price, qty, is_sell)
+        return len(fresh)
+
+    def _ingest(self, ts, price, qty, is_sell):
+        if self.tick_size is None:
+            self.tick_size = default_tick_size(float(np.median(price)), buckets_per_decade=2000)
+
+        signed = np.where(is_sell, -qty, qty)
+        buy_qty = np.where(is_sell, 0.0, qty)
+        sell_qty = np.where(is_sell, qty, 0.0)
+        notional = price * qty
+        size_idx = np.searchsorted(list(SIZE_BUCKETS.values()), notional, side="right") - 1
+        size_names = list(SIZE_BUCKETS)
+        large = size_idx == size_names.index("large")
+
+        # running CVD after each trade, continuing from the previous state
+        cvd_path = self.cvd + np.cumsum(signed)
+        self.cvd = float(cvd_path[-1])
+        self.trade_count += len(ts)
+
+        # --- rolling imbalance windows (aggregate per second first)
+        seconds, first = np.unique(ts, return_index=True)
+        sec_buy = np.add.reduceat(buy_qty, first)
+        sec_sell = np.add.reduceat(sell_qty, first)
+        sec_large = np.add.reduceat(np.where(large, signed, 0.0), first)
+        now = int(seconds[-1])
+        for label, length in IMBALANCE_WINDOWS.items():
+            window, sums = self._windows[label], self._window_sums[label]
+            for row in zip(seconds.tolist(), sec_buy, sec_sell, sec_large):
+                window.append(row)
+                sums += row[1:]
+            while window and window[0][0] <= now - length:
+                old = window.popleft()
+                sums -= old[1:]
+
+        # --- footprint candles
+        candle_start = ts - ts % self.candle_seconds
+        level = np.floor(price / self.tick_size).astype(np.int64)
+        starts, first = np.unique(candle_start, return_index=True)
+        bounds = list(first[1:]) + [len(ts)]
+        for start, lo, hi in zip(starts.tolist(), first.tolist(), bounds):
+            candle = self.candles.get(start)
+            if candle is None:
+                candle = self.candles[start] = FootprintCandle(float(price[lo]))
+            p = price[lo:hi]
+            candle.high = max(candle.high, float(p.max()))
+            candle.low = min(candle.low, float(p.min()))
+            candle.close = float(p[-1])
+            candle.buy += float(buy_qty[lo:hi].sum())
+            candle.sell += float(sell_qty[lo:hi].sum())
+            candle.cvd = float(cvd_path[hi - 1])
+            for i, name in enumerate(size_names):
+                mask = size_idx[lo:hi] == i
+                if mask.any():
+                    candle.size_delta[name] += float(signed[lo:hi][mask].sum())
+            lv, inverse = np.unique(level[lo:hi], return_inverse=True)
+            lv_buy = np.bincount(inverse, weights=buy_qty[lo:hi], minlength=len(lv))
+            lv_sell = np.bincount(inverse, weights=sell_qty[lo:hi], minlength=len(lv))
+            for key, b, s in zip(lv.tolist(), lv_buy, lv_sell):
+                cell = candle.levels.setdefault(key, [0.0, 0.0])
+                cell[0] += b
+                cell[1] += s
+        while len(self.candles) > self.max_candles:
+            self.candles.popitem(last=False)
+
+    # ---------------------------------------------------------------- read
+    def imbalance(self, label):
+        """Aggressor imbalance (buy - sell) / (buy + sell) over a rolling window, in [-1, 1]."""
+        buy, sell, _ = self._window_sums[label]
+        total = buy + sell
+        return float((buy - sell) / total) if total > 0 else 0.0
+
+    def large_delta(self, label="15m"):
+        """Signed volume of large trades over a rolling window."""
+        return float(self._window_sums[label][2])
+
+    def summary(self):
+        row = {"CVD": round(self.cvd, 2)}
+        for label in IMBALANCE_WINDOWS:
+            row[f"Imb {label}"] = round(self.imbalance(label), 2)
+        row["Large Δ 15m"] = round(self.large_delta("15m"), 2)
+        return row
+
+    def candles_frame(self):
+        """Per-candle OHLC, buy, sell, delta and closing CVD as a DataFrame indexed by UTC time."""
+        if not self.candles:
+            return pd.DataFrame(columns=["open", "high", "low", "close", "buy", "sell", "delta", "cvd"])
+        rows = [
+            (start, c.open, c.high, c.low, c.close, c.buy, c.sell, c.delta, c.cvd)
+            for start, c in self.candles.items()
+        ]
+        df = pd.DataFrame(rows, columns=["time", "open", "high", "low", "close", "buy", "sell", "delta", "cvd"])
+        df.index = pd.to_datetime(df.pop("time"), unit="s", utc=True)
+        return df
+
+    def cvd_series(self, timeframe="1m"):
+        """CVD at the close of each candle resampled to a Binance-style timeframe (e.g. '5m', '1h')."""
+        df = self.candles_frame()
+        if df.empty:
+            return df["cvd"]
+        rule = RESAMPLE_RULES.get(timeframe)
+        if rule is None:
+            raise ValueError(f"unsupported timeframe {timeframe!r}; expected one of {', '.join(RESAMPLE_RULES)}")
+        return df["cvd"].resample(rule).last().dropna()
+
+    def footprint(self, candle_start):
+        """Return a DataFrame of buy/sell volume by price level for one candle (epoch seconds)."""
+        candle = self.candles.get(candle_start)
+        if candle is None:
+            return pd.DataFrame(columns=["price", "buy", "sell", "delta"])
+        keys = sorted(candle.levels)
+        buy = np.array([candle.levels[k][0] for k in keys])
+        sell = np.array([candle.levels[k][1] for k in keys])
+        return pd.DataFrame({
+            "price": (np.array(keys) + 0.5) * self.tick_size,
+            "buy": buy,
+            "sell": sell,
+            "delta": buy - sell,
+        })
+
+
+_engines = {}
+_engines_lock = Lock()
+
+
+def get_order_flow(symbol):
+    """Return the shared OrderFlowEngine of a symbol, creating it on first use."""
+    with _engines_lock:
+        engine = _engines.get(symbol)
+        if engine is None:
+            engine = _engines[symbol] = OrderFlowEngine()
+        return engine
+
+
+def update_from_trades(symbol, trades):
+    """Feed a batch of raw trades into a symbol's engine and return the engine."""
+    engine = get_order_flow(symbol)
+    with engine.lock:
+        engine.update(trades)
+    return engine
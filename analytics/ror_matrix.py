@@ -0,0 +1,96 @@
+# analytics/ror_matrix.py
+# All-pairs Relative Opportunity Ratio (ROR) across a symbol universe.
+#
+# The Pair Analysis page compares symbol 2 (risky) against symbol 1 (base) per timeframe:
+#   growth potential = mean positive range %(2) - mean positive range %(1)
+#   risk difference  = |mean negative range %(2)| - |mean negative range %(1)|
+#   ROR              = growth potential / risk difference
+# Both terms are differences of per-symbol statistics, so for N symbols the full N x N matrices
+# come from one pass: the signed range % series are aligned into an [N x T] array (NaN where a
+# symbol has no candle), the per-symbol means are masked reductions over it, and the matrices
+# are outer differences by broadcasting. Rows are the base symbol, columns the risky one.
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+class RorMatrix:
+    """Growth-potential, risk-difference and ROR matrices for one timeframe."""
+
+    def __init__(self, symbols, mean_pos, mean_neg):
+        self.symbols = list(symbols)
+        self.mean_pos = mean_pos
+        self.mean_neg = mean_neg
+        self.growth = mean_pos[None, :] - mean_pos[:, None]
+        risk = np.abs(mean_neg)
+        self.risk = risk[None, :] - risk[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.ror = np.where(self.risk != 0, self.growth / self.risk, np.nan)
+
+    def frame(self, name="ror"):
+        return pd.DataFrame(getattr(self, name), index=self.symbols, columns=self.symbols)
+
+    def ranking(self, base):
+        """Every other symbol as the risky leg against ``base``.
+
+        The raw ratio is only comparable when both terms are positive (a negative / negative
+        pair has a large ROR with less upside), so rows are grouped by sign case first:
+          1. "More upside, less risk"   growth > 0, risk <= 0   by growth, highest first
+          2. "More upside, more risk"   growth > 0, risk > 0    by ROR, highest first
+          3. "Less upside"              growth <= 0 (or NaN)    by growth, highest first
+        """
+        columns = ["Symbol", "Case", "Growth Potential %", "Risk Difference %", "ROR"]
+        if base not in self.symbols:
+            return pd.DataFrame(columns=columns)
+        i = self.symbols.index(base)
+        growth, risk, ror = self.growth[i], self.risk[i], self.ror[i]
+        dominant = (growth > 0) & (risk <= 0)
+        tradeoff = (growth > 0) & (risk > 0)
+        case = np.select([dominant, tradeoff], [0, 1], default=2)
+        score = np.where(tradeoff, ror, growth)
+        order = [j for j in np.lexsort((-np.nan_to_num(score, nan=-np.inf), case)) if j != i]
+        labels = np.array(["More upside, less risk", "More upside, more risk", "Less upside"])
+        return pd.DataFrame({
+            "Symbol": np.asarray(self.symbols)[order],
+            "Case": labels[case[order]],
+            "Growth Potential %": growth[order].round(2),
+            "Risk Difference %": risk[order].round(2),
+            "ROR": ror[order].round(2),
+        }, columns=columns)
+
+    def heatmap(self, title="ROR Matrix (row = base, column = risky)", clip=5.0):
+        z = np.clip(self.ror, -clip, clip)
+        fig = go.Figure(go.Heatmap(
+            z=z, x=self.symbols, y=self.symbols, zmid=1.0, colorscale="RdYlGn",
+            customdata=np.dstack([self.growth, self.risk, self.ror]),
+            hovertemplate="base %{y} / risky %{x}<br>growth %{customdata[0]:.2f}%"
+                          "<br>risk %{customdata[1]:.2f}%<br>ROR %{customdata[2]:.2f}<extra></extra>",
+            colorbar=dict(title="ROR"),
+        ))
+        fig.update_layout(title=title, template="plotly_dark", plot_bgcolor="#1e1e2f", paper_bgcolor="#1e1e2f",
+                          height=max(400, 28 * len(self.symbols)), margin=dict(l=80, r=20, t=50, b=80),
+                          yaxis=dict(autorange="reversed"))
+        return fig
+
+
+def aligned_ranges(series_by_symbol):
+    """[N x T] array of signed range % on the union of candle timestamps (NaN where missing)."""
+    symbols = list(series_by_symbol)
+    index = pd.Index(np.unique(np.concatenate([s.index.to_numpy() for s in series_by_symbol.values()]))) \
+        if symbols else pd.Index([])
+    values = np.full((len(symbols), len(index)), np.nan)
+    for row, series in enumerate(series_by_symbol.values()):
+        values[row, index.get_indexer(series.index)] = series.to_numpy(dtype=np.float64)
+    return symbols, index, values
+
+
+def compute_ror_matrix(series_by_symbol):
+    """RorMatrix from {symbol: signed range % Series} (see pages.pair_analysis.range_stats)."""
+    symbols, _, values = aligned_ranges(series_by_symbol)
+    up, down = values > 0, values < 0          # NaN compares False on both
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # symbols without up / down candles get NaN means
+        mean_pos = np.where(up, values, 0.0).sum(axis=1) / up.sum(axis=1)
+        mean_neg = np.where(down, values, 0.0).sum(axis=1) / down.sum(axis=1)
+    return RorMatrix(symbols, mean_pos, mean_neg)
@@ -0,0 +1,336 @@
+# analytics/utxo_metrics.py
+# Local computation of UTXO-based valuation metrics (Realized Cap, MVRV, NUPL, SOPR, Delta Cap).
+#
+# Inputs (CSV, any size; read in chunks):
+#   outputs   outpoint, created_time, value_sat[, created_price]   UTXO-set snapshot / created outputs
+#   spends    outpoint, spent_time[, spent_price]                  spent-output records
+#   prices    date, price                                          daily BTC/USD close
+# ``ingest_*`` converts them into column files under config.settings.utxo_dir:
+#   <utxo_dir>/outputs/{key,created_day,value_sat,created_price,spent_day,spent_price}.npy
+# which are opened memory-mapped, so the whole UTXO history never has to fit in RAM. Ingest is an
+# external sort: every CSV chunk is sorted by key and written as a run, and the runs are merged
+# block by block into the final column files, so memory stays around one chunk.
+#
+# Every daily metric is one vectorized pass: each output adds +value at its creation day and
+# -value at its spend day to difference arrays (np.bincount), and a cumulative sum turns them
+# into per-day supply / realized cap. SOPR comes from bincounts over the spend day.
+# Creation / spend prices missing from the CSVs are filled from the daily close when the
+# metrics are computed, so the ingest steps can run in any order. Days outside the price
+# history get NaN, and such outputs are left out of realized cap and SOPR (still in supply).
+#
+#   python -m analytics.utxo_metrics ingest-prices prices.csv
+#   python -m analytics.utxo_metrics ingest-outputs outputs.csv
+#   python -m analytics.utxo_metrics ingest-spends spends.csv
+#   python -m analytics.utxo_metrics backfill          # recompute and store all daily metrics
+
+import os
+import shutil
+import tempfile
+import time
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from config.settings import utxo_dir
+
+SATOSHIS_PER_BTC = 10**8
+CHUNK_ROWS = 2_000_000
+UNSPENT = -1
+COLUMNS = {
+    "key": np.uint64,            # hash of the outpoint (txid:vout)
+    "created_day": np.int32,     # days since epoch
+    "value_sat": np.int64,
+    "created_price": np.float64,
+    "spent_day": np.int32,       # UNSPENT while unspent
+    "spent_price": np.float64,
+}
+METRIC_COLUMNS = {
+    "Realized Cap": ["realized_cap", "market_cap"],
+    "MVRV Ratio": ["mvrv"],
+    "NUPL": ["nupl"],
+    "SOPR": ["sopr"],
+    "Delta Cap": ["delta_cap", "realized_cap", "average_cap"],
+}
+
+
+def _outputs_dir(root=utxo_dir):
+    return os.path.join(root, "outputs")
+
+
+def _day(values):
+    """Epoch day numbers from timestamps (epoch seconds or anything pandas parses)."""
+    values = pd.Series(values)
+    if values.dtype.kind in "iuf":
+        return (values.to_numpy(dtype=np.int64) // 86400).astype(np.int32)
+    naive = pd.to_datetime(values, utc=True, format="mixed").dt.tz_convert(None)
+    return naive.to_numpy().astype("datetime64[D]").astype(np.int64).astype(np.int32)
+
+
+def _outpoint_key(outpoints):
+    return pd.util.hash_pandas_object(pd.Series(outpoints, dtype=str), index=False).to_numpy(dtype=np.uint64)
+
+
+# ---------------------------------------------------------------- prices
+def ingest_prices(path, root=utxo_dir):
+    df = pd.read_csv(path)
+    days = _day(df.iloc[:, 0])
+    prices = df.iloc[:, 1].to_numpy(dtype=np.float64)
+    os.makedirs(root, exist_ok=True)
+    np.savez(os.path.join(root, "prices.npz"), day=days, price=prices)
+
+
+def load_prices(root=utxo_dir):
+    """Daily close as a dense array indexed from the first price day (forward-filled)."""
+    with np.load(os.path.join(root, "prices.npz")) as npz:
+        days, prices = npz["day"], npz["price"]
+    order = np.argsort(days)
+    days, prices = days[order], prices[order]
+    first = int(days[0])
+    dense = pd.Series(prices, index=days - first).reindex(np.arange(int(days[-1]) - first + 1)).ffill()
+    return first, dense.to_numpy()
+
+
+def _close_on(days, first_day, prices):
+    """Daily close per epoch day (NaN outside the price history)."""
+    offset = np.asarray(days, dtype=np.int64) - first_day
+    inside = (offset >= 0) & (offset < len(prices))
+    return np.where(inside, prices[np.clip(offset, 0, len(prices) - 1)], np.nan)
+
+
+def _fill_prices(price, days, first_day, prices):
+    """``price`` with NaNs replaced by the daily close of ``days``."""
+    price = np.asarray(price, dtype=np.float64)
+    missing = np.isnan(price)
+    if not missing.any():
+        return price
+    price = price.copy()
+    price[missing] = _close_on(np.asarray(days)[missing], first_day, prices)
+    return price
+
+
+# ---------------------------------------------------------------- outputs / spends
+def _write_columns(directory, length):
+    """Open memory-mapped ``<col>.npy`` files of ``length`` rows for every output column."""
+    os.makedirs(directory, exist_ok=True)
+    return {col: np.lib.format.open_memmap(os.path.join(directory, f"{col}.npy"), mode="w+",
+                                           dtype=dtype, shape=(length,))
+            for col, dtype in COLUMNS.items()}
+
+
+def _merge_runs(runs, directory, block_rows):
+    """K-way merge of key-sorted runs (dicts of memmapped columns) into new column files.
+
+    Each step loads the next block of every run, emits everything up to the smallest block-end
+    key (no unread row can sort before it) and advances each run past what it emitted.
+    """
+    total = sum(len(run["key"]) for run in runs)
+    out = _write_columns(directory, total)
+    block = max(1, block_rows // max(1, len(runs)))
+    pos = [0] * len(runs)
+    written = 0
+    while written < total:
+        live = [i for i, run in enumerate(runs) if pos[i] < len(run["key"])]
+        heads = {i: np.asarray(runs[i]["key"][pos[i]:pos[i] + block]) for i in live}
+        cutoff = min(heads[i][-1] for i in live)
+        take = {i: int(np.searchsorted(heads[i], cutoff, side="right")) for i in live}
+        keys = np.concatenate([heads[i][:take[i]] for i in live])
+        order = np.argsort(keys, kind="stable")
+        end = written + len(keys)
+        for col in COLUMNS:
+            values = np.concatenate([runs[i][col][pos[i]:pos[i] + take[i]] for i in live])
+            out[col][written:end] = values[order]
+        for i in live:
+            pos[i] += take[i]
+        written = end
+    for arr in out.values():
+        arr.flush()
+    return total
+
+
+def ingest_outputs(path, root=utxo_dir, chunk_rows=CHUNK_ROWS):
+    """Convert an outputs CSV into sorted, memory-mappable column files (external sort)."""
+    directory = _outputs_dir(root)
+    os.makedirs(directory, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix="runs-", dir=directory)
+    try:
+        runs = []
+        for n, chunk in enumerate(pd.read_csv(path, chunksize=chunk_rows)):
+            created_day = _day(chunk["created_time"])
+            if "created_price" in chunk:
+                created_price = chunk["created_price"].to_numpy(dtype=np.float64)
+            else:
+                created_price = np.full(len(chunk), np.nan)  # filled from the daily close later
+            key = _outpoint_key(chunk["outpoint"])
+            order = np.argsort(key, kind="stable")  # sorted keys allow a searchsorted join with spends
+            run_dir = os.path.join(scratch, str(n))
+            run = _write_columns(run_dir, len(chunk))
+            run["key"][:] = key[order]
+            run["created_day"][:] = created_day[order]
+            run["value_sat"][:] = chunk["value_sat"].to_numpy(dtype=np.int64)[order]
+            run["created_price"][:] = created_price[order]
+            run["spent_day"][:] = UNSPENT
+            run["spent_price"][:] = np.nan
+            for arr in run.values():
+                arr.flush()
+            del run
+            runs.append({col: np.load(os.path.join(run_dir, f"{col}.npy"), mmap_mode="r") for col in COLUMNS})
+        if not runs:
+            for arr in _write_columns(directory, 0).values():
+                arr.flush()
+            return 0
+        return _merge_runs(runs, directory, chunk_rows)
+    finally:
+        runs = None  # release the run memmaps before deleting their files
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def ingest_spends(path, root=utxo_dir, chunk_rows=CHUNK_ROWS):
+    """Mark outputs as spent from a spends CSV (updates the column files in place)."""
+    directory = _outputs_dir(root)
+    keys = np.load(os.path.join(directory, "key.npy"), mmap_mode="r")
+    spent_day = np.load(os.path.join(directory, "spent_day.npy"), mmap_mode="r+")
+    spent_price = np.load(os.path.join(directory, "spent_price.npy"), mmap_mode="r+")
+    matched = 0
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        key = _outpoint_key(chunk["outpoint"])
+        pos = np.minimum(np.searchsorted(keys, key), len(keys) - 1)
+        hit = keys[pos] == key
+        day = _day(chunk["spent_time"])
+        if "spent_price" in chunk:
+            price = chunk["spent_price"].to_numpy(dtype=np.float64)
+        else:
+            price = np.full(len(chunk), np.nan)  # filled from the daily close later
+        spent_day[pos[hit]] = day[hit]
+        spent_price[pos[hit]] = price[hit]
+        matched += int(hit.sum())
+    spent_day.flush()
+    spent_price.flush()
+    return matched
+
+
+def open_outputs(root=utxo_dir):
+    """Memory-mapped output columns."""
+    directory = _outputs_dir(root)
+    return {col: np.load(os.path.join(directory, f"{col}.npy"), mmap_mode="r") for col in COLUMNS}
+
+
+# ---------------------------------------------------------------- metrics
+def compute_daily_metrics(outputs=None, root=utxo_dir, chunk_rows=CHUNK_ROWS * 5):
+    """Daily supply, realized cap, market cap, MVRV, NUPL, SOPR, average cap and delta cap.
+
+    Outputs are processed in chunks so only the chunk's columns are paged in at a time.
+    """
+    outputs = outputs if outputs is not None else open_outputs(root)
+    first_day, prices = load_prices(root)
+    n_days = len(prices)
+    supply_delta = np.zeros(n_days + 1)
+    realized_delta = np.zeros(n_days + 1)
+    spent_value = np.zeros(n_days)      # sum of value * spent price per spend day (SOPR numerator)
+    spent_cost = np.zeros(n_days)       # sum of value * created price per spend day (SOPR denominator)
+
+    total = len(outputs["value_sat"])
+    for start in range(0, total, chunk_rows):
+        sl = slice(start, start + chunk_rows)
+        value = outputs["value_sat"][sl] / SATOSHIS_PER_BTC
+        created_day = outputs["created_day"][sl]
+        cost = value * _fill_prices(outputs["created_price"][sl], created_day, first_day, prices)
+        priced = np.isfinite(cost)
+        cost = np.where(priced, cost, 0.0)  # outputs without a price stay out of realized cap
+        created = np.clip(created_day - first_day, 0, n_days)
+        spent_raw = outputs["spent_day"][sl]
+        is_spent = spent_raw != UNSPENT
+        spent = np.clip(spent_raw - first_day, 0, n_days)
+        spent_price = _fill_prices(outputs["spent_price"][sl], spent_raw, first_day, prices)
+
+        supply_delta += np.bincount(created, weights=value, minlength=n_days + 1)
+        realized_delta += np.bincount(created, weights=cost, minlength=n_days + 1)
+        supply_delta -= np.bincount(spent[is_spent], weights=value[is_spent], minlength=n_days + 1)
+        realized_delta -= np.bincount(spent[is_spent], weights=cost[is_spent], minlength=n_days + 1)
+
+        # SOPR over outputs spent inside the price history
+        in_range = is_spent & (spent < n_days) & priced & np.isfinite(spent_price)
+        s = spent[in_range]
+        spent_value += np.bincount(s, weights=value[in_range] * spent_price[in_range], minlength=n_days)
+        spent_cost += np.bincount(s, weights=cost[in_range], minlength=n_days)
+
+    supply = np.cumsum(supply_delta)[:n_days]
+    realized_cap = np.cumsum(realized_delta)[:n_days]
+    market_cap = supply * prices
+    average_cap = np.cumsum(market_cap) / np.arange(1, n_days + 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mvrv = np.where(realized_cap > 0, market_cap / realized_cap, np.nan)
+        nupl = np.where(market_cap > 0, (market_cap - realized_cap) / market_cap, np.nan)
+        sopr = np.where(spent_cost > 0, spent_value / spent_cost, np.nan)
+
+    return pd.DataFrame({
+        "time": pd.to_datetime((first_day + np.arange(n_days)).astype("datetime64[D]"), utc=True),
+        "price": prices,
+        "supply": supply,
+        "realized_cap": realized_cap,
+        "market_cap": market_cap,
+        "mvrv": mvrv,
+        "nupl": nupl,
+        "sopr": sopr,
+        "average_cap": average_cap,
+        "delta_cap": realized_cap - average_cap,
+    })
+
+
+_backfill_lock = Lock()
+
+
+def backfill(root=utxo_dir):
+    """Recompute all daily metrics and store them in the local time series store.
+
+    Serialized by a module lock: the per-metric prefetch jobs and first-use loads can all
+    trigger it at once, and one pass already stores every metric.
+    """
+    with _backfill_lock:
+        return _backfill(root)
+
+
+def _backfill(root):
+    from data_sources.timeseries_store import get_timeseries_store
+
+    daily = compute_daily_metrics(root=root)
+    store = get_timeseries_store()
+    for metric, columns in METRIC_COLUMNS.items():
+        store.upsert(metric, daily[["time"] + columns], "time")
+    return daily
+
+
+def load_metric(metric, **_):
+    """Metric registry loader: stored series, backfilled on first use if the store is empty."""
+    from data_sources.timeseries_store import get_timeseries_store
+
+    store = get_timeseries_store()
+    frame = store.read(metric)
+    if frame.empty and os.path.exists(os.path.join(_outputs_dir(), "key.npy")):
+        with _backfill_lock:
+            frame = store.read(metric)  # another caller may have backfilled meanwhile
+            if frame.empty:
+                _backfill(utxo_dir)
+                frame = store.read(metric)
+    return frame
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest UTXO data and compute valuation metrics.")
+    parser.add_argument("command", choices=["ingest-prices", "ingest-outputs", "ingest-spends", "backfill"])
+    parser.add_argument("path", nargs="?")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "ingest-prices":
+        ingest_prices(args.path)
+    elif args.command == "ingest-outputs":
+        print(f"outputs: {ingest_outputs(args.path):,}")
+    elif args.command == "ingest-spends":
+        print(f"spent outputs matched: {ingest_spends(args.path):,}")
+    else:
+        daily = backfill()
+        print(daily.tail())
+    print(f"done in {time.perf_counter() - started:.1f}s")
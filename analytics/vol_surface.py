@@ -0,0 +1,184 @@
+# analytics/vol_surface.py
+# Implied-volatility surface fitted from an options chain snapshot.
+#
+# Each expiry's smile is fitted in total implied variance w = iv^2 * T against log-moneyness
+# k = ln(K / F) with the raw SVI parameterisation (Gatheral):
+#     w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + sigma^2))
+# using out-of-the-money contracts (puts below the forward, calls above). Expiries with too few
+# quotes for SVI fall back to linear interpolation of the quoted points. Between expiries the
+# surface interpolates total variance linearly in T; beyond the first / last expiry the
+# implied volatility is held flat.
+#
+# Fits only depend on the chain, so the page builds the surface once per snapshot version
+# (OptionsChainCache.memoize) and every view (3D surface, term structure, skew) reuses it.
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scipy.optimize import least_squares
+
+from analytics.options_pricing import years_to_expiry
+
+MIN_SVI_POINTS = 5
+# Quotes further out than this (|ln K/F|) are too illiquid to shape the smile
+MAX_ABS_LOG_MONEYNESS = 1.0
+SVI_LOWER = [-1.0, 0.0, -0.999, -2.0, 1e-4]
+SVI_UPPER = [5.0, 10.0, 0.999, 2.0, 5.0]
+SVI_MAX_NFEV = 200
+# An SVI fit is kept only if its RMSE is within this fraction of the mean total variance
+SVI_MAX_RELATIVE_RMSE = 0.05
+CHART_LAYOUT = dict(template="plotly_dark", plot_bgcolor="#1e1e2f", paper_bgcolor="#1e1e2f",
+                    font_color="#ffffff", margin=dict(l=40, r=20, t=50, b=40))
+
+
+def svi_total_variance(k, a, b, rho, m, sigma):
+    d = np.asarray(k) - m
+    return a + b * (rho * d + np.sqrt(d * d + sigma * sigma))
+
+
+def _svi_jacobian(k, a, b, rho, m, sigma):
+    d = k - m
+    root = np.sqrt(d * d + sigma * sigma)
+    return np.column_stack([np.ones_like(k), rho * d + root, b * d, -b * (rho + d / root), b * sigma / root])
+
+
+class SmileFit:
+    """Fitted smile of one expiry: SVI parameters or the quoted points (linear fallback)."""
+
+    __slots__ = ("expiry", "T", "kind", "params", "k", "w", "rmse")
+
+    def __init__(self, expiry, T, k, w):
+        self.expiry = expiry
+        self.T = T
+        order = np.argsort(k)
+        self.k, self.w = k[order], w[order]
+        self.kind, self.params, self.rmse = "linear", None, 0.0
+        if len(k) >= MIN_SVI_POINTS:
+            self._fit_svi()
+
+    def _fit_svi(self):
+        k, w = self.k, self.w
+        x0 = [max(float(w.min()) * 0.9, 1e-6), 0.1, 0.0, float(k[np.argmin(w)]), 0.1]
+        x0 = np.clip(x0, SVI_LOWER, SVI_UPPER)
+        result = least_squares(lambda p: svi_total_variance(k, *p) - w, x0, jac=lambda p: _svi_jacobian(k, *p),
+                               bounds=(SVI_LOWER, SVI_UPPER), method="trf", max_nfev=SVI_MAX_NFEV)
+        rmse = float(np.sqrt(np.mean(result.fun ** 2)))
+        # reject fits that miss the quotes or go negative inside the quoted range
+        inside = svi_total_variance(np.linspace(k[0], k[-1], 50), *result.x)
+        if rmse <= SVI_MAX_RELATIVE_RMSE * float(w.mean()) and inside.min() > 0:
+            self.kind, self.params, self.rmse = "svi", result.x, rmse
+
+    def total_variance(self, k):
+        if self.kind == "svi":
+            return np.maximum(svi_total_variance(k, *self.params), 1e-10)
+        return np.interp(k, self.k, self.w)
+
+    def iv(self, k):
+        return np.sqrt(self.total_variance(k) / self.T)
+
+
+class VolSurface:
+    """Smiles of all expiries plus interpolation across strikes and maturities."""
+
+    def __init__(self, underlying, forward, smiles):
+        self.underlying = underlying
+        self.forward = forward
+        self.smiles = sorted(smiles, key=lambda s: s.T)
+        self.T = np.array([s.T for s in self.smiles])
+
+    @property
+    def empty(self):
+        return not self.smiles
+
+    def iv(self, k, T):
+        """Implied volatility at log-moneyness ``k`` (array) and maturity ``T`` (years)."""
+        k = np.asarray(k, dtype=np.float64)
+        if T <= self.T[0]:
+            return self.smiles[0].iv(k)
+        if T >= self.T[-1]:
+            return self.smiles[-1].iv(k)
+        j = int(np.searchsorted(self.T, T))
+        left, right = self.smiles[j - 1], self.smiles[j]
+        weight = (T - left.T) / (right.T - left.T)
+        w = (1 - weight) * left.total_variance(k) + weight * right.total_variance(k)
+        return np.sqrt(np.maximum(w, 1e-10) / T)
+
+    def grid(self, k=None, n_t=40):
+        """(k, T, iv matrix [T x k]) for plotting."""
+        k = np.linspace(-0.5, 0.5, 41) if k is None else k
+        T = np.linspace(self.T[0], self.T[-1], n_t) if len(self.T) > 1 else self.T
+        return k, T, np.vstack([self.iv(k, t) for t in T])
+
+    def term_structure(self):
+        """ATM (k = 0) implied volatility per expiry."""
+        return pd.DataFrame({
+            "expiry": [s.expiry for s in self.smiles],
+            "T": self.T,
+            "atm_iv": [float(s.iv(0.0)) for s in self.smiles],
+            "fit": [s.kind for s in self.smiles],
+        })
+
+    def smile(self, expiry):
+        return next((s for s in self.smiles if s.expiry == str(expiry)), None)
+
+
+def build_surface(snapshot, greeks, now_ms=None):
+    """Fit every expiry of ``snapshot`` from the IVs in ``greeks`` (see options_pricing.chain_greeks).
+
+    Falls back to the exchange's mark IV where the local solver returned NaN.
+    """
+    frame = snapshot.frame
+    forward = snapshot.index_price
+    if frame.empty or not forward:
+        return VolSurface(snapshot.underlying, forward, [])
+    iv = greeks["iv"].reindex(frame.index).fillna(frame["mark_iv"]).to_numpy(dtype=np.float64)
+    k = np.log(frame["strike"].to_numpy(dtype=np.float64) / forward)
+    T = years_to_expiry(frame["expiry_ts"].to_numpy(), now_ms)
+    is_call = (frame["side"] == "C").to_numpy()
+    otm = np.where(k >= 0, is_call, ~is_call)
+    use = otm & np.isfinite(iv) & (iv > 0) & (np.abs(k) <= MAX_ABS_LOG_MONEYNESS)
+
+    smiles = []
+    expiries = frame["expiry"].to_numpy()
+    for expiry in pd.unique(expiries[use]):
+        rows = use & (expiries == expiry)
+        t = float(T[rows][0])
+        if rows.sum() >= 2:
+            smiles.append(SmileFit(str(expiry), t, k[rows], iv[rows] ** 2 * t))
+    return VolSurface(snapshot.underlying, forward, smiles)
+
+
+# ---------------------------------------------------------------- figures
+def surface_figure(surface):
+    k, T, iv = surface.grid()
+    fig = go.Figure(go.Surface(x=np.exp(k), y=T * 365, z=iv * 100, colorscale="Viridis",
+                               colorbar=dict(title="IV %")))
+    fig.update_layout(title=f"{surface.underlying} Implied Volatility Surface",
+                      scene=dict(xaxis_title="Strike / Forward", yaxis_title="Days to Expiry", zaxis_title="IV %"),
+                      height=550, **CHART_LAYOUT)
+    return fig
+
+
+def term_structure_figure(surface):
+    term = surface.term_structure()
+    fig = go.Figure(go.Scatter(x=term["T"] * 365, y=term["atm_iv"] * 100, text=term["expiry"],
+                               mode="lines+markers", line=dict(color="#38bdf8"), name="ATM IV"))
+    fig.update_layout(title="ATM IV Term Structure", xaxis_title="Days to Expiry", yaxis_title="IV %",
+                      height=400, **CHART_LAYOUT)
+    return fig
+
+
+def skew_figure(surface, expiry):
+    smile = surface.smile(expiry)
+    fig = go.Figure()
+    if smile is not None:
+        k = np.linspace(smile.k[0], smile.k[-1], 100)
+        strikes = surface.forward * np.exp(smile.k)
+        fig.add_trace(go.Scatter(x=strikes, y=np.sqrt(smile.w / smile.T) * 100, mode="markers",
+                                 marker=dict(color="#F0B90B"), name="Quoted (OTM)"))
+        fig.add_trace(go.Scatter(x=surface.forward * np.exp(k), y=smile.iv(k) * 100, mode="lines",
+                                 line=dict(color="#38bdf8"), name=f"Fit ({smile.kind})"))
+        fig.add_vline(x=surface.forward, line_dash="dot", line_color="#9ca3af")
+    fig.update_layout(title=f"Volatility Skew ({expiry})", xaxis_title="Strike", yaxis_title="IV %",
+                      height=400, **CHART_LAYOUT)
+    return fig
@@ -0,0 +1,191 @@
+# analytics/volume_profile.py
+# Streaming volume profile (VPVR) per symbol.
+# Trades are accumulated into fixed tick-size price buckets with separate buy / sell volume
+# and exponential time decay, so the profile is stable across refreshes and covers a longer
+# horizon than the latest trade batch. Buckets that decay to a negligible share of the total are
+# dropped and the empty edges released, so a long-running process that follows a trending price
+# does not keep every level it ever traded at.
+
+import math
+import time
+from threading import Lock
+
+import numpy as np
+
+# Buckets per price decade used to derive the tick size (~0.01%-0.1% of price per bucket)
+DEFAULT_BUCKETS_PER_DECADE = 10000
+# Volume older than this is weighted by 1/2 (exponential decay)
+DEFAULT_HALF_LIFE_SECONDS = 60 * 60
+# Initial number of buckets allocated around the first price; grows on demand
+INITIAL_BUCKETS = 512
+# Buckets holding less than this share of the total volume are zeroed on decay
+PRUNE_FRACTION = 1e-6
+# profile() hides levels below this share of the total volume unless min_volume is given
+MIN_VOLUME_FRACTION = 1e-4
+
+
+def default_tick_size(price, buckets_per_decade=DEFAULT_BUCKETS_PER_DECADE):
+    """Pick a round tick size (1, 2 or 5 x 10^k) for a price level."""
+    if not price or price <= 0:
+        return 1.0
+    raw = 10 ** math.floor(math.log10(price)) * 10 / buckets_per_decade
+    exponent = math.floor(math.log10(raw))
+    for step in (1, 2, 5, 10):
+        if step * 10 ** exponent >= raw:
+            return step * 10 ** exponent
+    return raw
+
+
+class VolumeProfile:
+    """Fixed-bucket, time-decayed buy / sell volume profile for one symbol.
+
+    Bucket ``i`` covers prices ``[(offset + i) * tick_size, (offset + i + 1) * tick_size)``.
+    ``update`` is O(number of new trades) thanks to ``np.add.at``; decay is a single scalar
+    multiply of the two volume arrays.
+    """
+
+    def __init__(self, tick_size=None, half_life_seconds=DEFAULT_HALF_LIFE_SECONDS):
+        self.tick_size = tick_size
+        self.half_life_seconds = half_life_seconds
+        self._offset = None
+        self._buy = np.zeros(0)
+        self._sell = np.zeros(0)
+        self._last_decay = None
+        self.last_trade_id = -1
+        self.lock = Lock()
+
+    def _ensure_range(self, lo, hi):
+        """Grow the bucket arrays so that bucket indices lo..hi (absolute) are addressable."""
+        if self._offset is None:
+            size = max(INITIAL_BUCKETS, hi - lo + 1)
+            self._offset = lo - (size - (hi - lo + 1)) // 2
+            self._buy = np.zeros(size)
+            self._sell = np.zeros(size)
+            return
+        start = min(lo, self._offset)
+        end = max(hi + 1, self._offset + len(self._buy))
+        if start == self._offset and end == self._offset + len(self._buy):
+            return
+        # grow geometrically on the side that overflowed to keep resizes rare
+        pad_left = (self._offset - start) * 2 if start < self._offset else 0
+        pad_right = (end - self._offset - len(self._buy)) * 2 if end > self._offset + len(self._buy) else 0
+        self._buy = np.pad(self._buy, (pad_left, pad_right))
+        self._sell = np.pad(self._sell, (pad_left, pad_right))
+        self._offset -= pad_left
+
+    def _decay(self, now):
+        if self._last_decay is not None and self.half_life_seconds:
+            elapsed = now - self._last_decay
+            if elapsed > 0:
+                factor = 0.5 ** (elapsed / self.half_life_seconds)
+                self._buy *= factor
+                self._sell *= factor
+                self._prune()
+        self._last_decay = now
+
+    def _prune(self):
+        """Zero buckets that decayed below PRUNE_FRACTION of the total and trim empty edges."""
+        total = self._buy + self._sell
+        live = total >= PRUNE_FRACTION * total.sum()
+        self._buy[~live] = 0.0
+        self._sell[~live] = 0.0
+        nonzero = np.flatnonzero(live & (total > 0))
+        if nonzero.size == 0:
+            return
+        lo, hi = int(nonzero[0]), int(nonzero[-1]) + 1
+        # release the empty edges once they outgrow the live range (keeping some headroom)
+        if lo + len(total) - hi > max(INITIAL_BUCKETS, hi - lo):
+            margin = INITIAL_BUCKETS // 4
+            start, end = max(0, lo - margin), min(len(total), hi + margin)
+            self._buy = self._buy[start:end].copy()
+            self._sell = self._sell[start:end].copy()
+            self._offset += start
+
+    def update(self, prices, qtys, is_buyer_maker, trade_ids=None, now=None):
+        """Add a batch of trades. Trades with ``trade_id <= last_trade_id`` are skipped,
+        so overlapping batches from the REST endpoint are not double counted."""
+        prices = np.asarray(prices, dtype=np.float64)
+        qtys = np.asarray(qtys, dtype=np.float64)
+        is_sell = np.asarray(is_buyer_maker, dtype=bool)
+        if trade_ids is not None:
+            trade_ids = np.asarray(trade_ids, dtype=np.int64)
+            fresh = trade_ids > self.last_trade_id
+            prices, qtys, is_sell = prices[fresh], qtys[fresh], is_sell[fresh]
+            if fresh.any():
+                self.last_trade_id = int(trade_ids[fresh].max())
+        valid = np.isfinite(prices) & np.isfinite(qtys) & (prices > 0)
+        prices, qtys, is_sell = prices[valid], qtys[valid], is_sell[valid]
+
+        self._decay(time.time() if now is None else now)
+        if prices.size == 0:
+            return
+        if self.tick_size is None:
+            self.tick_size = default_tick_size(float(np.median(prices)))
+
+        buckets = np.floor(prices / self.tick_size).astype(np.int64)
+        self._ensure_range(int(buckets.min()), int(buckets.max()))
+        idx = buckets - self._offset
+        np.add.at(self._buy, idx[~is_sell], qtys[~is_sell])
+        np.add.at(self._sell, idx[is_sell], qtys[is_sell])
+
+    def profile(self, min_volume=None, bins=None):
+        """Return (price_levels, buy_volume, sell_volume) for non-empty buckets.
+
+        ``min_volume`` defaults to MIN_VOLUME_FRACTION of the total (decayed) volume, so the
+        cutoff follows the profile's scale instead of an absolute quantity.
+        ``bins`` optionally merges adjacent fixed buckets so that at most ``bins`` levels
+        are returned (merging keeps edges aligned to multiples of the tick size).
+        """
+        if self._offset is None:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        total = self._buy + self._sell
+        if min_volume is None:
+            min_volume = MIN_VOLUME_FRACTION * total.sum()
+        nonzero = np.nonzero(total > min_volume)[0]
+        if nonzero.size == 0:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        lo, hi = nonzero[0], nonzero[-1] + 1
+        buy, sell = self._buy[lo:hi], self._sell[lo:hi]
+        step = 1
+        if bins and hi - lo > bins:
+            step = int(math.ceil((hi - lo) / bins))
+            pad = (-len(buy)) % step
+            buy = np.pad(buy, (0, pad)).reshape(-1, step).sum(axis=1)
+            sell = np.pad(sell, (0, pad)).reshape(-1, step).sum(axis=1)
+        levels = (self._offset + lo + np.arange(len(buy)) * step + step / 2) * self.tick_size
+        keep = (buy + sell) > min_volume
+        return levels[keep], buy[keep], sell[keep]
+
+    def point_of_control(self):
+        """Price level with the highest total volume (None if empty)."""
+        levels, buy, sell = self.profile()
+        if levels.size == 0:
+            return None
+        return float(levels[np.argmax(buy + sell)])
+
+
+_profiles = {}
+_profiles_lock = Lock()
+
+
+def get_volume_profile(symbol):
+    """Return the shared VolumeProfile of a symbol, creating it on first use."""
+    with _profiles_lock:
+        profile = _profiles.get(symbol)
+        if profile is None:
+            profile = _profiles[symbol] = VolumeProfile()
+        return profile
+
+
+def update_from_trades(symbol, trades):
+    """Feed raw Binance trade dicts (``id``, ``price``, ``qty``, ``isBuyerMaker``) into a symbol's profile."""
+    if not trades:
+        return get_volume_profile(symbol)
+    profile = get_volume_profile(symbol)
+    prices = [float(t['price']) for t in trades]
+    qtys = [float(t['qty']) for t in trades]
+    sides = [bool(t['isBuyerMaker']) for t in trades]
+    ids = [t['id'] for t in trades] if 'id' in trades[0] else None
+    with profile.lock:
+        profile.update(prices, qtys, sides, trade_ids=ids)
+    return profile
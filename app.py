@@ -18,6 +18,8 @@ from dash import Dash, html, dcc
 import dash_bootstrap_components as dbc
 from src.layout import create_layout
 from dash import dash_table
+from flask import Response
+from utils.metrics import render_prometheus
 import logging
 
 # Logging
@@ -42,6 +44,12 @@ app = dash.Dash(
 
 app.layout = create_layout()
 
+
+# Prometheus-style metrics endpoint (per-callback latency, payload size, errors)
+@app.server.route("/metrics")
+def metrics_endpoint():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     app.run(debug=True)
 
@@ -1,4 +1,9 @@
 # config/settings.py
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()  # API keys (e.g. DUNE_API_KEY) may live in a local .env
 
 tabs = [
     {"name": "Home", "path": "/", "icon": "📊"},    
@@ -18,6 +23,7 @@ tabs = [
     {"name": "Auto Trade", "path": "/auto-trade", "icon": "🤖"},  
     {"name": "My Trades", "path": "/my-trade", "icon": "🧾"},     
     {"name": "Reports", "path": "/reports", "icon": "📑"},        
+    {"name": "Diagnostics", "path": "/diagnostics", "icon": "🩺"},
     {"name": "Settings", "path": "/settings", "icon": "⚙️"},      
 ]
 
@@ -29,3 +35,80 @@ default_coins = [
     symbol for symbol in default_symbols if not symbol.endswith('USDC')
 ]
 
+
+# Transactions page: how long the per-symbol buy/sell ratio history is kept
+trade_history_retention_minutes = 240
+
+# Local data (trade tape, caches, stores) lives under <repo>/data
+data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+tape_dir = os.path.join(data_dir, "tape")
+
+# Labelled BTC addresses (CSV: address,entity,category) used to classify whale transactions
+address_labels_path = os.path.join(data_dir, "address_labels.csv")
+
+# SQLite store of detected large on-chain transactions (Trade Assistant whale monitor)
+large_tx_db_path = os.path.join(data_dir, "large_transactions.sqlite")
+
+# Dune Analytics (On-Chain page); the key is read from the environment / .env
+dune_api_key = os.getenv("DUNE_API_KEY")
+dune_cache_dir = os.path.join(data_dir, "dune_cache")
+# How long a cached on-chain metric is served as fresh (seconds); stale entries are still
+# served while a background refresh runs
+onchain_metric_ttls = {
+    "Exchange Netflow": 3600,
+    "Whale Transactions": 3600,
+    "Stablecoin Inflow": 3600,
+    "Miner to Exchange Flow": 3600,
+    "Gas Used": 3600,
+    "Miner Balance": 6 * 3600,
+    "LTH Supply": 24 * 3600,
+    "Short-Term Holder SOPR": 24 * 3600,
+    "Dormancy": 24 * 3600,
+    "MVRV Ratio": 24 * 3600,
+    "NUPL": 24 * 3600,
+    "SOPR": 24 * 3600,
+    "Realized Cap": 24 * 3600,
+    "Thermo Cap": 24 * 3600,
+    "Delta Cap": 24 * 3600,
+}
+
+# Background prefetch of on-chain metrics (seconds between refreshes); flows move intraday,
+# valuation metrics are daily
+onchain_prefetch_seconds = {
+    "Exchange Netflow": 15 * 60,
+    "Whale Transactions": 15 * 60,
+    "Stablecoin Inflow": 15 * 60,
+    "Miner to Exchange Flow": 30 * 60,
+    "Gas Used": 30 * 60,
+    "Miner Balance": 3 * 3600,
+    "LTH Supply": 24 * 3600,
+    "Short-Term Holder SOPR": 24 * 3600,
+    "Dormancy": 24 * 3600,
+    "MVRV Ratio": 24 * 3600,
+    "NUPL": 24 * 3600,
+    "SOPR": 24 * 3600,
+    "Realized Cap": 24 * 3600,
+    "Thermo Cap": 24 * 3600,
+    "Delta Cap": 24 * 3600,
+}
+onchain_prefetch_workers = 3
+# Dune queries behind on-chain metrics, e.g.
+#   {"Stablecoin Inflow": {"query_id": 1234567, "params": {"asset": "USDT"},
+#                          "since_param": "start_date", "time_column": "day"}}
+# With "since_param" set, the series is synced incrementally into the local time series store:
+# the query only returns rows at or after the last stored timestamp.
+onchain_metric_queries = {}
+# Local store for incrementally synced on-chain series
+onchain_timeseries_db = os.path.join(data_dir, "onchain_timeseries.sqlite")
+# First sync of an incremental series starts here
+onchain_history_start = "2020-01-01"
+
+# Memory-mapped UTXO columns and daily prices for locally computed valuation metrics
+utxo_dir = os.path.join(data_dir, "utxo")
+
+# Options page: chain snapshots per underlying are served as fresh for this long (seconds)
+options_chain_ttl_seconds = 30
+# Options history: background chain snapshots written to columnar tapes under this directory
+options_history_dir = os.path.join(data_dir, "options_history")
+options_history_interval_seconds = 15 * 60
+options_history_underlyings = ["BTC", "ETH"]
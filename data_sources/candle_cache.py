@@ -0,0 +1,128 @@
+# data_sources/candle_cache.py
+# In-memory TTL cache for Binance candles with parallel, de-duplicated fetches.
+#
+# Entries are keyed by (symbol, timeframe, lookback_days) and served while younger than the
+# timeframe's TTL (a monthly candle does not need re-downloading every dropdown change). A
+# miss is fetched on a small shared thread pool; concurrent requests for the same key wait on
+# the same future instead of downloading twice, and ``fetch_many`` starts all misses at once.
+# Values computed from a candle frame (e.g. the pair page's range statistics) are memoized on
+# the entry with ``CandleEntry.derive`` and expire with it.
+
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Lock
+
+from utils import metrics
+from utils.binance_data import fetch_data_binance
+
+FETCH_WORKERS = 8
+DEFAULT_TTL_SECONDS = 300
+TIMEFRAME_TTL_SECONDS = {
+    "1m": 20, "5m": 60, "15m": 120, "1h": 300, "4h": 600,
+    "1d": 1800, "1w": 3600, "1M": 3600,
+}
+
+
+class CandleEntry:
+    __slots__ = ("df", "fetched_at", "ttl", "_derived", "_lock")
+
+    def __init__(self, df, ttl):
+        self.df = df
+        self.fetched_at = time.time()
+        self.ttl = ttl
+        self._derived = {}
+        self._lock = Lock()
+
+    def fresh(self):
+        return time.time() - self.fetched_at <= self.ttl
+
+    def derive(self, name, compute):
+        """``compute(df)`` once per fetched frame."""
+        with self._lock:
+            if name in self._derived:
+                return self._derived[name]
+        value = compute(self.df)
+        with self._lock:
+            self._derived[name] = value
+        return value
+
+
+class CandleCache:
+    """TTL cache in front of fetch_data_binance with a shared fetch pool."""
+
+    def __init__(self, fetch=fetch_data_binance, workers=FETCH_WORKERS):
+        self._fetch = fetch
+        self._entries = {}
+        self._inflight = {}
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="candles")
+        self.hits = self.misses = self.errors = 0
+
+    def _load(self, key, ttl):
+        symbol, timeframe, lookback_days = key
+        try:
+            df = self._fetch(symbol, timeframe, lookback_days)
+        except Exception:
+            self.errors += 1
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+        entry = CandleEntry(df, ttl)
+        with self._lock:
+            if df is not None and not df.empty:
+                self._entries[key] = entry
+            self._inflight.pop(key, None)
+        return entry
+
+    def submit(self, symbol, timeframe, lookback_days):
+        """Future resolving to the CandleEntry of (symbol, timeframe, lookback_days)."""
+        key = (symbol, timeframe, lookback_days)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.fresh():
+                self.hits += 1
+                future = Future()
+                future.set_result(entry)
+                return future
+            future = self._inflight.get(key)
+            if future is None:
+                self.misses += 1
+                ttl = TIMEFRAME_TTL_SECONDS.get(timeframe, DEFAULT_TTL_SECONDS)
+                future = self._inflight[key] = self._executor.submit(self._load, key, ttl)
+            return future
+
+    def get(self, symbol, timeframe, lookback_days):
+        return self.submit(symbol, timeframe, lookback_days).result()
+
+    def fetch_many(self, requests):
+        """Fetch (symbol, timeframe, lookback_days) tuples concurrently; dict of request -> entry.
+
+        Failed requests map to None.
+        """
+        futures = {request: self.submit(*request) for request in requests}
+        result = {}
+        for request, future in futures.items():
+            try:
+                result[request] = future.result()
+            except Exception:
+                result[request] = None
+        return result
+
+
+candle_cache = CandleCache()
+
+
+def _collect():
+    with candle_cache._lock:
+        cached = len(candle_cache._entries)
+    return [
+        ("candle_cache_requests_total", "counter", "Candle cache lookups by outcome.", [
+            ({"outcome": "hit"}, candle_cache.hits),
+            ({"outcome": "miss"}, candle_cache.misses),
+            ({"outcome": "error"}, candle_cache.errors),
+        ]),
+        ("candle_cache_entries", "gauge", "Cached candle frames.", [({}, cached)]),
+    ]
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,285 @@
+# data_sources/dune_cache.py
+# Result cache in front of Dune Analytics.
+#
+# Results are keyed by (query id, parameters) and kept in memory and on disk
+# (<data_dir>/dune_cache/<key>.pkl + .json metadata), so they survive restarts. Reads follow
+# stale-while-revalidate: a fresh entry is returned as is, a stale entry is returned
+# immediately while one background refresh per key runs, and only a missing entry blocks
+# (concurrent misses of one key wait on the same fetch).
+# Refreshes go through DuneClient.get_latest_result, which reuses the latest completed
+# execution when it is young enough and only re-executes (billed) otherwise.
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import date, datetime
+from threading import Lock
+
+import pandas as pd
+
+from utils import metrics
+from config.settings import dune_api_key, dune_cache_dir, onchain_metric_ttls
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+# Concurrent background refreshes (Dune rate limits are per key, keep this small)
+REFRESH_WORKERS = 2
+
+
+def cache_key(query_id, params=None):
+    payload = json.dumps({"query_id": int(query_id), "params": params or {}}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def metric_ttl(metric, default=DEFAULT_TTL_SECONDS):
+    """TTL in seconds configured for an on-chain metric (config.settings.onchain_metric_ttls)."""
+    return onchain_metric_ttls.get(metric, default)
+
+
+def _query_parameters(params):
+    from dune_client.types import QueryParameter
+
+    result = []
+    for name, value in (params or {}).items():
+        if isinstance(value, (datetime, date)):
+            result.append(QueryParameter.date_type(name, value))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            result.append(QueryParameter.number_type(name, value))
+        else:
+            result.append(QueryParameter.text_type(name, str(value)))
+    return result
+
+
+class CacheEntry:
+    __slots__ = ("value", "fetched_at", "meta")
+
+    def __init__(self, value, fetched_at, meta=None):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.meta = meta or {}
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class DuneResultCache:
+    """Stale-while-revalidate cache for Dune query results (DataFrames)."""
+
+    def __init__(self, root=dune_cache_dir, client=None):
+        self.root = root
+        self._client = client
+        self._entries = {}
+        self._refreshing = set()
+        self._inflight = {}
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="dune-refresh")
+        self.hits = self.stale_hits = self.misses = self.refreshes = self.errors = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            from dune_client.client import DuneClient
+            self._client = DuneClient(dune_api_key)
+        return self._client
+
+    # ---------------------------------------------------------------- public
+    def get_result(self, query_id, params=None, ttl=DEFAULT_TTL_SECONDS):
+        """Result rows of ``query_id`` with ``params`` as a DataFrame (stale-while-revalidate)."""
+        key = cache_key(query_id, params)
+        return self._get(key, lambda: self._fetch(query_id, params, ttl), ttl, persist=True)
+
+    def memoize(self, key, compute, ttl=DEFAULT_TTL_SECONDS):
+        """Same policy for any derived value (e.g. a rendered metric layout); memory only."""
+        return self._get(f"memo:{key}", lambda: (compute(), {}), ttl, persist=False)
+
+    def warm(self, key, compute):
+        """Recompute a memoized value now (blocking); used by the prefetch scheduler."""
+        return self._store(f"memo:{key}", compute(), {}, persist=False).value
+
+    def peek(self, query_id, params=None):
+        """Cached entry (or None) without triggering any fetch."""
+        key = cache_key(query_id, params)
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry or self._load(key)
+
+    def invalidate(self, query_id, params=None):
+        key = cache_key(query_id, params)
+        with self._lock:
+            self._entries.pop(key, None)
+        for suffix in (".pkl", ".json"):
+            try:
+                os.remove(os.path.join(self.root, key + suffix))
+            except OSError:
+                pass
+
+    def fetch(self, query_id, params=None, ttl=DEFAULT_TTL_SECONDS):
+        """Fetch without caching (e.g. one-off incremental ranges); returns a DataFrame."""
+        return self._fetch(query_id, params, ttl)[0]
+
+    def refresh(self, query_id, params=None, ttl=DEFAULT_TTL_SECONDS):
+        """Fetch now (blocking) and store the result; used by background jobs."""
+        key = cache_key(query_id, params)
+        return self._store(key, *self._fetch(query_id, params, ttl), persist=True).value
+
+    # ---------------------------------------------------------------- internals
+    def _get(self, key, fetch, ttl, persist):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and persist:
+            entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return self._fetch_missing(key, fetch, persist).value
+        if entry.age() <= ttl:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+            self._refresh_in_background(key, fetch, persist)
+        return entry.value
+
+    def _fetch_missing(self, key, fetch, persist):
+        """Blocking fetch of a missing key; concurrent callers wait on the first one's future."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:  # stored while we were loading from disk
+                return entry
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            entry = self._store(key, *fetch(), persist=persist)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(entry)
+            return entry
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key, fetch, persist):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._store(key, *fetch(), persist=persist)
+                self.refreshes += 1
+            except Exception:
+                self.errors += 1  # keep serving the stale value
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+    def _fetch(self, query_id, params, ttl):
+        from dune_client.query import QueryBase
+
+        query = QueryBase(query_id=int(query_id), params=_query_parameters(params))
+        # reuse the latest completed execution unless it is older than the TTL
+        response = self.client.get_latest_result(query, max_age_hours=max(1, math.ceil(ttl / 3600)))
+        rows = response.result.rows if response.result else []
+        times = getattr(response, "times", None)
+        ended = getattr(times, "execution_ended_at", None)
+        meta = {
+            "query_id": int(query_id),
+            "params": params or {},
+            "execution_id": getattr(response, "execution_id", None),
+            "execution_ended_at": ended.isoformat() if ended else None,
+        }
+        return pd.DataFrame(rows), meta
+
+    def _store(self, key, value, meta, persist):
+        entry = CacheEntry(value, time.time(), meta)
+        with self._lock:
+            self._entries[key] = entry
+        if persist:
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, key)
+            self._write_atomic(path + ".pkl", value.to_pickle)
+            self._write_atomic(path + ".json", lambda tmp: self._write_meta(tmp, entry.fetched_at, meta))
+        return entry
+
+    @staticmethod
+    def _write_meta(path, fetched_at, meta):
+        with open(path, "w") as f:
+            json.dump({"fetched_at": fetched_at, **meta}, f, default=str)
+
+    def _write_atomic(self, path, write):
+        """``write(tmp_path)`` to a unique temp file, then rename it over ``path``.
+
+        Unique names keep a background refresh and a blocking fetch of the same key (or two
+        processes sharing the cache dir) from writing into each other's temp file.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _load(self, key):
+        path = os.path.join(self.root, key)
+        try:
+            with open(path + ".json") as f:
+                meta = json.load(f)
+            value = pd.read_pickle(path + ".pkl")
+        except (OSError, ValueError):
+            return None
+        entry = CacheEntry(value, meta.pop("fetched_at", 0.0), meta)
+        with self._lock:
+            self._entries.setdefault(key, entry)
+        return entry
+
+
+_cache = None
+_cache_lock = Lock()
+
+
+def _collect():
+    cache = _cache
+    if cache is None:
+        return []
+    return [
+        ("dune_cache_requests_total", "counter", "Dune cache lookups by outcome.", [
+            ({"outcome": "fresh"}, cache.hits),
+            ({"outcome": "stale"}, cache.stale_hits),
+            ({"outcome": "miss"}, cache.misses),
+        ]),
+        ("dune_cache_refreshes_total", "counter", "Completed background refreshes.", [({}, cache.refreshes)]),
+        ("dune_cache_refresh_errors_total", "counter", "Failed background refreshes.", [({}, cache.errors)]),
+    ]
+
+
+metrics.register_collector(_collect)
+
+
+def get_dune_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DuneResultCache()
+        return _cache
+
+
+def get_query_result(query_id, params=None, metric=None, ttl=None):
+    """Cached Dune result; the TTL comes from ``metric``'s configured policy unless given."""
+    if ttl is None:
+        ttl = metric_ttl(metric) if metric else DEFAULT_TTL_SECONDS
+    return get_dune_cache().get_result(query_id, params, ttl)
@@ -0,0 +1,133 @@
+# data_sources/large_tx_store.py
+# Embedded SQLite store for detected large on-chain transactions.
+# The whale monitor inserts every transaction above its threshold; the Trade Assistant callbacks
+# query time windows / value thresholds in SQL (indexes on time, value and signal kind), so history
+# survives restarts and charts can span days instead of the last few in-memory entries.
+#
+# The signal text carries details (e.g. "Exchange Deposit (Binance) - Selling Pressure?"), so each
+# row also stores its normalized kind ("Exchange Deposit"); signal filters match that column with
+# ``=`` / ``IN`` and use its index instead of scanning with ``LIKE``.
+
+import os
+import sqlite3
+import time
+from threading import Lock
+
+import pandas as pd
+
+from config.settings import large_tx_db_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS large_transactions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    tx_hash     TEXT UNIQUE,
+    time_ms     INTEGER NOT NULL,
+    value_btc   REAL NOT NULL,
+    usd_value   REAL,
+    signal      TEXT NOT NULL,
+    signal_kind TEXT,
+    num_inputs  INTEGER,
+    num_outputs INTEGER,
+    fee_sat     INTEGER,
+    size_bytes  INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_large_tx_time ON large_transactions (time_ms);
+CREATE INDEX IF NOT EXISTS idx_large_tx_value ON large_transactions (value_btc, time_ms);
+"""
+
+# Created after the signal_kind migration (databases written before the column existed)
+INDEXES = """
+DROP INDEX IF EXISTS idx_large_tx_signal;
+CREATE INDEX IF NOT EXISTS idx_large_tx_signal_kind ON large_transactions (signal_kind, time_ms);
+"""
+
+COLUMNS = ["id", "tx_hash", "time_ms", "value_btc", "usd_value", "signal", "signal_kind",
+           "num_inputs", "num_outputs", "fee_sat", "size_bytes"]
+
+
+def signal_kind(signal):
+    """Signal text without its details: "Exchange Deposit (Binance) - Selling Pressure?" -> "Exchange Deposit"."""
+    return signal.split(" - ", 1)[0].split(" (", 1)[0].strip() if signal else signal
+
+
+class LargeTxStore:
+    """Thread-safe wrapper around one SQLite connection (writes from ingest workers, reads from callbacks)."""
+
+    def __init__(self, path=large_tx_db_path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+            self._conn.executescript(INDEXES)
+            self._conn.commit()
+
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(large_transactions)")}
+        if "signal_kind" not in columns:
+            self._conn.execute("ALTER TABLE large_transactions ADD COLUMN signal_kind TEXT")
+            self._conn.create_function("signal_kind", 1, signal_kind, deterministic=True)
+            self._conn.execute("UPDATE large_transactions SET signal_kind = signal_kind(signal)")
+
+    def insert(self, tx_hash, time_ms, value_btc, signal, usd_value=None,
+               num_inputs=None, num_outputs=None, fee_sat=None, size_bytes=None):
+        """Insert one transaction; a hash seen before (e.g. after a reconnect) is ignored."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO large_transactions "
+                "(tx_hash, time_ms, value_btc, usd_value, signal, signal_kind, "
+                "num_inputs, num_outputs, fee_sat, size_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tx_hash, int(time_ms), float(value_btc), usd_value, signal, signal_kind(signal),
+                 num_inputs, num_outputs, fee_sat, size_bytes),
+            )
+            self._conn.commit()
+
+    def query(self, since_ms=None, min_value=0, signal=None, limit=None, newest_first=False):
+        """Transactions with ``time_ms >= since_ms`` and ``value_btc >= min_value`` as a DataFrame.
+
+        ``signal`` is one signal kind (see ``signal_kind``) or a list of kinds.
+        """
+        sql = f"SELECT {', '.join(COLUMNS)} FROM large_transactions WHERE value_btc >= ?"
+        params = [float(min_value or 0)]
+        if since_ms is not None:
+            sql += " AND time_ms >= ?"
+            params.append(int(since_ms))
+        if signal:
+            kinds = [signal] if isinstance(signal, str) else list(signal)
+            sql += f" AND signal_kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(signal_kind(kind) for kind in kinds)
+        sql += " ORDER BY time_ms DESC" if newest_first else " ORDER BY time_ms"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def query_window(self, window_seconds, min_value=0, **kwargs):
+        since_ms = None if window_seconds is None else int((time.time() - window_seconds) * 1000)
+        return self.query(since_ms=since_ms, min_value=min_value, **kwargs)
+
+    def last_id(self):
+        """Highest row id, a cheap change marker for the UI."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM large_transactions").fetchone()
+        return row[0] or 0
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_large_tx_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LargeTxStore()
+        return _store
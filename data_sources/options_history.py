@@ -0,0 +1,184 @@
+# data_sources/options_history.py
+# Historical options analytics: periodic chain snapshots in compact columnar tapes.
+#
+# Layout (root defaults to config.settings.options_history_dir), one ColumnarTape per partition:
+#   <root>/<underlying>/<expiry>/<YYYY-MM-DD>.tape|.idx    contract rows (strike, IV, OI, ...)
+#   <root>/<underlying>/summary/<YYYY-MM-DD>.tape|.idx     one row per expiry per snapshot
+# so the store is partitioned by underlying, expiry and UTC date, and time series such as ATM IV,
+# 25-delta skew or max pain only read the small summary tape.
+#
+# ``record_snapshot`` is run by the background prefetch scheduler every
+# config.settings.options_history_interval_seconds, so the Options page reads history from
+# disk and never waits on the exchange for it.
+
+import time
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from analytics.options_aggregates import aggregate_chain
+from data_sources.trade_tape import ColumnarTape
+from config.settings import options_history_dir
+
+CONTRACT_COLUMNS = {
+    "time": "int64",          # snapshot time, epoch ms
+    "strike": "float64",
+    "is_call": "uint8",
+    "mark_price": "float64",
+    "iv": "float64",
+    "delta": "float64",
+    "open_interest": "float64",
+    "volume": "float64",
+}
+
+SUMMARY_COLUMNS = {
+    "time": "int64",          # snapshot time, epoch ms
+    "expiry": "int32",        # YYMMDD
+    "expiry_ts": "int64",
+    "index_price": "float64",
+    "atm_iv": "float64",
+    "skew_25d": "float64",    # IV(25-delta put) - IV(25-delta call)
+    "max_pain": "float64",
+    "call_oi": "float64",
+    "put_oi": "float64",
+    "call_volume": "float64",
+    "put_volume": "float64",
+}
+SUMMARY_PARTITION = "summary"
+
+
+def _delta_iv(delta, iv, target):
+    """IV interpolated at ``target`` delta (NaN when the chain does not straddle it)."""
+    ok = np.isfinite(delta) & np.isfinite(iv)
+    delta, iv = delta[ok], iv[ok]
+    if len(delta) < 2 or not delta.min() <= target <= delta.max():
+        return np.nan
+    order = np.argsort(delta)
+    return float(np.interp(target, delta[order], iv[order]))
+
+
+class OptionsHistory:
+    """Writes chain snapshots to per-partition tapes and reads them back as time series."""
+
+    def __init__(self, root=options_history_dir):
+        self.root = root
+        self._tapes = {}
+        self._lock = Lock()
+        self.snapshots_written = 0
+
+    def _tape(self, underlying, partition):
+        name = f"{underlying}/{partition}"
+        with self._lock:
+            tape = self._tapes.get(name)
+            if tape is None:
+                columns = SUMMARY_COLUMNS if partition == SUMMARY_PARTITION else CONTRACT_COLUMNS
+                tape = self._tapes[name] = ColumnarTape(name, columns, root=self.root)
+            return tape
+
+    # ---------------------------------------------------------------- write
+    def record(self, snapshot, greeks, surface=None, aggregates=None):
+        """Append one chain snapshot (see utils.options_chain) with its IVs / greeks."""
+        frame = snapshot.frame
+        if frame.empty:
+            return 0
+        aggregates = aggregates if aggregates is not None else aggregate_chain(snapshot, greeks)
+        per_expiry = aggregates.per_expiry().set_index("expiry")
+        now_ms = int(snapshot.fetched_at * 1000)
+        iv = greeks["iv"].reindex(frame.index).fillna(frame["mark_iv"]).to_numpy(dtype=np.float64)
+        delta = greeks["delta"].reindex(frame.index).fillna(frame["delta"]).to_numpy(dtype=np.float64)
+        summary = {col: [] for col in SUMMARY_COLUMNS}
+
+        for expiry, rows in frame.groupby("expiry", sort=False).indices.items():
+            part = frame.iloc[rows]
+            is_call = (part["side"] == "C").to_numpy()
+            oi = part["open_interest"].fillna(0.0).to_numpy(dtype=np.float64)
+            volume = part["volume"].fillna(0.0).to_numpy(dtype=np.float64)
+            strikes = part["strike"].to_numpy(dtype=np.float64)
+            tape = self._tape(snapshot.underlying, expiry)
+            tape.append({
+                "time": np.full(len(part), now_ms),
+                "strike": strikes,
+                "is_call": is_call,
+                "mark_price": part["mark_price"].to_numpy(dtype=np.float64),
+                "iv": iv[rows],
+                "delta": delta[rows],
+                "open_interest": oi,
+                "volume": volume,
+            })
+            tape.flush()
+
+            totals = per_expiry.loc[expiry]
+            smile = surface.smile(expiry) if surface is not None else None
+            summary["time"].append(now_ms)
+            summary["expiry"].append(int(expiry))
+            summary["expiry_ts"].append(int(part["expiry_ts"].iloc[0]))
+            summary["index_price"].append(snapshot.index_price or np.nan)
+            summary["atm_iv"].append(float(smile.iv(0.0)) if smile is not None else np.nan)
+            summary["skew_25d"].append(_delta_iv(delta[rows][~is_call], iv[rows][~is_call], -0.25)
+                                       - _delta_iv(delta[rows][is_call], iv[rows][is_call], 0.25))
+            for col in ("max_pain", "call_oi", "put_oi", "call_volume", "put_volume"):
+                summary[col].append(float(totals[col]))
+
+        tape = self._tape(snapshot.underlying, SUMMARY_PARTITION)
+        tape.append(summary)
+        tape.flush()
+        self.snapshots_written += 1
+        return len(frame)
+
+    # ---------------------------------------------------------------- read
+    def summary(self, underlying, since_ms=None, expiry=None):
+        """Per-expiry summary rows (ATM IV, 25d skew, max pain, OI, volume) over time."""
+        df = self._tape(underlying, SUMMARY_PARTITION).read_range(since_ms)
+        if expiry is not None:
+            df = df[df["expiry"] == int(expiry)]
+        df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True)
+        return df.reset_index(drop=True)
+
+    def contracts(self, underlying, expiry, since_ms=None):
+        """Contract rows of one expiry over time."""
+        df = self._tape(underlying, str(expiry)).read_range(since_ms)
+        df["time"] = pd.to_datetime(df["time"], unit="ms", utc=True)
+        return df
+
+    def oi_by_strike(self, underlying, expiry, since_ms=None):
+        """Open interest per strike over time (rows: snapshot time, columns: strike), calls + puts."""
+        df = self._tape(underlying, str(expiry)).read_range(since_ms, columns=["strike", "open_interest"])
+        if df.empty:
+            return pd.DataFrame()
+        wide = df.pivot_table(index="time", columns="strike", values="open_interest", aggfunc="sum")
+        wide.index = pd.to_datetime(wide.index, unit="ms", utc=True)
+        return wide
+
+
+_history = None
+_history_lock = Lock()
+
+
+def get_options_history():
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = OptionsHistory()
+        return _history
+
+
+def record_snapshot(underlying):
+    """Background job: fetch a fresh chain for ``underlying`` and append it to the history.
+
+    The fresh snapshot also replaces the Options page's cached one, so the job keeps it warm.
+    """
+    from utils.options_chain import get_chain_cache
+    from analytics.options_pricing import chain_greeks
+    from analytics.vol_surface import build_surface
+
+    chains = get_chain_cache()
+    snapshot = chains.refresh(underlying)
+    greeks = chains.derive(snapshot, "greeks", lambda frame: chain_greeks(frame, snapshot.index_price))
+    surface = chains.memoize(snapshot, "vol_surface", lambda: build_surface(snapshot, greeks))
+    aggregates = chains.memoize(snapshot, "aggregates", lambda: aggregate_chain(snapshot, greeks))
+    return get_options_history().record(snapshot, greeks, surface, aggregates)
+
+
+def days_ago_ms(days):
+    return int((time.time() - days * 86400) * 1000)
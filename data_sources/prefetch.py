@@ -0,0 +1,129 @@
+# data_sources/prefetch.py
+# Background refresh of on-chain metrics so page clicks are served from warm caches.
+# Each job has its own cadence (config.settings.onchain_prefetch_seconds); due jobs run on a
+# small bounded thread pool, a job never overlaps itself, and failures back off to the next
+# cadence tick while the cache keeps serving the previous value.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
+
+from utils import metrics
+from config.settings import onchain_prefetch_seconds, onchain_prefetch_workers
+
+DEFAULT_EVERY_SECONDS = 3600
+TICK_SECONDS = 5
+
+
+class PrefetchJob:
+    __slots__ = ("name", "fn", "every", "next_run", "running", "runs", "errors", "last_duration", "last_error")
+
+    def __init__(self, name, fn, every, first_run=0.0):
+        self.name = name
+        self.fn = fn
+        self.every = every
+        self.next_run = first_run  # 0.0 runs as soon as the scheduler starts
+        self.running = False
+        self.runs = 0
+        self.errors = 0
+        self.last_duration = None
+        self.last_error = None
+
+
+class PrefetchScheduler:
+    """Runs registered refresh callables on per-job cadences with bounded concurrency."""
+
+    def __init__(self, workers=onchain_prefetch_workers, tick=TICK_SECONDS):
+        self.workers = workers
+        self.tick = tick
+        self.jobs = {}
+        self._lock = Lock()
+        self._executor = None
+        self._started = False
+
+    def register(self, name, fn, every=None, run_now=True):
+        """Add (or replace) job ``name``; ``every`` defaults to the configured cadence for it.
+
+        With ``run_now=False`` the first run waits a full cadence (the caller just refreshed it).
+        """
+        every = every or onchain_prefetch_seconds.get(name, DEFAULT_EVERY_SECONDS)
+        first_run = 0.0 if run_now else time.time() + every
+        with self._lock:
+            self.jobs[name] = PrefetchJob(name, fn, every, first_run)
+
+    def ensure(self, name, fn, every=None, run_now=True):
+        """Register job ``name`` unless it already exists; True if it was added."""
+        with self._lock:
+            if name in self.jobs:
+                return False
+        self.register(name, fn, every, run_now)
+        return True
+
+    def _run_job(self, job):
+        started = time.monotonic()
+        try:
+            job.fn()
+            job.last_error = None
+        except Exception as e:
+            job.errors += 1
+            job.last_error = str(e)
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            with self._lock:
+                job.running = False
+
+    def run_pending(self):
+        now = time.time()
+        with self._lock:
+            due = [job for job in self.jobs.values() if not job.running and job.next_run <= now]
+            for job in due:
+                job.running = True
+                job.next_run = now + job.every
+        for job in due:
+            self._executor.submit(self._run_job, job)
+        return len(due)
+
+    def _loop(self):
+        while True:
+            self.run_pending()
+            time.sleep(self.tick)
+
+    def start(self):
+        """Start the scheduler thread once; subsequent calls are no-ops."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="onchain-prefetch")
+        Thread(target=self._loop, name="onchain-prefetch-scheduler", daemon=True).start()
+
+    def snapshot(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [{
+            "Job": job.name,
+            "Every (s)": job.every,
+            "Runs": job.runs,
+            "Errors": job.errors,
+            "Last (s)": round(job.last_duration, 2) if job.last_duration is not None else None,
+            "Next In (s)": max(0, round(job.next_run - time.time())),
+            "Last Error": job.last_error or "",
+        } for job in sorted(jobs, key=lambda j: j.name)]
+
+
+scheduler = PrefetchScheduler()
+
+
+def _collect():
+    with scheduler._lock:
+        jobs = sorted(scheduler.jobs.values(), key=lambda j: j.name)
+    return [
+        ("prefetch_runs_total", "counter", "Completed on-chain prefetch runs.", [({"job": j.name}, j.runs) for j in jobs]),
+        ("prefetch_errors_total", "counter", "Failed on-chain prefetch runs.", [({"job": j.name}, j.errors) for j in jobs]),
+        ("prefetch_last_duration_seconds", "gauge", "Duration of the latest run.",
+         [({"job": j.name}, j.last_duration or 0.0) for j in jobs]),
+    ]
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,103 @@
+# data_sources/timeseries_store.py
+# Local per-metric time series store with incremental sync.
+# On-chain series (netflows, stablecoin inflow, realized cap, miner balance, ...) are
+# append-mostly, so instead of re-querying the full history on every refresh we keep every
+# metric's rows in SQLite and only ask the source for rows at or after the last stored
+# timestamp. The last stored bucket is always re-fetched and replaced, because the newest
+# day / hour is usually still partial at the source.
+#
+# Rows are kept in long format (metric, ts, field, value) so any numeric columns fit one table.
+
+import os
+import sqlite3
+from threading import Lock
+
+import pandas as pd
+
+from config.settings import onchain_timeseries_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    metric TEXT NOT NULL,
+    ts     INTEGER NOT NULL,      -- epoch ms
+    field  TEXT NOT NULL,
+    value  REAL,
+    PRIMARY KEY (metric, ts, field)
+) WITHOUT ROWID;
+"""
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+class TimeSeriesStore:
+    """SQLite-backed numeric time series keyed by metric name."""
+
+    def __init__(self, path=onchain_timeseries_db):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def last_timestamp(self, metric):
+        """Newest stored timestamp of ``metric`` (pd.Timestamp, UTC) or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(ts) FROM series WHERE metric = ?", (metric,)).fetchone()
+        return pd.Timestamp(row[0], unit="ms", tz="UTC") if row and row[0] is not None else None
+
+    def upsert(self, metric, df, time_column):
+        """Insert or replace the numeric columns of ``df`` (indexed by ``time_column``)."""
+        if df is None or df.empty:
+            return 0
+        ts = pd.to_datetime(df[time_column], utc=True)
+        values = df.drop(columns=[time_column]).apply(pd.to_numeric, errors="coerce")
+        values = values.loc[:, values.notna().any()]
+        long = values.assign(ts=((ts - EPOCH) // pd.Timedelta(milliseconds=1)).values).melt(id_vars="ts", var_name="field")
+        long = long.dropna(subset=["value"])
+        rows = [(metric, int(t), str(f), float(v)) for t, f, v in long[["ts", "field", "value"]].itertuples(index=False)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO series (metric, ts, field, value) VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(df)
+
+    def read(self, metric, since=None, time_column="time"):
+        """Wide DataFrame (``time_column`` + one column per field) sorted by time."""
+        sql = "SELECT ts, field, value FROM series WHERE metric = ?"
+        params = [metric]
+        if since is not None:
+            sql += " AND ts >= ?"
+            params.append(int(pd.Timestamp(since).timestamp() * 1000))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=[time_column])
+        long = pd.DataFrame(rows, columns=["ts", "field", "value"])
+        wide = long.pivot(index="ts", columns="field", values="value").sort_index()
+        wide.index = pd.to_datetime(wide.index, unit="ms", utc=True)
+        wide.columns.name = None
+        return wide.rename_axis(time_column).reset_index()
+
+    def sync(self, metric, fetch_since, time_column, initial_since=None):
+        """Fetch rows newer than what is stored and merge them in.
+
+        ``fetch_since(since)`` returns a DataFrame with ``time_column``; ``since`` is the last
+        stored timestamp (re-fetched, it may have been partial) or ``initial_since`` for an
+        empty store. Returns the number of rows fetched.
+        """
+        since = self.last_timestamp(metric) or initial_since
+        return self.upsert(metric, fetch_since(since), time_column)
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_timeseries_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TimeSeriesStore()
+        return _store
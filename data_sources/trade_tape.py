@@ -0,0 +1,334 @@
+# data_sources/trade_tape.py
+# Append-only, chunked, compressed columnar tape (one file per stream per UTC day).
+#
+# Layout on disk (root defaults to config.settings.tape_dir):
+#   <root>/<stream>/<YYYY-MM-DD>.tape   concatenated zlib-compressed column blocks
+#   <root>/<stream>/<YYYY-MM-DD>.idx    one JSON line per chunk: time range, row count, block offsets
+#
+# Rows are buffered in memory and written as one chunk per flush, so the write path stays a
+# list append under a lock. Flushing (sort, zlib, disk I/O) runs on a background flusher thread
+# that checks every tape each FLUSH_TICK_SECONDS, so quiet streams are flushed on time and ingest
+# threads never pay for compression. Reads use the index to pick only chunks overlapping the
+# requested time range and decompress them straight out of a memory-mapped tape file.
+
+import atexit
+import json
+import logging
+import mmap
+import os
+import time
+import weakref
+import zlib
+from datetime import datetime, timezone, timedelta
+from threading import Event, Lock, Thread
+
+import numpy as np
+import pandas as pd
+
+from config.settings import tape_dir
+
+logger = logging.getLogger(__name__)
+
+# Flush a chunk when this many rows are buffered or the oldest buffered row is this old
+CHUNK_ROWS = 50_000
+FLUSH_SECONDS = 30
+# How often the background flusher looks for due buffers (a full chunk wakes it immediately)
+FLUSH_TICK_SECONDS = 5
+# zlib level 1 keeps compression cheap enough for peak BTC trade rates
+COMPRESSION_LEVEL = 1
+
+TRADE_COLUMNS = {
+    "time": "int64",      # trade time, epoch ms
+    "id": "int64",        # Binance trade id
+    "price": "float64",
+    "qty": "float64",
+    "is_buyer_maker": "uint8",
+}
+
+MEMPOOL_COLUMNS = {
+    "time": "int64",      # first-seen time, epoch ms
+    "value": "int64",     # total output value, satoshis
+    "fee": "int64",       # satoshis
+    "size": "int32",      # bytes
+    "vin": "int32",
+    "vout": "int32",
+}
+
+# integer columns that are (nearly) monotonic compress much better as deltas
+DELTA_COLUMNS = {"time", "id"}
+
+
+def _day_of(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _day_start_ms(day):
+    return int(datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class ColumnarTape:
+    """Append-only columnar tape for one stream (e.g. one trading symbol)."""
+
+    def __init__(self, name, columns, root=tape_dir,
+                 chunk_rows=CHUNK_ROWS, flush_seconds=FLUSH_SECONDS):
+        self.name = name
+        self.columns = dict(columns)
+        self.directory = os.path.join(root, name)
+        self.chunk_rows = chunk_rows
+        self.flush_seconds = flush_seconds
+        self._buffer = {col: [] for col in self.columns}
+        self._buffered = 0
+        self._first_buffered_at = None
+        self._index_cache = {}  # day -> (idx file size, entries)
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.lock = Lock()         # guards the in-memory buffer (held briefly by ingest)
+        self._write_lock = Lock()  # serializes chunk writes so chunks land in buffer order
+        _register_live(self)
+
+    # ---------------------------------------------------------------- write
+    def append(self, rows):
+        """Buffer rows given as a dict of equal-length sequences keyed by column name.
+
+        Never writes to disk; a full chunk wakes the background flusher.
+        """
+        n = len(rows["time"])
+        if n == 0:
+            return
+        with self.lock:
+            for col in self.columns:
+                self._buffer[col].extend(rows[col])
+            self._buffered += n
+            if self._first_buffered_at is None:
+                self._first_buffered_at = time.monotonic()
+            full = self._buffered >= self.chunk_rows
+        if full:
+            _flush_wake.set()
+
+    def flush_due(self):
+        """Flush if the buffer holds a full chunk or its oldest row is flush_seconds old."""
+        with self.lock:
+            due = self._buffered and (
+                self._buffered >= self.chunk_rows
+                or time.monotonic() - self._first_buffered_at >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far; the buffer lock is only held to swap it out."""
+        with self._write_lock:
+            with self.lock:
+                if not self._buffered:
+                    return
+                buffer = self._buffer
+                self._buffer = {col: [] for col in self.columns}
+                self._buffered = 0
+                self._first_buffered_at = None
+            self._write_buffer(buffer)
+
+    def _write_buffer(self, buffer):
+        arrays = {col: np.asarray(buffer[col], dtype=dtype) for col, dtype in self.columns.items()}
+        order = np.argsort(arrays["time"], kind="stable")
+        arrays = {col: arr[order] for col, arr in arrays.items()}
+        days = np.array([_day_of(ms) for ms in arrays["time"][[0, -1]]])
+        if days[0] == days[1]:
+            self._write_chunk(days[0], arrays)
+            return
+        # batch crosses midnight UTC: split by day
+        day_index = (arrays["time"] - _day_start_ms(days[0])) // 86_400_000
+        for offset in np.unique(day_index):
+            mask = day_index == offset
+            day = (datetime.strptime(days[0], "%Y-%m-%d") + timedelta(days=int(offset))).strftime("%Y-%m-%d")
+            self._write_chunk(day, {col: arr[mask] for col, arr in arrays.items()})
+
+    def _write_chunk(self, day, arrays):
+        os.makedirs(self.directory, exist_ok=True)
+        tape_path = os.path.join(self.directory, f"{day}.tape")
+        blocks, layout, position = [], {}, 0
+        for col, arr in arrays.items():
+            data = arr
+            if col in DELTA_COLUMNS:
+                data = np.diff(arr, prepend=arr[:1] * 0)
+            block = zlib.compress(data.tobytes(), COMPRESSION_LEVEL)
+            layout[col] = [position, len(block)]
+            blocks.append(block)
+            position += len(block)
+
+        with open(tape_path, "ab") as f:
+            offset = f.tell()
+            f.write(b"".join(blocks))
+        entry = {
+            "offset": offset,
+            "rows": int(len(arrays["time"])),
+            "t_min": int(arrays["time"][0]),
+            "t_max": int(arrays["time"][-1]),
+            "columns": layout,
+        }
+        # index is written after the data so every index line points at complete blocks
+        with open(os.path.join(self.directory, f"{day}.idx"), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.rows_written += entry["rows"]
+        self.bytes_written += position
+
+    # ---------------------------------------------------------------- read
+    def days(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(f[:-4] for f in os.listdir(self.directory) if f.endswith(".idx"))
+
+    def _load_index(self, day):
+        path = os.path.join(self.directory, f"{day}.idx")
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return []
+        cached = self._index_cache.get(day)
+        if cached and cached[0] == size:
+            return cached[1]
+        with open(path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        self._index_cache[day] = (size, entries)
+        return entries
+
+    def scan(self, start_ms=None, end_ms=None, columns=None):
+        """Yield one dict of column arrays per chunk overlapping [start_ms, end_ms].
+
+        Chunks are decompressed directly from a memory-mapped view of the tape file and
+        rows outside the range are trimmed.
+        """
+        columns = list(columns or self.columns)
+        if "time" not in columns:
+            columns.insert(0, "time")
+        for day in self.days():
+            day_start = _day_start_ms(day)
+            if (end_ms is not None and day_start > end_ms) or \
+                    (start_ms is not None and day_start + 86_400_000 <= start_ms):
+                continue
+            entries = [e for e in self._load_index(day)
+                       if (start_ms is None or e["t_max"] >= start_ms)
+                       and (end_ms is None or e["t_min"] <= end_ms)]
+            if not entries:
+                continue
+            with open(os.path.join(self.directory, f"{day}.tape"), "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for entry in entries:
+                        chunk = {}
+                        for col in columns:
+                            rel, length = entry["columns"][col]
+                            start = entry["offset"] + rel
+                            raw = zlib.decompress(view[start:start + length])
+                            arr = np.frombuffer(raw, dtype=self.columns[col])
+                            chunk[col] = np.cumsum(arr) if col in DELTA_COLUMNS else arr
+                        mask = np.ones(entry["rows"], dtype=bool)
+                        if start_ms is not None:
+                            mask &= chunk["time"] >= start_ms
+                        if end_ms is not None:
+                            mask &= chunk["time"] <= end_ms
+                        yield {col: arr[mask] for col, arr in chunk.items()}
+                finally:
+                    view.release()
+
+    def read_range(self, start_ms=None, end_ms=None, columns=None):
+        """Return all rows in [start_ms, end_ms] (epoch ms) as a DataFrame sorted by time."""
+        chunks = list(self.scan(start_ms, end_ms, columns))
+        cols = list(columns or self.columns)
+        if "time" not in cols:
+            cols.insert(0, "time")
+        if not chunks:
+            return pd.DataFrame({col: np.array([], dtype=self.columns[col]) for col in cols})
+        df = pd.DataFrame({col: np.concatenate([c[col] for c in chunks]) for col in cols})
+        return df.sort_values("time", kind="stable").reset_index(drop=True)
+
+
+# ---------------------------------------------------------------- background flusher
+_live_tapes = weakref.WeakSet()
+_live_lock = Lock()
+_flush_wake = Event()
+_flusher_started = False
+
+
+def _register_live(tape):
+    """Track ``tape`` for the flusher thread, starting the thread with the first tape."""
+    global _flusher_started
+    with _live_lock:
+        _live_tapes.add(tape)
+        if _flusher_started:
+            return
+        _flusher_started = True
+    Thread(target=_flush_loop, name="tape-flusher", daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        _flush_wake.wait(FLUSH_TICK_SECONDS)
+        _flush_wake.clear()
+        with _live_lock:
+            tapes = list(_live_tapes)
+        for tape in tapes:
+            try:
+                tape.flush_due()
+            except Exception:
+                logger.exception("tape %s: background flush failed", tape.name)
+
+
+# ---------------------------------------------------------------- registry / ingest
+_tapes = {}
+_tapes_lock = Lock()
+_last_trade_ids = {}
+
+
+def get_tape(name, columns=TRADE_COLUMNS):
+    with _tapes_lock:
+        tape = _tapes.get(name)
+        if tape is None:
+            tape = _tapes[name] = ColumnarTape(name, columns)
+        return tape
+
+
+def get_trade_tape(symbol):
+    return get_tape(symbol, TRADE_COLUMNS)
+
+
+def get_mempool_tape():
+    return get_tape("BTC-MEMPOOL", MEMPOOL_COLUMNS)
+
+
+def record_trades(symbol, trades):
+    """Append raw Binance trades to the symbol's tape, skipping ids that were already recorded."""
+    if not trades:
+        return 0
+    with _tapes_lock:
+        last_id = _last_trade_ids.get(symbol, -1)
+        fresh = [t for t in trades if t["id"] > last_id]
+        if not fresh:
+            return 0
+        _last_trade_ids[symbol] = max(t["id"] for t in fresh)
+    get_trade_tape(symbol).append({
+        "time": [t["time"] for t in fresh],
+        "id": [t["id"] for t in fresh],
+        "price": [float(t["price"]) for t in fresh],
+        "qty": [float(t["qty"]) for t in fresh],
+        "is_buyer_maker": [bool(t["isBuyerMaker"]) for t in fresh],
+    })
+    return len(fresh)
+
+
+def record_mempool_tx(time_ms, value, fee, size, vin, vout):
+    """Append one unconfirmed BTC transaction summary to the mempool tape."""
+    get_mempool_tape().append({
+        "time": [time_ms], "value": [value],
+        "fee": [fee], "size": [size], "vin": [vin], "vout": [vout],
+    })
+
+
+def flush_all():
+    with _tapes_lock:
+        tapes = list(_tapes.values())
+    for tape in tapes:
+        tape.flush()
+
+
+# do not lose the buffered tail on shutdown
+atexit.register(flush_all)
@@ -0,0 +1,128 @@
+# pages/diagnostics.py
+
+import dash
+from dash import html, dcc, Output, Input, dash_table, callback
+import dash_bootstrap_components as dbc
+
+from utils import metrics
+from utils.stream_ingest import stream_snapshot
+from data_sources.prefetch import scheduler as prefetch_scheduler
+
+dash.register_page(__name__, path="/diagnostics", name="Diagnostics")
+
+REFRESH_INTERVAL = 5 * 1000
+
+layout = html.Div([
+    dbc.Container([
+        html.H2("Diagnostics", className="my-3", style={"color": "white"}),
+        html.P(
+            "Per-callback latency, fetch / compute / serialization split, payload size and errors. "
+            "Raw counters are available in Prometheus format at /metrics.",
+            style={"color": "#9ca3af"}
+        ),
+        dash_table.DataTable(
+            id="diagnostics-callback-table",
+            data=[],
+            columns=[],
+            sort_action="native",
+            style_table={"overflowX": "auto", "minWidth": "100%"},
+            style_cell={
+                "backgroundColor": "#1e1e2f",
+                "color": "white",
+                "textAlign": "center",
+                "padding": "10px",
+                "border": "1px solid #444",
+                "fontSize": "15px",
+            },
+            style_header={"fontWeight": "bold", "backgroundColor": "#333", "color": "white"},
+            style_data_conditional=[
+                {'if': {'filter_query': '{Errors} > 0', 'column_id': 'Errors'}, 'color': '#F6465D'},
+                {'if': {'filter_query': '{p95 (ms)} > 1000', 'column_id': 'p95 (ms)'}, 'color': '#F6465D'},
+            ],
+        ),
+        html.H4("Streams", className="mt-4", style={"color": "white"}),
+        html.P(
+            "WebSocket ingest health: queue depth, dropped frames, enqueue-to-processed lag and reconnects.",
+            style={"color": "#9ca3af"}
+        ),
+        dash_table.DataTable(
+            id="diagnostics-stream-table",
+            data=[],
+            columns=[],
+            style_table={"overflowX": "auto", "minWidth": "100%"},
+            style_cell={
+                "backgroundColor": "#1e1e2f",
+                "color": "white",
+                "textAlign": "center",
+                "padding": "10px",
+                "border": "1px solid #444",
+                "fontSize": "15px",
+            },
+            style_header={"fontWeight": "bold", "backgroundColor": "#333", "color": "white"},
+            style_data_conditional=[
+                {'if': {'filter_query': '{Dropped} > 0', 'column_id': 'Dropped'}, 'color': '#F6465D'},
+                {'if': {'filter_query': '{Connected} = "no"', 'column_id': 'Connected'}, 'color': '#F6465D'},
+            ],
+        ),
+        html.H4("On-Chain Prefetch", className="mt-4", style={"color": "white"}),
+        html.P(
+            "Background refresh jobs that keep on-chain metrics warm: cadence, runs, errors and last duration.",
+            style={"color": "#9ca3af"}
+        ),
+        dash_table.DataTable(
+            id="diagnostics-prefetch-table",
+            data=[],
+            columns=[],
+            style_table={"overflowX": "auto", "minWidth": "100%"},
+            style_cell={
+                "backgroundColor": "#1e1e2f",
+                "color": "white",
+                "textAlign": "center",
+                "padding": "10px",
+                "border": "1px solid #444",
+                "fontSize": "15px",
+            },
+            style_header={"fontWeight": "bold", "backgroundColor": "#333", "color": "white"},
+            style_data_conditional=[
+                {'if': {'filter_query': '{Errors} > 0', 'column_id': 'Errors'}, 'color': '#F6465D'},
+            ],
+        ),
+        dcc.Interval(id="diagnostics-interval", interval=REFRESH_INTERVAL, n_intervals=0),
+    ], fluid=True)
+], style={'backgroundColor': '#1e1e2f', 'padding': '20px', "minHeight": "100vh"})
+
+
+@callback(
+    Output("diagnostics-callback-table", "data"),
+    Output("diagnostics-callback-table", "columns"),
+    Input("diagnostics-interval", "n_intervals"),
+)
+def update_diagnostics_table(n):
+    rows = metrics.snapshot()
+    if not rows:
+        return [], [{"name": "Callback", "id": "Callback"}]
+    return rows, [{"name": col, "id": col} for col in rows[0].keys()]
+
+
+@callback(
+    Output("diagnostics-stream-table", "data"),
+    Output("diagnostics-stream-table", "columns"),
+    Input("diagnostics-interval", "n_intervals"),
+)
+def update_stream_table(n):
+    rows = stream_snapshot()
+    if not rows:
+        return [], [{"name": "Stream", "id": "Stream"}]
+    return rows, [{"name": col, "id": col} for col in rows[0].keys()]
+
+
+@callback(
+    Output("diagnostics-prefetch-table", "data"),
+    Output("diagnostics-prefetch-table", "columns"),
+    Input("diagnostics-interval", "n_intervals"),
+)
+def update_prefetch_table(n):
+    rows = prefetch_scheduler.snapshot()
+    if not rows:
+        return [], [{"name": "Job", "id": "Job"}]
+    return rows, [{"name": col, "id": col} for col in rows[0].keys()]
@@ -8,7 +8,8 @@ from dash import html, Input, Output, ctx, ALL
 import dash_bootstrap_components as dbc
 from dash_iconify import DashIconify
 
-from analytics.market_liquidity.exchange_netflow import render_exchange_netflow_layout
+from analytics import metric_registry
+from data_sources.prefetch import scheduler as prefetch_scheduler
 
 
 dash.register_page(__name__, path="/onchain", name="On-Chain Analysis")
@@ -24,6 +25,27 @@ categories = {
     "Miner / Supply Pressure": ["Miner Balance", "Miner to Exchange Flow"]
 }
 
+# ---------- Background prefetch ----------
+# Metrics join the scheduler the first time they are opened, so unopened metric modules
+# are never imported in the background; the first refresh waits a full cadence because
+# the click that registered the job has just filled the cache.
+def start_prefetch():
+    """Start the refresh thread; metrics are added by keep_warm once opened."""
+    prefetch_scheduler.start()
+
+
+def keep_warm(metric):
+    """Refresh ``metric`` in the background from now on so later clicks are served from cache."""
+    spec = metric_registry.get(metric)
+    if spec is not None and spec.ttl is not None:
+        prefetch_scheduler.ensure(spec.name, spec.warm, run_now=False)
+
+
+# Metric modules load lazily on first click, except those defining Dash callbacks
+metric_registry.import_callback_modules()
+start_prefetch()
+
+
 # ---------- Sidebar ----------
 def generate_sidebar(categories):
     category_icons = {
@@ -222,8 +244,11 @@ def update_onchain_body(n_clicks_list):
     #     body = render_exchange_netflow_layout()
 
     # در callback
-    if metric == "Exchange Netflow":
-        body = render_exchange_netflow_layout()
+    # registered metrics: loader / cache / renderer declared in analytics.metric_registry
+    rendered = metric_registry.render(metric)
+    if rendered is not None:
+        body = rendered
+        keep_warm(metric)
 
 
     return body
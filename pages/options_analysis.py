@@ -2,12 +2,35 @@
 import pandas as pd
 from dash import html, dcc, callback, Input, Output, State
 import dash_bootstrap_components as dbc
-from utils.options_data import analyze_options_data, analyze_all_expiries, get_expiry_dates
-from config.settings import default_coins
+from utils.options_data import analyze_options_data, analyze_all_expiries
+from utils.options_chain import get_chain_cache
+from analytics.options_pricing import chain_greeks, add_greeks
+from analytics.vol_surface import build_surface, surface_figure, term_structure_figure, skew_figure
+from analytics.options_aggregates import aggregate_chain
+from data_sources.options_history import get_options_history, record_snapshot, days_ago_ms
+from data_sources.prefetch import scheduler as prefetch_scheduler
+from config.settings import default_coins, options_history_underlyings, options_history_interval_seconds
+from utils import metrics
+from functools import partial
+import plotly.graph_objects as go
 import dash
 
 dash.register_page(__name__, path="/options", name="Options")
 
+HISTORY_LOOKBACK_DAYS = [1, 7, 30, 90]
+HISTORY_MAX_EXPIRIES = 6
+
+
+# ---------- Background history snapshots ----------
+def start_history_snapshots():
+    for underlying in options_history_underlyings:
+        prefetch_scheduler.register(f"Options History {underlying}", partial(record_snapshot, underlying),
+                                    every=options_history_interval_seconds)
+    prefetch_scheduler.start()
+
+
+start_history_snapshots()
+
 layout = html.Div([
     dbc.Container([
         html.H2("Binance Options Analysis", className="text-white mb-4"),
@@ -48,6 +71,16 @@ layout = html.Div([
                 ),
             ], width=3),
 
+            dbc.Col([
+                html.Label("History:", className="text-white"),
+                dcc.Dropdown(
+                    id="options-history-lookback",
+                    options=[{"label": f"{d}D", "value": d} for d in HISTORY_LOOKBACK_DAYS],
+                    value=7,
+                    clearable=False
+                ),
+            ], width=2),
+
         ], className="mb-4"),
 
         dcc.Loading(
@@ -56,6 +89,8 @@ layout = html.Div([
             children=[
                 html.Div(id="signals-container"),
                 html.Div(id="plots-container"),
+                html.Div(id="vol-surface-container"),
+                html.Div(id="options-history-container"),
                 html.Div(id="options-table-container")
             ]
         )
@@ -70,7 +105,10 @@ layout = html.Div([
 def update_expiry_dropdown(symbol):
     if not symbol:
         return [], None
-    dates = get_expiry_dates(symbol)
+    try:
+        dates = get_chain_cache().get(symbol).expiries()
+    except Exception:
+        dates = []
     if not dates:
         return [], None
     options = [{"label": date, "value": date} for date in dates]
@@ -90,6 +128,7 @@ def update_expiry_dropdown(symbol):
     ],
     prevent_initial_call=False
 )
+@metrics.instrument()
 def update_options_dashboard(symbol, option_type, expiry_date):
     if not (symbol and option_type and expiry_date):
         error_message = "Initializing dashboard... Please wait."
@@ -102,11 +141,31 @@ def update_options_dashboard(symbol, option_type, expiry_date):
         )
 
     try:
-        # Analyze all expiries for signals, insights, and plots
-        df_all, signals, all_expiry_insights, df_indices, plot_figures = analyze_all_expiries(asset=symbol)
+        # One chain snapshot per underlying; analyses are memoized per snapshot version, so
+        # switching call/put or expiry only recomputes what was not seen for this version yet
+        chains = get_chain_cache()
+        with metrics.stage("fetch"):
+            snapshot = chains.get(symbol)
+
+            # Analyze all expiries for signals, insights, and plots
+            df_all, signals, all_expiry_insights, df_indices, plot_figures = chains.memoize(
+                snapshot, "all_expiries", lambda: analyze_all_expiries(asset=symbol))
+
+            # Analyze single expiry for table
+            df, single_expiry_insights = chains.memoize(
+                snapshot, ("expiry", option_type, expiry_date),
+                lambda: analyze_options_data(asset=symbol, option_type=option_type, expiry_date=expiry_date))
 
-        # Analyze single expiry for table
-        df, single_expiry_insights = analyze_options_data(asset=symbol, option_type=option_type, expiry_date=expiry_date)
+        with metrics.stage("compute"):
+            # IV / greeks of the whole chain, recomputed only for contracts changed since the last refresh
+            greeks = chains.derive(snapshot, "greeks", lambda frame: chain_greeks(frame, snapshot.index_price))
+            df = add_greeks(df, greeks.loc[snapshot.slice(expiry_date, option_type).index])
+            # max pain / OI / PCR / GEX for all expiries at once, once per snapshot version
+            aggregates = chains.memoize(snapshot, "aggregates", lambda: aggregate_chain(snapshot, greeks))
+            chain_signals, chain_figures = chains.memoize(
+                snapshot, "aggregate_views", lambda: (aggregates.signals(), aggregates.figures()))
+            signals = list(signals or []) + chain_signals
+            plot_figures = list(plot_figures or []) + chain_figures
 
         # Signals and Insights for All Expiries
         signals_block = html.Div([
@@ -166,6 +225,107 @@ def update_options_dashboard(symbol, option_type, expiry_date):
         )
 
 
+@callback(
+    Output("vol-surface-container", "children"),
+    Input("symbol-selector", "value"),
+    Input("expiry-date-selector", "value"),
+)
+@metrics.instrument()
+def update_vol_surface(symbol, expiry_date):
+    if not (symbol and expiry_date):
+        return None
+    try:
+        chains = get_chain_cache()
+        with metrics.stage("fetch"):
+            snapshot = chains.get(symbol)
+        with metrics.stage("compute"):
+            # fitted once per snapshot version; expiry changes only redraw the skew
+            greeks = chains.derive(snapshot, "greeks", lambda frame: chain_greeks(frame, snapshot.index_price))
+            surface = chains.memoize(snapshot, "vol_surface", lambda: build_surface(snapshot, greeks))
+            if surface.empty:
+                return html.Div("Not enough quotes to fit a volatility surface.", className="text-warning")
+            figures = chains.memoize(snapshot, "vol_surface_figures",
+                                     lambda: (surface_figure(surface), term_structure_figure(surface)))
+            skew = skew_figure(surface, expiry_date)
+    except Exception as e:
+        return html.Div(f"Error building volatility surface: {e}", className="text-warning")
+
+    return html.Div([
+        html.H4("Volatility Surface", className="text-white mt-4"),
+        dcc.Graph(figure=figures[0], style={"height": "550px"}),
+        html.Div([
+            dcc.Graph(figure=figures[1], style={"width": "48%", "height": "400px", "margin": "1%"}),
+            dcc.Graph(figure=skew, style={"width": "48%", "height": "400px", "margin": "1%"}),
+        ], style={"display": "flex", "flexWrap": "wrap", "justifyContent": "space-between"}),
+    ])
+
+
+def _history_figure(title, yaxis_title):
+    fig = go.Figure()
+    fig.update_layout(title=title, yaxis_title=yaxis_title, template="plotly_dark", plot_bgcolor="#1e1e2f",
+                      paper_bgcolor="#1e1e2f", font_color="#ffffff", height=400,
+                      margin=dict(l=40, r=20, t=50, b=40))
+    return fig
+
+
+@callback(
+    Output("options-history-container", "children"),
+    Input("symbol-selector", "value"),
+    Input("expiry-date-selector", "value"),
+    Input("options-history-lookback", "value"),
+)
+@metrics.instrument()
+def update_options_history(symbol, expiry_date, lookback_days):
+    if not symbol:
+        return None
+    history = get_options_history()
+    since_ms = days_ago_ms(lookback_days or 7)
+    with metrics.stage("fetch"):
+        summary = history.summary(symbol, since_ms)
+        oi = history.oi_by_strike(symbol, expiry_date, since_ms) if expiry_date else pd.DataFrame()
+    if summary.empty:
+        return html.Div(f"No {symbol} options history recorded yet (snapshots run every "
+                        f"{options_history_interval_seconds // 60} min).", className="text-info mt-4")
+
+    with metrics.stage("compute"):
+        latest = summary[summary["time"] == summary["time"].max()].sort_values("expiry_ts")
+        expiries = latest["expiry"].head(HISTORY_MAX_EXPIRIES).tolist()
+
+        atm_fig = _history_figure("ATM IV by Expiry", "IV %")
+        skew_fig = _history_figure("25-Delta Skew by Expiry (Put - Call)", "Vol Points")
+        for expiry in expiries:
+            rows = summary[summary["expiry"] == expiry]
+            atm_fig.add_trace(go.Scatter(x=rows["time"], y=rows["atm_iv"] * 100, name=str(expiry), mode="lines"))
+            skew_fig.add_trace(go.Scatter(x=rows["time"], y=rows["skew_25d"] * 100, name=str(expiry), mode="lines"))
+
+        totals = summary.groupby("time")[["call_oi", "put_oi", "call_volume", "put_volume"]].sum()
+        ratio_fig = _history_figure("Put/Call Ratio (All Expiries)", "Ratio")
+        ratio_fig.add_trace(go.Scatter(x=totals.index, y=totals["put_oi"] / totals["call_oi"],
+                                       name="OI", mode="lines", line=dict(color="#38bdf8")))
+        ratio_fig.add_trace(go.Scatter(x=totals.index, y=totals["put_volume"] / totals["call_volume"],
+                                       name="Volume", mode="lines", line=dict(color="#F0B90B")))
+
+        selected = summary[summary["expiry"] == int(expiry_date)] if expiry_date else summary.iloc[0:0]
+        pain_fig = _history_figure(f"Max Pain vs Index ({expiry_date})", "Price")
+        pain_fig.add_trace(go.Scatter(x=selected["time"], y=selected["max_pain"], name="Max Pain",
+                                      mode="lines", line=dict(color="#F6465D")))
+        pain_fig.add_trace(go.Scatter(x=selected["time"], y=selected["index_price"], name="Index",
+                                      mode="lines", line=dict(color="#0ECB81")))
+
+        oi_fig = _history_figure(f"Open Interest by Strike ({expiry_date})", "Strike")
+        if not oi.empty:
+            oi_fig.add_trace(go.Heatmap(x=oi.index, y=oi.columns, z=oi.to_numpy().T, colorscale="Viridis",
+                                        colorbar=dict(title="OI")))
+
+    graph_style = {"width": "48%", "height": "400px", "margin": "1%"}
+    return html.Div([
+        html.H4("Options History", className="text-white mt-4"),
+        html.Div([dcc.Graph(figure=fig, style=graph_style) for fig in (atm_fig, skew_fig, ratio_fig, pain_fig)],
+                 style={"display": "flex", "flexWrap": "wrap", "justifyContent": "space-between"}),
+        dcc.Graph(figure=oi_fig, style={"height": "450px"}),
+    ])
+
+
 # # pages/options_analysis.py
 # 
 # import pandas as pd
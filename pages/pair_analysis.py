@@ -14,7 +14,9 @@ import plotly.graph_objects as go
 import pandas as pd
 import sys, os
 from config.settings import default_symbols
-from utils.binance_data import fetch_data_binance, fetch_data_binance_candles
+from data_sources.candle_cache import candle_cache
+from analytics.ror_matrix import compute_ror_matrix
+from utils import metrics
 
 # مسیر utils برای ایمپورت
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -25,6 +27,25 @@ dash.register_page(__name__, path="/pairanalysis", name="Pair Analysis")
 
 
 
+# ---------- تنظیمات ----------
+TIMEFRAMES = {
+    "1M": "Monthly",
+    "1w": "Weekly",
+    "1d": "Daily",
+    "4h": "4-Hour",
+    #"1h": "1-Hour"
+}
+
+# 🔹 تعداد روزهای متفاوت برای هر تایم‌فریم
+LOOKBACK_BY_TF = {
+    "1M": 365,
+    "1w": 365,
+    "1d": 90,
+    "4h": 14,
+    #"1h": 7
+}
+
+
 # ---------- Layout ----------
 layout = html.Div([
     dbc.Container([
@@ -61,180 +82,242 @@ layout = html.Div([
         ], width=1),
     ], justify="start", className="mb-4"),
 
-        # ✅ Spinner برای نمودار
+        # ✅ Spinner برای هر کارت؛ هر تایم‌فریم جدا رندر می‌شود
+    html.Div(id='comparison-chart-container', children=[
+        dbc.Row(
+            [
+                dbc.Col(
+                    dcc.Loading(
+                        type="circle",  # یا "default" یا "cube" بسته به سلیقه‌ت
+                        color="#00cc96",
+                        children=html.Div(id=f"pair-card-{tf}")
+                    ),
+                    width=6
+                )
+                for tf in list(TIMEFRAMES)[i:i + 2]
+            ],
+            className="mb-3"
+        )
+        for i in range(0, len(TIMEFRAMES), 2)
+    ]),
+
+    # ---------- ماتریس ROR برای همه نمادها ----------
+    html.H3("All-Pairs ROR Matrix", style={"color": "white", "marginTop": "30px"}),
+    dbc.Row([
+        dbc.Col([
+            html.Label("Timeframe", style={"color": "white"}),
+            dcc.Dropdown(
+                options=[{"label": label, "value": tf} for tf, label in TIMEFRAMES.items()],
+                value="1d",
+                id="ror-matrix-timeframe",
+                clearable=False,
+            ),
+        ], width=2),
+    ], className="mb-3"),
     dcc.Loading(
-        id="loading-spinner",
-        type="circle",  # یا "default" یا "cube" بسته به سلیقه‌ت
+        type="circle",
         color="#00cc96",
-        children=html.Div(id='comparison-chart-container')
+        children=html.Div(id="ror-matrix-container")
     )
 
 ], fluid=True)
 ], style={'backgroundColor': '#1e1e2f', 'padding': '20px',  "minHeight": "100vh"})
 
-# ---------- Callback ----------
-from dash import callback
-
-@callback(
-    Output('comparison-chart-container', 'children'),
-    Input('pair1-dropdown', 'value'),
-    Input('pair2-dropdown', 'value')
-)
+# ---------- محاسبات ----------
+def range_stats(df):
+    """Signed candle range % (+ for up candles, - for down) and its positive / negative means."""
+    # --- محاسبه جهت کندل: +1 اگر close >= open و -1 اگر close < open
+    direction = np.where(df["close"] >= df["open"], 1, -1)
+    # --- محاسبه درصد Range بین high و low و ضرب در جهت کندل
+    range_pct = ((df["high"] - df["low"]) / df["low"]) * 100 * direction
+    return {
+        "range_%": range_pct,
+        "avg": range_pct.mean(),
+        "mean_pos": range_pct[range_pct > 0].mean(),
+        "mean_neg": range_pct[range_pct < 0].mean(),
+    }
 
 
-def update_pair_analysis(pair1, pair2):
-    if not pair1 or not pair2:
-        return html.Div("Please select both pairs.", style={"color": "gray"})
+def relative_opportunity(stats1, stats2):
+    """Growth potential, risk difference and ROR of symbol 2 relative to symbol 1."""
+    growth_potential = stats2["mean_pos"] - stats1["mean_pos"]
+    risk_diff = abs(stats2["mean_neg"]) - abs(stats1["mean_neg"])
+    ror = (growth_potential / risk_diff) if risk_diff != 0 else None
+    return growth_potential, risk_diff, ror
+
+
+def build_timeframe_card(pair1, pair2, tf):
+    label = TIMEFRAMES[tf]
+    lookback_days = LOOKBACK_BY_TF.get(tf, 90)
+
+    # both symbols download concurrently; an unchanged symbol is served from the candle cache
+    with metrics.stage("fetch"):
+        entries = candle_cache.fetch_many([(pair1, tf, lookback_days), (pair2, tf, lookback_days)])
+    entry1, entry2 = entries[(pair1, tf, lookback_days)], entries[(pair2, tf, lookback_days)]
+    if entry1 is None or entry2 is None or entry1.df is None or entry2.df is None \
+            or entry1.df.empty or entry2.df.empty:
+        return None
+
+    with metrics.stage("compute"):
+        # per-symbol statistics are memoized on the cached frame
+        stats1 = entry1.derive("range_stats", range_stats)
+        stats2 = entry2.derive("range_stats", range_stats)
+        df1, df2 = entry1.df, entry2.df
+
+        # ✅ میانگین بازده برای نمایش در عنوان
+        avg1, avg2 = stats1["avg"], stats2["avg"]
+
+        # --- محاسبه شاخص‌ها
+        growth_potential, risk_diff, ror = relative_opportunity(stats1, stats2)
+
+        # --- رنگ و متن برای نمایش
+        gp_color = "#00cc96" if growth_potential > 0 else "#ef553b"
+        risk_color = "#ef553b" if risk_diff > 0 else "#00cc96"
+        ror_color = "#00cc96" if (ror and ror > 1) else "#ef553b"
+
+        stats_card = html.Div([
+            html.Div([
+                html.Span("📈 Growth Potential: ", style={"color": "white"}),
+                html.Span(f"{growth_potential:.2f}%", style={"color": gp_color, "fontWeight": "bold"}),
+            ]),
+            html.Div([
+                html.Span("⚠️ Risk Difference: ", style={"color": "white"}),
+                html.Span(f"{risk_diff:.2f}%", style={"color": risk_color, "fontWeight": "bold"}),
+            ]),
+            html.Div([
+                html.Span("⚖️ ROR: ", style={"color": "white"}),
+                html.Span(f"{ror:.2f}" if ror is not None else "N/A", style={"color": ror_color, "fontWeight": "bold"}),
+            ])
+        ], style={
+            "marginTop": "10px",
+            "padding": "10px",
+            "backgroundColor": "#1e1e2f",
+            "borderRadius": "8px"
+        })
+
+        # ✅ ساخت نمودار میله‌ای گروهی
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=df1.index,
+            y=stats1["range_%"],
+            name=f"{pair1} % Range",
+            opacity=0.6
+        ))
+        fig.add_trace(go.Bar(
+            x=df2.index,
+            y=stats2["range_%"],
+            name=f"{pair2} % Range",
+            opacity=0.6
+        ))
+
+        fig.update_layout(
+            title=f"{label} Comparison: {pair1} vs {pair2} "
+                  f"— Avg Range: {avg1:.2f}% vs {avg2:.2f}%",
+            xaxis_title="Date",
+            yaxis_title="% Range (Volatility per Candle)",
+            template="plotly_dark",
+            plot_bgcolor='#1e1e2f',
+            paper_bgcolor='#1e1e2f',
+            barmode="group",
+            height=400,
+            margin=dict(l=40, r=20, t=40, b=40),
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1
+            )
+        )
 
-    charts = []
+    return dbc.Card(
+        dbc.CardBody([
+            dcc.Graph(figure=fig),
+            stats_card
+        ]),
+        style={
+            "margin": "10px",
+            "backgroundColor": "#1e1e2f", # main background
+            "borderRadius": "10px",
+            "boxShadow": "0 2px 8px rgba(0,0,0,0.3)"
+        }
+    )
 
-    # ---------- تنظیمات ----------
-    timeframes = {
-        "1M": "Monthly",
-        "1w": "Weekly",
-        "1d": "Daily",
-        "4h": "4-Hour",
-        #"1h": "1-Hour"
-    }
 
-    # 🔹 تعداد روزهای متفاوت برای هر تایم‌فریم
-    lookback_by_tf = {
-        "1M": 365,
-        "1w": 365,
-        "1d": 90,
-        "4h": 14,
-        #"1h": 7
-    }
+# ---------- Callback ----------
+from dash import callback
 
-    for tf, label in timeframes.items():
-        try:
-            lookback_days = lookback_by_tf.get(tf, 90)
-
-            df1 = fetch_data_binance(pair1, tf, lookback_days)
-            df2 = fetch_data_binance(pair2, tf, lookback_days)
-
-            if df1 is None or df2 is None or df1.empty or df2.empty:
-                continue
-
-            # --- محاسبه جهت کندل: +1 اگر close >= open و -1 اگر close < open
-            dir1 = np.where(df1["close"] >= df1["open"], 1, -1)
-            dir2 = np.where(df2["close"] >= df2["open"], 1, -1)
-
-            # --- محاسبه درصد Range بین high و low و ضرب در جهت کندل
-            df1["range_%"] = ((df1["high"] - df1["low"]) / df1["low"]) * 100 * dir1
-            df2["range_%"] = ((df2["high"] - df2["low"]) / df2["low"]) * 100 * dir2
-
-            # ✅ محاسبه میانگین بازده برای نمایش در عنوان
-            avg1 = df1["range_%"].mean()
-            avg2 = df2["range_%"].mean()
-
-            # --- جدا کردن بازده‌های مثبت و منفی
-            pos1 = df1[df1["range_%"] > 0]["range_%"]
-            pos2 = df2[df2["range_%"] > 0]["range_%"]
-            neg1 = df1[df1["range_%"] < 0]["range_%"]
-            neg2 = df2[df2["range_%"] < 0]["range_%"]
-
-            # --- میانگین‌ها
-            mean_pos1, mean_pos2 = pos1.mean(), pos2.mean()
-            mean_neg1, mean_neg2 = neg1.mean(), neg2.mean()
-
-            # --- محاسبه شاخص‌ها
-            growth_potential = mean_pos2 - mean_pos1
-            risk_diff = abs(mean_neg2) - abs(mean_neg1)
-            ror = (growth_potential / risk_diff) if risk_diff != 0 else None
-
-            # --- رنگ و متن برای نمایش
-            gp_color = "#00cc96" if growth_potential > 0 else "#ef553b"
-            risk_color = "#ef553b" if risk_diff > 0 else "#00cc96"
-            ror_color = "#00cc96" if (ror and ror > 1) else "#ef553b"
-
-            stats_card = html.Div([
-                html.Div([
-                    html.Span("📈 Growth Potential: ", style={"color": "white"}),
-                    html.Span(f"{growth_potential:.2f}%", style={"color": gp_color, "fontWeight": "bold"}),
-                ]),
-                html.Div([
-                    html.Span("⚠️ Risk Difference: ", style={"color": "white"}),
-                    html.Span(f"{risk_diff:.2f}%", style={"color": risk_color, "fontWeight": "bold"}),
-                ]),
-                html.Div([
-                    html.Span("⚖️ ROR: ", style={"color": "white"}),
-                    html.Span(f"{ror:.2f}" if ror is not None else "N/A", style={"color": ror_color, "fontWeight": "bold"}),
-                ])
-            ], style={
-                "marginTop": "10px",
-                "padding": "10px",
-                "backgroundColor": "#1e1e2f",
-                "borderRadius": "8px"
-            })
-
-            # ✅ ساخت نمودار میله‌ای گروهی
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=df1.index,
-                y=df1["range_%"],
-                name=f"{pair1} % Range",
-                opacity=0.6
-            ))
-            fig.add_trace(go.Bar(
-                x=df2.index,
-                y=df2["range_%"],
-                name=f"{pair2} % Range",
-                opacity=0.6
-            ))
-
-
-
-            fig.update_layout(
-                title=f"{label} Comparison: {pair1} vs {pair2} "
-                      f"— Avg Range: {avg1:.2f}% vs {avg2:.2f}%",
-                xaxis_title="Date",
-                yaxis_title="% Range (Volatility per Candle)",
-                template="plotly_dark",
-                plot_bgcolor='#1e1e2f',
-                paper_bgcolor='#1e1e2f',
-                barmode="group",
-                height=400,
-                margin=dict(l=40, r=20, t=40, b=40),
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                )
-            )
 
-            charts.append(
-                dbc.Card(
-                    dbc.CardBody([
-                        dcc.Graph(figure=fig),
-                        stats_card
-                    ]),
-                    style={
-                        "margin": "10px",
-                        "backgroundColor": "#1e1e2f", # main background
-                        "borderRadius": "10px",
-                        "boxShadow": "0 2px 8px rgba(0,0,0,0.3)"
-                    }
-                )
-            )
+def register_timeframe_callback(tf):
+    """One callback per timeframe card, so each card renders as soon as its candles arrive."""
 
+    @callback(
+        Output(f"pair-card-{tf}", 'children'),
+        Input('pair1-dropdown', 'value'),
+        Input('pair2-dropdown', 'value')
+    )
+    @metrics.instrument(f"update_pair_analysis_{tf}")
+    def update_pair_analysis(pair1, pair2):
+        if not pair1 or not pair2:
+            return html.Div("Please select both pairs.", style={"color": "gray"}) if tf == next(iter(TIMEFRAMES)) else None
+        try:
+            return build_timeframe_card(pair1, pair2, tf)
         except Exception as e:
             print(f"Error processing {tf}: {e}")
+            return None
+
+    return update_pair_analysis
+
+
+for _tf in TIMEFRAMES:
+    register_timeframe_callback(_tf)
 
-    # ✅ گروه‌بندی کارت‌ها به صورت دو در دو (mosaic)
-    rows = []
-    for i in range(0, len(charts), 2):
-        row = dbc.Row(
-            [
-                dbc.Col(charts[i], width=6),
-                dbc.Col(charts[i + 1], width=6) if i + 1 < len(charts) else dbc.Col(width=6)
-            ],
-            className="mb-3"
-        )
-        rows.append(row)
 
-    return rows
+# ---------- ماتریس ROR ----------
+_ror_matrices = {}  # timeframe -> (cache key of the candle frames used, RorMatrix)
 
 
+def ror_matrix(tf, symbols=default_symbols):
+    """N x N ROR matrix for ``tf``; recomputed only when one of the candle frames was refetched."""
+    lookback_days = LOOKBACK_BY_TF.get(tf, 90)
+    with metrics.stage("fetch"):
+        entries = candle_cache.fetch_many([(symbol, tf, lookback_days) for symbol in symbols])
+    entries = {request[0]: entry for request, entry in entries.items()
+               if entry is not None and entry.df is not None and not entry.df.empty}
+    key = tuple((symbol, entry.fetched_at) for symbol, entry in entries.items())
+    cached = _ror_matrices.get(tf)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with metrics.stage("compute"):
+        matrix = compute_ror_matrix({symbol: entry.derive("range_stats", range_stats)["range_%"]
+                                     for symbol, entry in entries.items()})
+    _ror_matrices[tf] = (key, matrix)
+    return matrix
+
+
+@callback(
+    Output("ror-matrix-container", "children"),
+    Input("ror-matrix-timeframe", "value"),
+    Input("pair1-dropdown", "value")
+)
+@metrics.instrument()
+def update_ror_matrix(tf, base):
+    if not tf:
+        return None
+    try:
+        matrix = ror_matrix(tf)
+    except Exception as e:
+        return html.Div(f"Error building ROR matrix: {e}", style={"color": "#ef553b"})
+    if len(matrix.symbols) < 2:
+        return html.Div("Not enough symbols with data for a ROR matrix.", style={"color": "gray"})
+
+    ranking = matrix.ranking(base)
+    return dbc.Row([
+        dbc.Col(dcc.Graph(figure=matrix.heatmap(f"{TIMEFRAMES[tf]} ROR Matrix (row = base, column = risky)")),
+                width=8),
+        dbc.Col([
+            html.H5(f"Best risky assets vs {base}", style={"color": "white"}),
+            dbc.Table.from_dataframe(ranking, striped=True, bordered=True, hover=True, responsive=True,
+                                     color="dark", size="sm"),
+        ], width=4),
+    ])
@@ -2,22 +2,33 @@
 
 import dash
 from dash import html, dcc, Output, Input, State, dash_table, callback
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import pandas as pd
 from utils.binance_data import get_recent_trades, fetch_data_binance, fetch_data_binance_candles
 from config.settings import default_symbols
 from utils import trading_functions as tf
+from utils import metrics
+from analytics import order_flow
+from analytics.mempool_stats import mempool_stats
+from analytics.active_addresses import active_addresses
+from analytics.coin_days import coin_days
+from data_sources import trade_tape
+from data_sources import address_labels
+from data_sources.address_labels import get_label_index
+from data_sources.large_tx_store import get_large_tx_store
+from utils.price_feed import btc_price_feed
+from utils.stream_ingest import start_stream
+from utils import tx_prefilter
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 
 # for large transactions monitoring
-import websocket
 import json
-import requests
 from datetime import datetime
 import pytz
-from threading import Thread, Lock
+from threading import Lock, Thread
 import plotly.express as px
 
 
@@ -33,8 +44,16 @@ timeframes = {"Trigger": "5m", "Pattern": "15m", "Master": "1h"}
 # Lock for thread safety
 tx_data_lock = Lock()
 
-# Shared list to store large transactions (persists across tab switches)
-tx_data_list = []
+# Large transactions are persisted in data_sources.large_tx_store (survives restarts)
+# Chart window options for the Large Transactions section (seconds, None = all history)
+LARGE_TX_WINDOWS = {"1h": 3600, "6h": 6 * 3600, "24h": 86400, "7d": 7 * 86400, "All": None}
+LARGE_TX_TABLE_ROWS = 100
+# The change marker also moves once per bucket, so rows that age out of the time window are
+# dropped from the table and chart even when no new transaction arrives
+LARGE_TX_REFRESH_BUCKET_SECONDS = 60
+# A transaction spending from an exchange is a withdrawal when more than this share of its
+# output value leaves to non-exchange addresses (otherwise an internal transfer)
+WITHDRAWAL_EXTERNAL_SHARE = 0.5
 
 # Shared list to store notifications for special transactions (>1000 BTC)
 notification_list = []
@@ -42,6 +61,11 @@ notification_list = []
 # Global variable to control WebSocket monitoring (persists across tab switches)
 global_monitoring_active = [True]  # Using a list to allow modification in WebSocket thread
 
+# blockchain.info ingest: bounded frame queue (drop-oldest) and parsing workers
+TX_STREAM_NAME = "blockchain-unconfirmed"
+TX_STREAM_QUEUE_SIZE = 20_000
+TX_STREAM_WORKERS = 2
+
 # Supported symbols (currently only BTC, can be expanded)
 supported_symbols = ['BTC']  # Placeholder for future expansion
 
@@ -451,10 +475,17 @@ layout = html.Div([
                 html.Br(),
                 # --- Large Transactions Section ---        
                 html.H4("Large Transactions", className="mt-4"),
+                dcc.Dropdown(
+                    id="large-tx-window-dropdown",
+                    options=[{"label": label, "value": label} for label in LARGE_TX_WINDOWS],
+                    value="24h",
+                    clearable=False,
+                    style={"width": "120px", "marginBottom": "10px"},
+                ),
                 # html.P("This page displays large Bitcoin transactions detected in real-time.", style={'color': '#ffffff'}),
                 dcc.Interval(id="update-interval", interval=10*1000, n_intervals=0),  # Update every 10 seconds
                 dcc.Interval(id="notification-interval", interval=5*1000, n_intervals=0),  # Check for notification expiration every 5 seconds
-                dcc.Store(id="large-transactions-store", data={"transactions": [], "threshold": 50}),
+                dcc.Store(id="large-transactions-store", data={"last_id": 0, "threshold": 50}),
                 html.Div(id="notifications-container", style={'marginBottom': '20px'}),  # Container for notifications
                 dcc.Graph(id="large-transactions-chart", style={'height': '400px'}),  # Chart above the table (small until data arrives)
                 html.Div(id="large-transactions-table"),
@@ -544,16 +575,25 @@ def update_chart_title(symbol):
     State("trade-head-input", "value"),
     State("trade-interval-input", "value"),
 )
+@metrics.instrument()
 def update_trade_summary(n, selected_symbols, limit_sort, head_show, interval_sec):
     if not selected_symbols:
         return html.Div("Please select at least one symbol.", className="text-danger"), interval_sec * 1000
 
     rows = []
     for symbol in selected_symbols:
-        trades = get_recent_trades(symbol, limit=limit_sort)
+        with metrics.stage("fetch"):
+            trades = get_recent_trades(symbol, limit=limit_sort)
         if not trades:
             continue
 
+        trade_tape.record_trades(symbol, trades)
+
+        # Incremental order flow: only trades newer than the last seen id are processed
+        flow = order_flow.update_from_trades(symbol, trades)
+        with flow.lock:
+            flow_summary = flow.summary()
+
         df = pd.DataFrame(trades)
         df['qty'] = pd.to_numeric(df['qty'], errors='coerce')
         df['price'] = pd.to_numeric(df['price'], errors='coerce')
@@ -585,6 +625,7 @@ def update_trade_summary(n, selected_symbols, limit_sort, head_show, interval_se
             f"Total Sell ({limit_sort})": round(sell_volume, 2),
             f"Avg Top {head_show} Buys": round(avg_buy, 2) if pd.notna(avg_buy) else 0,
             f"Avg Top {head_show} Sells": round(avg_sell, 2) if pd.notna(avg_sell) else 0,
+            **flow_summary,
             "Signal": signal_str
         })
 
@@ -702,9 +743,10 @@ def update_signal_title(symbol):
 
 #     return df.to_dict("records"), columns
 
-
+@metrics.instrument()
 def update_signal_table(n, symbol):
-    dfs = {key: fetch_data_binance(symbol, tfreq, lookback_days=10) for key, tfreq in timeframes.items()}
+    with metrics.stage("fetch"):
+        dfs = {key: fetch_data_binance(symbol, tfreq, lookback_days=10) for key, tfreq in timeframes.items()}
     
     rows = []
     # Dictionaries to hold results for different timeframes
@@ -783,6 +825,7 @@ def update_signal_table(n, symbol):
     Input("signal-symbol-dropdown", "value"), 
     Input("trade-update-interval", "n_intervals")
 )
+@metrics.instrument()
 def update_all_candlesticks(symbols, n):
     # اگر کاربر کمتر از 4 سیمبل انتخاب کرده باشه، بقیه رو None قرار بده
     if not isinstance(symbols, list):
@@ -812,7 +855,8 @@ def update_candlestick_figure(symbol, timeframe, n_intervals):
     #timeframe = "1m"
     # --- دریافت دیتا ---
     try:
-        df = fetch_data_binance_candles(symbol, timeframe = timeframe, lookback_days = 5, lookback_candles = lookback_candles)
+        with metrics.stage("fetch"):
+            df = fetch_data_binance_candles(symbol, timeframe = timeframe, lookback_days = 5, lookback_candles = lookback_candles)
     except Exception as e:
         fig = go.Figure()
         fig.update_layout(template="plotly_dark")
@@ -866,23 +910,39 @@ def update_candlestick_figure(symbol, timeframe, n_intervals):
         fig.add_annotation(text="No valid OHLC rows after cleaning", xref="paper", yref="paper", showarrow=False)
         return fig
 
-    # --- ساخت کندل استیک ساده ---
-    fig = go.Figure(
-        data=[
-            go.Candlestick(
-                x=df.index,
-                open=df["open"],
-                high=df["high"],
-                low=df["low"],
-                close=df["close"],
-                name=symbol,
-                increasing_line_color="#00B894",
-                decreasing_line_color="#FF6B6B",
-                showlegend=False
-            )
-        ]
+    # --- CVD from the streaming order-flow engine (no raw trade re-scan) ---
+    flow = order_flow.get_order_flow(symbol)
+    with flow.lock:
+        cvd = flow.cvd_series(timeframe)
+    if not cvd.empty and isinstance(df.index, pd.DatetimeIndex):
+        index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+        cvd = cvd[cvd.index >= index[0]]
+
+    candles = go.Candlestick(
+        x=df.index,
+        open=df["open"],
+        high=df["high"],
+        low=df["low"],
+        close=df["close"],
+        name=symbol,
+        increasing_line_color="#00B894",
+        decreasing_line_color="#FF6B6B",
+        showlegend=False
     )
 
+    # --- ساخت کندل استیک ساده (با زیرنمودار CVD در صورت وجود داده) ---
+    if cvd.empty:
+        fig = go.Figure(data=[candles])
+    else:
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.75, 0.25], vertical_spacing=0.03)
+        fig.add_trace(candles, row=1, col=1)
+        fig.add_trace(
+            go.Scatter(x=cvd.index, y=cvd.values, mode="lines", name="CVD",
+                       line=dict(color="#38bdf8", width=1.5), showlegend=False),
+            row=2, col=1
+        )
+        fig.update_yaxes(title_text="CVD", row=2, col=1)
+
     # --- تنظیمات ظاهری (بدون range slider) ---
     fig.update_layout(
         #title_text=f"{symbol} ({timeframe})" if symbol else "No Symbol",
@@ -895,7 +955,7 @@ def update_candlestick_figure(symbol, timeframe, n_intervals):
         yaxis_title="Price",
         # height=450
     )
-    fig.update_xaxes(type="date", showspikes=True)
+    fig.update_xaxes(type="date", showspikes=True, rangeslider_visible=False)
     fig.update_yaxes(showgrid=True)
 
     return fig
@@ -903,32 +963,40 @@ def update_candlestick_figure(symbol, timeframe, n_intervals):
 # Large Transactions Monitoring Globals
 
 
-# Function to fetch the current Bitcoin price in USD
+# Current Bitcoin price in USD from the in-memory price feed (Binance ticker, CoinGecko fallback)
 def get_btc_price():
-    """Fetch the current Bitcoin price from CoinGecko API."""
-    url = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if 'bitcoin' in data and 'usd' in data['bitcoin']:
-                return data['bitcoin']['usd']
-            else:
-                #print("Error: 'bitcoin' or 'usd' not found in the response.")
-                return None
-        elif response.status_code == 429:
-            #print("Error: Rate limit exceeded (429).")
-            return None
-        else:
-            #print(f"Error: Failed to fetch data (Status code: {response.status_code})")
-            return None
-    except requests.RequestException as e:
-        #print(f"Error fetching BTC price: {e}")
-        return None
+    """Return the latest cached Bitcoin price (memory read, never blocks the WebSocket thread)."""
+    return btc_price_feed.get_price()
 
 # Function to analyze transactions and generate trading signals
-def analyze_transaction(input_addresses, output_addresses, btc_value, num_inputs, num_outputs):
-    """Analyze transaction characteristics and return a trading signal."""
+def analyze_transaction(input_addresses, output_addresses, btc_value, num_inputs, num_outputs, output_values=None):
+    """Analyze transaction characteristics and return a trading signal.
+
+    Labelled addresses (data_sources.address_labels) take precedence: funds moving into a known
+    exchange wallet are a deposit. A transaction spending from an exchange is classified by where
+    its value goes (``output_values`` align with ``output_addresses``; without them every output
+    weighs the same): a withdrawal when the non-exchange outputs carry most of it (the rest is
+    usually change back to the exchange), an internal transfer otherwise. The input/output count
+    heuristics below only apply when neither side is labelled.
+    """
+    labels = get_label_index()
+    from_exchange = labels.entities(input_addresses, address_labels.EXCHANGE)
+    out_labels = labels.lookup_many(output_addresses)
+    is_exchange = [bool(label) and label[1] == address_labels.EXCHANGE for label in out_labels]
+    to_exchange = list(dict.fromkeys(label[0] for label, hit in zip(out_labels, is_exchange) if hit))
+    if to_exchange and not from_exchange:
+        return f"Exchange Deposit ({', '.join(to_exchange)}) - Selling Pressure?"
+    if from_exchange:
+        weights = [1] * len(is_exchange) if output_values is None else output_values
+        total = sum(weights)
+        external = sum(weight for weight, hit in zip(weights, is_exchange) if not hit)
+        external_share = external / total if total > 0 else 0.0
+        if external_share > WITHDRAWAL_EXTERNAL_SHARE:
+            return f"Exchange Withdrawal ({', '.join(from_exchange)}) - Accumulation?"
+        return f"Exchange Internal Transfer ({', '.join(dict.fromkeys(from_exchange + to_exchange))})"
+    if labels.entities(input_addresses, address_labels.MINER):
+        return "Miner Outflow - Potential Sell-Off"
+
     signal = "Neutral"
     if btc_value > 1000 and num_inputs <= 2 and num_outputs <= 2:
         signal = "Whale Move - Potential HODL or Dump"
@@ -938,31 +1006,48 @@ def analyze_transaction(input_addresses, output_addresses, btc_value, num_inputs
         signal = "Distribution - Potential Sell-Off"
     return signal
 
-# WebSocket message handler
-def on_message(ws, message, threshold=50):
-    """Process incoming WebSocket messages and handle large transactions."""
+# Transaction message handler (runs in the ingest worker pool, not in the socket thread)
+def on_message(message, threshold=50):
+    """Process a raw WebSocket frame and handle large transactions."""
     #print("Received WebSocket message:", message)  # Debug print to check if messages are received
     if not global_monitoring_active[0]:  # Check global monitoring state
         return  # Skip processing if monitoring is not active
 
+    # Each frame is decoded once (orjson when installed) and every consumer reads the dict
     try:
-        data = json.loads(message)
-    except json.JSONDecodeError as e:
+        data = tx_prefilter.loads(message)
+    except ValueError as e:  # json.JSONDecodeError / orjson.JSONDecodeError
         #print(f"Error decoding JSON: {e}")
         return
 
-    if "x" not in data:  # Check if the message contains transaction data
+    tx = data.get("x") if isinstance(data, dict) else None
+    if not tx:  # not a transaction frame
         #print("No 'x' key in message:", data)
         return
+    summary = tx_prefilter.summary(tx)
+
+    # Every unconfirmed transaction goes to the mempool tape, not only the large ones
+    trade_tape.record_mempool_tx(
+        time_ms=(summary["time"] or int(datetime.now().timestamp())) * 1000,
+        value=summary["value"],
+        fee=summary["fee"],
+        size=summary["size"],
+        vin=summary["vin"],
+        vout=summary["vout"],
+    )
+    # ...and into the streaming mempool statistics (On-Chain → Tx Count/Volume)
+    mempool_stats.update(
+        summary["time"] or int(datetime.now().timestamp()),
+        summary["value"], summary["fee"], summary["size"], summary["vin"], summary["vout"],
+    )
+    active_addresses.add(tx_prefilter.addresses(tx), summary["time"])  # On-Chain → Active Addresses
+    coin_days.update(tx, summary["time"] or None)  # On-Chain → Dormancy
 
-    tx = data["x"]
+    if summary["value"] < threshold * 10**8:
+        return  # Skip transactions below the threshold
     tx_hash = tx.get("hash", "N/A")
-    tx_value = sum(out.get("value", 0) for out in tx.get("out", []))  # Total value in satoshis
-    btc_value = tx_value / 10**8  # Convert to BTC
+    btc_value = summary["value"] / 10**8  # Convert to BTC
     #print(f"Transaction value: {btc_value} BTC")  # Debug print
-    if btc_value < threshold:
-        #print(f"Transaction value {btc_value} BTC is below threshold {threshold} BTC")
-        return  # Skip transactions below the threshold
 
     # Check for special transactions (>1000 BTC) and create notification
     if btc_value > 1000:
@@ -983,7 +1068,9 @@ def on_message(ws, message, threshold=50):
     outputs = tx.get("out", [])
     input_addresses = [inp.get("prev_out", {}).get("addr", "N/A") for inp in inputs 
                        if "prev_out" in inp and "addr" in inp.get("prev_out", {}) and inp["prev_out"]["addr"] is not None]
-    output_addresses = [out.get("addr", "N/A") for out in outputs if "addr" in out and out["addr"] is not None]
+    labelled_outputs = [out for out in outputs if out.get("addr") is not None]
+    output_addresses = [out["addr"] for out in labelled_outputs]
+    output_values = [out.get("value", 0) for out in labelled_outputs]
     num_inputs = len(inputs)
     num_outputs = len(outputs)
     tx_size = tx.get("size", 0)
@@ -1017,33 +1104,21 @@ def on_message(ws, message, threshold=50):
     output_display = ', '.join(output_addresses[:3]) if output_addresses else "No addresses"
     
     # Generate trading signal
-    signal = analyze_transaction(input_addresses, output_addresses, btc_value, num_inputs, num_outputs)
-
-    # Create transaction data dictionary
-    tx_data = {
-        "Time (Germany)": tx_time,  # Store as datetime object for chart
-        "Time (Germany) Str": tx_time_str,  # Store string version for table
-        "Value": btc_value,
-        "Trading Signal": signal,
-        "Num Inputs": num_inputs,
-        "Num Outputs": num_outputs,
-        #"Fee (satoshis)": tx_fee,
-        #"Fee per Byte": round(fee_per_byte, 2),
-        #"TX Hash": tx_hash,
-    }
-
-    # Append data to shared list with thread safety
-    with tx_data_lock:
-        tx_data_list.append(tx_data)
-        #print(f"Added transaction to list: {tx_data}")  # Debug print
-        # Limit the size of tx_data_list to prevent memory issues
-        if len(tx_data_list) > 100:
-            tx_data_list[:] = tx_data_list[-100:]
-
-# WebSocket error handler
-def on_error(ws, error):
-    """Handle WebSocket errors."""
-    #print(f"WebSocket Error: {error}")
+    signal = analyze_transaction(input_addresses, output_addresses, btc_value, num_inputs, num_outputs,
+                                 output_values)
+
+    # Persist the transaction (indexed by time, value and signal)
+    get_large_tx_store().insert(
+        tx_hash=tx_hash if tx_hash != "N/A" else None,
+        time_ms=int(tx_time.timestamp() * 1000),
+        value_btc=btc_value,
+        signal=signal,
+        usd_value=usd_value if usd_value != "N/A" else None,
+        num_inputs=num_inputs,
+        num_outputs=num_outputs,
+        fee_sat=tx_fee,
+        size_bytes=tx_size,
+    )
 
 # WebSocket open handler
 def on_open(ws):
@@ -1051,21 +1126,24 @@ def on_open(ws):
     #print("WebSocket connection opened")
     ws.send(json.dumps({"op": "unconfirmed_sub"}))
 
-# Start the WebSocket monitoring in a background thread
+# Start the WebSocket monitoring in background threads
 def start_monitoring():
-    """Start monitoring unconfirmed Bitcoin transactions in a background thread."""
-    def run_websocket():
-        ws = websocket.WebSocketApp(
-            "wss://ws.blockchain.info/inv",  # Try the original API
-            on_message=lambda ws, message: on_message(ws, message, threshold=50),
-            on_error=on_error,
-            on_open=on_open
-        )
-        ws.run_forever()
+    """Start monitoring unconfirmed Bitcoin transactions.
 
-    thread = Thread(target=run_websocket)
-    thread.daemon = True  # Thread will terminate when the main program exits
-    thread.start()
+    The socket reader only enqueues raw frames into a bounded drop-oldest queue;
+    parsing and enrichment run in a worker pool. Reconnects use exponential backoff.
+    """
+    btc_price_feed.start()
+    Thread(target=get_label_index, daemon=True).start()  # load address labels off the request path
+    start_stream(
+        TX_STREAM_NAME,
+        "wss://ws.blockchain.info/inv",
+        handler=lambda message: on_message(message, threshold=50),
+        on_open=on_open,
+        workers=TX_STREAM_WORKERS,
+        maxsize=TX_STREAM_QUEUE_SIZE,
+        accept=lambda: global_monitoring_active[0],  # skip enqueueing while monitoring is off
+    )
 
 # Start monitoring when the module is loaded
 start_monitoring()
@@ -1122,10 +1200,11 @@ def update_notifications(n_intervals_notification, n_intervals_update):
     Input("large-transactions-store", "data"),
     Input("signal-symbol-dropdown", "value"),
     Input("threshold-input", "value"),
+    Input("large-tx-window-dropdown", "value"),
     allow_duplicate=True
 )
-
-def display_large_transactions_and_chart(store_data, selected_symbol_full, threshold):
+@metrics.instrument()
+def display_large_transactions_and_chart(store_data, selected_symbol_full, threshold, window):
     #print("Updating table and chart...")  # Debug print
     if not store_data:
         return html.Div("No data available in store."), {}, "Error: Store data is empty."
@@ -1135,25 +1214,28 @@ def display_large_transactions_and_chart(store_data, selected_symbol_full, thres
     if base_symbol != 'BTC':  # Placeholder for future expansion
         return html.Div(f"Large transactions monitoring not yet supported for {base_symbol}.", style={'color': '#888888'}), {}, ""
 
-    transactions = store_data.get("transactions", [])
-    #print(f"Transactions in store: {transactions}")  # Debug print
-    if not transactions:
+    if not store_data.get("last_id"):
         return html.Div("No large transactions detected yet.", style={'color': '#888888'}), {}, "No transactions detected."
 
-    # Filter transactions based on the user-defined threshold
+    # Threshold and time window are applied in SQL (indexed on time / value)
     if threshold is None or threshold < 1:
         threshold = 50  # Default threshold if invalid input
-    filtered_transactions = [tx for tx in transactions if tx["Value"] >= threshold]
-    #print(f"Filtered transactions: {filtered_transactions}")  # Debug print
+    with metrics.stage("fetch"):
+        rows = get_large_tx_store().query_window(LARGE_TX_WINDOWS.get(window, 86400), min_value=threshold)
 
-    if not filtered_transactions:
+    if rows.empty:
         return html.Div(f"No transactions above {threshold} BTC detected.", style={'color': '#888888'}), {}, f"No transactions above {threshold} BTC."
 
-    # Create table (use string version of time for display)
-    df_table = pd.DataFrame(filtered_transactions)
-    df_table['Time (Germany)'] = df_table['Time (Germany) Str']  # Use string version for table
-    df_table = df_table.drop(columns=['Time (Germany) Str'])  # Drop the string column after use
-    df_table = df_table.drop_duplicates(subset=['Time (Germany)', 'Value'])
+    rows["Time (Germany)"] = (pd.to_datetime(rows["time_ms"], unit="ms", utc=True)
+                              .dt.tz_convert("Europe/Berlin"))
+    filtered_transactions = rows.rename(columns={
+        "value_btc": "Value", "signal": "Trading Signal",
+        "num_inputs": "Num Inputs", "num_outputs": "Num Outputs",
+    })[["Time (Germany)", "Value", "Trading Signal", "Num Inputs", "Num Outputs"]]
+
+    # Create table (newest first, string version of time for display)
+    df_table = filtered_transactions.iloc[::-1].head(LARGE_TX_TABLE_ROWS).copy()
+    df_table['Time (Germany)'] = df_table['Time (Germany)'].dt.strftime("%Y-%m-%d %H:%M:%S %Z")
 
 
     table = dash_table.DataTable(
@@ -1197,6 +1279,11 @@ def display_large_transactions_and_chart(store_data, selected_symbol_full, thres
                 'backgroundColor': '#ffcc00',  # Yellow for exchange deposits
                 'color': '#000000'
             },
+            {
+                'if': {'filter_query': '{Trading Signal} contains "Exchange Withdrawal"'},
+                'backgroundColor': '#0ECB81',  # Green for exchange withdrawals
+                'color': '#000000'
+            },
             {
                 'if': {'filter_query': '{Trading Signal} contains "Distribution"'},
                 'backgroundColor': '#ff5722',  # Orange for distribution
@@ -1207,9 +1294,7 @@ def display_large_transactions_and_chart(store_data, selected_symbol_full, thres
 
     # Create scatter line chart
     try:
-        df_chart = pd.DataFrame(filtered_transactions)
-        # Ensure time is in datetime format
-        df_chart['Time (Germany)'] = pd.to_datetime(df_chart['Time (Germany)'], errors='coerce')
+        df_chart = filtered_transactions
         #print(f"Chart times: {df_chart['Time (Germany)'].tolist()}")  # Debug print
         # Drop rows with invalid dates
         df_valid = df_chart.dropna(subset=['Time (Germany)'])
@@ -1284,28 +1369,21 @@ def display_large_transactions_and_chart(store_data, selected_symbol_full, thres
     allow_duplicate=True
 )
 def update_store(n_intervals, threshold, store_data):
-    #print("Updating store...")  # Debug print
+    """Keep only a change marker in the browser; transactions themselves are queried from SQLite."""
     if threshold is None or threshold < 1:
         threshold = 50  # Default threshold if invalid input
 
-    # Fetch new transactions
-    new_data = []
-    with tx_data_lock:
-        new_data = tx_data_list.copy()
-        #tx_data_list.clear()  # Not clearing to retain transactions across tab switches
-        #print(f"New data fetched: {new_data}")  # Debug print
-
-    # Filter new transactions based on the threshold
-    new_data = [tx for tx in new_data if tx["Value"] >= threshold]
-
-    current_transactions = store_data.get("transactions", [])
-    all_transactions = current_transactions + new_data
-    updated_transactions = all_transactions[-10:]  # Keep only the last 10 transactions for the table
+    last_id = get_large_tx_store().last_id()
+    bucket = int(datetime.now().timestamp() // LARGE_TX_REFRESH_BUCKET_SECONDS)
+    store_data = store_data or {}
+    if (store_data.get("last_id") == last_id and store_data.get("threshold") == threshold
+            and store_data.get("bucket") == bucket):
+        raise PreventUpdate  # nothing new: skip re-rendering the table and chart
 
-    # Return full all_transactions so chart can use complete history (mirrors standalone page behavior)
     return {
-        "transactions": all_transactions,
-        "threshold": threshold
+        "last_id": last_id,
+        "threshold": threshold,
+        "bucket": bucket,
     }
 
 
@@ -6,13 +6,21 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.graph_objs as go
 from datetime import datetime, timedelta
+from threading import Lock
+import time
 
 from src.layout import generate_custom_table
 from utils.binance_data import get_recent_trades, get_processed_trade_data
 
-from config.settings import default_symbols
+from config.settings import default_symbols, trade_history_retention_minutes
+from utils.ring_buffer import TimeSeriesRingBuffer
+from analytics import volume_profile
+from data_sources import trade_tape
 plots_height = 400
 large_trade_value = 100000
+UPDATE_INTERVAL_MS = 5 * 1000
+heatmap_bins = 30   # max price levels shown (adjacent fixed buckets are merged)
+vpvr_bins = 60
 dash.register_page(__name__, path="/transactions")
 
 # Select Symbols in setting in config
@@ -44,7 +52,7 @@ layout = html.Div([
         dcc.Store(id='large-trades-store', data=[]),
         
         # for trades
-        dcc.Interval(id='update-interval', interval = 5 * 1000, n_intervals=0) 
+        dcc.Interval(id='update-interval', interval = UPDATE_INTERVAL_MS, n_intervals=0) 
         
 
     ], fluid=True)
@@ -103,8 +111,8 @@ def update_tables(n, selected_symbols):
         chart2 = create_buy_sell_chart(buy_trades, sell_trades, symbol)
         chart3 = create_line_chart(buy_volumes, sell_volumes, symbol)
         # chart4 = create_bubble_chart(df, symbol)
-        chart4 = create_heatmap(df, symbol)
-        # chart5 = create_heatmap(df, symbol)
+        chart4 = create_heatmap(symbol)
+        chart5 = create_vpvr_chart(symbol)
 
         # ...
         row = html.Div([
@@ -132,7 +140,9 @@ def update_tables(n, selected_symbols):
                 dbc.Col([
                     chart3,
                     html.Br(),
-                    chart4
+                    chart4,
+                    html.Br(),
+                    chart5
                 ], xs=12, sm=12, md=6, lg=4),
             ], className="g-12 justify-content-center"),
         ], className="mb-5")
@@ -144,16 +154,33 @@ def update_tables(n, selected_symbols):
 
 
 # تاریخچه معاملات برای ذخیره اطلاعات خرید و فروش
-trade_history = []
+# One bounded ring buffer per symbol: one row per refresh, rows older than the retention window are dropped
+TRADE_HISTORY_RETENTION_SECONDS = trade_history_retention_minutes * 60
+TRADE_HISTORY_CAPACITY = TRADE_HISTORY_RETENTION_SECONDS * 1000 // UPDATE_INTERVAL_MS + 1
+trade_history = {}
+trade_history_lock = Lock()
+
+
+def get_trade_history(symbol):
+    """Return (creating on first use) the buy/sell volume ring buffer of a symbol."""
+    buffer = trade_history.get(symbol)
+    if buffer is None:
+        buffer = trade_history[symbol] = TimeSeriesRingBuffer(
+            columns=['buy_volume', 'sell_volume'],
+            capacity=TRADE_HISTORY_CAPACITY,
+            retention_seconds=TRADE_HISTORY_RETENTION_SECONDS,
+        )
+    return buffer
 
-def prepare_plot_data(symbol):
-    global trade_history
 
+def prepare_plot_data(symbol):
     # دریافت داده‌ها
     trades = get_recent_trades(symbol)
 
     if not trades:
-        return None, None, None, None, None
+        return None, None, None, None, None, None
+
+    trade_tape.record_trades(symbol, trades)
 
     df = pd.DataFrame(trades)
     df['timestamp'] = pd.to_datetime(df['time'], unit='ms')
@@ -161,6 +188,9 @@ def prepare_plot_data(symbol):
     df['price'] = pd.to_numeric(df['price'], errors='coerce')
     df['direction'] = df['isBuyerMaker'].map({True: '🔴 Sell', False: '🟢 Buy '})
 
+    # Streaming volume profile: only trades newer than the last seen id are added
+    volume_profile.update_from_trades(symbol, trades)
+
     # محاسبه حجم خرید و فروش
     buy_trades = df[df['isBuyerMaker'] == False]  # خریداران
     sell_trades = df[df['isBuyerMaker'] == True]  # فروشندگان
@@ -173,13 +203,19 @@ def prepare_plot_data(symbol):
     # جمع‌آوری اطلاعات خرید و فروش به تاریخچه
     buy_volume = buy_volumes.sum()
     sell_volume = sell_volumes.sum()
-    timestamp = pd.Timestamp.now()
 
-    trade_history.append({'timestamp': timestamp, 'buy_volume': buy_volume, 'sell_volume': sell_volume})
+    with trade_history_lock:
+        history = get_trade_history(symbol)
+        history.append(time.time(), (buy_volume, sell_volume))
+        timestamps, volumes = (a.copy() for a in history.arrays())
 
-    # ساختن DataFrame برای نسبت خرید به فروش
-    df_ratio = pd.DataFrame(trade_history)
-    df_ratio['buy_sell_ratio'] = df_ratio['buy_volume'] / (df_ratio['sell_volume'] + 1e-6)  # جلوگیری از تقسیم بر صفر
+    # ساختن DataFrame برای نسبت خرید به فروش (vectorized over the whole window)
+    df_ratio = pd.DataFrame({
+        'timestamp': pd.to_datetime(timestamps, unit='s'),
+        'buy_volume': volumes[:, 0],
+        'sell_volume': volumes[:, 1],
+    })
+    df_ratio['buy_sell_ratio'] = volumes[:, 0] / (volumes[:, 1] + 1e-6)  # جلوگیری از تقسیم بر صفر
 
     return buy_volumes, sell_volumes, df, buy_trades, sell_trades, df_ratio
 
@@ -320,33 +356,20 @@ def create_bubble_chart(df, symbol):
     )
 
 
-def create_heatmap(df, symbol):
-    # from prepae data func
-    if df is None or df.empty:
-        return html.Div("No data available for heatmap.")
+def create_heatmap(symbol):
+    # Reads the streaming volume profile (fixed tick-size buckets, decayed over time)
+    profile = volume_profile.get_volume_profile(symbol)
+    with profile.lock:
+        levels, buy, sell = profile.profile(bins=heatmap_bins)
 
-    df['PriceBucket'] = pd.cut(df['price'], bins=30)
-
-    # گروه‌بندی برای خرید و فروش
-    heatmap_data = df.groupby(['PriceBucket', 'direction'])['qty'].sum().unstack(fill_value=0).reset_index()
-
-    # مقدار میانه‌ی هر سطل قیمت برای محور X
-    heatmap_data['price'] = heatmap_data['PriceBucket'].apply(lambda x: x.mid)
-
-    # استخراج داده‌ها برای Heatmap
-    buy_col = '🟢 Buy ' if '🟢 Buy ' in heatmap_data.columns else heatmap_data.columns[1]
-    sell_col = '🔴 Sell' if '🔴 Sell' in heatmap_data.columns else heatmap_data.columns[2]
-
-    z_data = [
-        heatmap_data[buy_col].values,
-        heatmap_data[sell_col].values
-    ]
+    if levels.size == 0:
+        return html.Div("No data available for heatmap.")
 
     fig = go.Figure(data=[
         go.Heatmap(
-            x=heatmap_data['price'],
+            x=levels,
             y=['Buy', 'Sell'],
-            z=z_data,
+            z=[buy, sell],
             colorscale='Viridis'
         )
     ])
@@ -370,6 +393,43 @@ def create_heatmap(df, symbol):
                      id=f"heatmap-{symbol}")
 
 
+def create_vpvr_chart(symbol):
+    # Volume profile (VPVR): horizontal buy/sell volume per price level from the streaming profile
+    profile = volume_profile.get_volume_profile(symbol)
+    with profile.lock:
+        levels, buy, sell = profile.profile(bins=vpvr_bins)
+        poc = profile.point_of_control()
+
+    if levels.size == 0:
+        return html.Div("No data available for volume profile.")
+
+    fig = go.Figure(data=[
+        go.Bar(y=levels, x=buy, orientation='h', name='Buy', marker_color='#00C176'),
+        go.Bar(y=levels, x=sell, orientation='h', name='Sell', marker_color='#F6465D'),
+    ])
+    if poc is not None:
+        fig.add_hline(y=poc, line_dash='dash', line_color='#38bdf8',
+                      annotation_text='POC', annotation_font_color='#38bdf8')
+
+    fig.update_layout(
+        title=f'Volume Profile (VPVR) for {symbol}',
+        xaxis_title='Volume',
+        yaxis_title='Price',
+        barmode='stack',
+        bargap=0,
+        height=plots_height,
+        plot_bgcolor='#1e1e2f',
+        paper_bgcolor='#1e1e2f',
+        font=dict(color='#ffffff'),
+    )
+    fig.update_xaxes(showgrid=True, gridcolor='#333', color='#ffffff')
+    fig.update_yaxes(showgrid=True, gridcolor='#333', color='#ffffff')
+
+    return dcc.Graph(style={'height': '400px', 'width': '800px', 'maxWidth': '100%'},
+                     figure=fig,
+                     id=f"vpvr-{symbol}")
+
+
 def create_buy_sell_chart(buy_data, sell_data, symbol):
     # Calculate total buy and sell volumes
     buy_volume = buy_data['qty'].sum()
@@ -438,6 +498,7 @@ def detect_large_trades(n, selected_symbols, existing_data):
 
     for symbol in selected_symbols:
         trades = get_recent_trades(symbol)  
+        trade_tape.record_trades(symbol, trades)
 
         for trade in trades:
             trade_value = float(trade['price']) * float(trade['qty'])
@@ -7,7 +7,7 @@ import dash_bootstrap_components as dbc
 from dash import html
 from config.settings import tabs
 
-+
+
 def generate_nav_links(collapsed):
     return [
         dbc.NavLink(
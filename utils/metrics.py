@@ -0,0 +1,256 @@
+# utils/metrics.py
+# Lightweight per-callback instrumentation for the Dash app.
+# Records wall time histograms, fetch / compute / serialization split,
+# response payload size and exception counts, and renders them in the
+# Prometheus text format (served on /metrics) or as rows for the Diagnostics page.
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+from plotly.utils import PlotlyJSONEncoder
+
+# Histogram upper bounds in seconds (Prometheus "le" labels)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGES = ("fetch", "compute", "serialize")
+# Re-encoding a result to measure it costs about as much as Dash's own serialization, so only
+# every Nth call (and the first) is measured; the calls in between reuse the latest sample
+PAYLOAD_SAMPLE_EVERY = 10
+
+_lock = threading.Lock()
+_stats = {}
+_local = threading.local()
+# Extra metric sources (e.g. stream queues): callables returning
+# [(metric_name, type, help, [(labels_dict, value), ...]), ...]
+_collectors = []
+
+
+class CallbackStats:
+    """Accumulated counters for a single callback."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.payload_bytes_total = 0
+        self.last_payload_bytes = 0
+        self.last_serialize_seconds = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.last_seconds = seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Estimate a latency quantile (seconds) from the histogram buckets."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, n in zip(LATENCY_BUCKETS, self.bucket_counts):
+            if n and cumulative + n >= target:
+                # linear interpolation inside the bucket
+                return min(lower + (bound - lower) * (target - cumulative) / n, self.max_seconds)
+            cumulative += n
+            lower = bound
+        return self.max_seconds
+
+
+def _get_stats(name):
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = CallbackStats()
+    return stats
+
+
+@contextmanager
+def stage(name="fetch"):
+    """Attribute the time spent inside the block to a stage of the running callback.
+
+    Usage inside an instrumented callback:
+        with metrics.stage("fetch"):
+            trades = get_recent_trades(symbol)
+    Outside an instrumented callback this is a no-op timer.
+    """
+    timings = getattr(_local, "timings", None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def register_collector(collector):
+    """Add a callable whose metrics are appended to the /metrics output."""
+    _collectors.append(collector)
+
+
+def _render_collectors():
+    lines = []
+    for collector in list(_collectors):
+        for metric_name, metric_type, help_text, samples in collector():
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{metric_name}{{{label_str}}} {_fmt(value)}")
+    return lines
+
+
+def payload_size(result):
+    """Serialize a callback result the way Dash does and return its size in bytes."""
+    try:
+        return len(json.dumps(result, cls=PlotlyJSONEncoder).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def instrument(name=None):
+    """Decorator recording latency, stage split, payload size and errors of a callback.
+
+    Payload size and serialization time are measured on every PAYLOAD_SAMPLE_EVERY-th call and
+    carried forward in between. Place it *below* @callback so Dash registers the wrapped function.
+    """
+    def decorator(func):
+        callback_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = getattr(_local, "timings", None)
+            timings = _local.timings = {}
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except PreventUpdate:
+                raise
+            except Exception:
+                elapsed = time.perf_counter() - start
+                fetch_seconds = timings.get("fetch", 0.0)
+                with _lock:
+                    stats = _get_stats(callback_name)
+                    stats.errors += 1
+                    stats.observe(elapsed)
+                    stats.stage_seconds["fetch"] += fetch_seconds
+                    stats.stage_seconds["compute"] += max(elapsed - fetch_seconds, 0.0)
+                raise
+            finally:
+                _local.timings = previous
+
+            body_end = time.perf_counter()
+            with _lock:
+                stats = _get_stats(callback_name)
+                sample = stats.count % PAYLOAD_SAMPLE_EVERY == 0
+            if sample:
+                size = payload_size(result)
+                serialize_seconds = time.perf_counter() - body_end
+            fetch_seconds = timings.get("fetch", 0.0)
+            compute_seconds = max(body_end - start - fetch_seconds, 0.0)
+
+            with _lock:
+                if sample:
+                    stats.last_payload_bytes = size
+                    stats.last_serialize_seconds = serialize_seconds
+                size, serialize_seconds = stats.last_payload_bytes, stats.last_serialize_seconds
+                stats.observe(body_end - start + serialize_seconds)
+                stats.stage_seconds["fetch"] += fetch_seconds
+                stats.stage_seconds["compute"] += compute_seconds
+                stats.stage_seconds["serialize"] += serialize_seconds
+                stats.payload_bytes_total += size
+            return result
+
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Return one summary dict per instrumented callback (for the Diagnostics page)."""
+    rows = []
+    with _lock:
+        for name, s in sorted(_stats.items()):
+            calls = max(s.count, 1)
+            rows.append({
+                "Callback": name,
+                "Calls": s.count,
+                "Errors": s.errors,
+                "Avg (ms)": round(1000 * s.total_seconds / calls, 1),
+                "p50 (ms)": round(1000 * s.quantile(0.5), 1),
+                "p95 (ms)": round(1000 * s.quantile(0.95), 1),
+                "Max (ms)": round(1000 * s.max_seconds, 1),
+                "Fetch (ms)": round(1000 * s.stage_seconds["fetch"] / calls, 1),
+                "Compute (ms)": round(1000 * s.stage_seconds["compute"] / calls, 1),
+                "Serialize (ms)": round(1000 * s.stage_seconds["serialize"] / calls, 1),
+                "Last Payload (KB)": round(s.last_payload_bytes / 1024, 1),
+                "Avg Payload (KB)": round(s.payload_bytes_total / calls / 1024, 1),
+            })
+    return rows
+
+
+def _fmt(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Render all collected metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP dash_callback_duration_seconds Wall time of Dash callbacks including serialization.",
+        "# TYPE dash_callback_duration_seconds histogram",
+    ]
+    with _lock:
+        items = sorted(_stats.items())
+        for name, s in items:
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, s.bucket_counts):
+                cumulative += n
+                lines.append(f'dash_callback_duration_seconds_bucket{{callback="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'dash_callback_duration_seconds_bucket{{callback="{name}",le="+Inf"}} {s.count}')
+            lines.append(f'dash_callback_duration_seconds_sum{{callback="{name}"}} {_fmt(s.total_seconds)}')
+            lines.append(f'dash_callback_duration_seconds_count{{callback="{name}"}} {s.count}')
+
+        lines += [
+            "# HELP dash_callback_stage_seconds_total Time spent per callback stage (fetch, compute, serialize).",
+            "# TYPE dash_callback_stage_seconds_total counter",
+        ]
+        for name, s in items:
+            for stage_name in STAGES:
+                lines.append(
+                    f'dash_callback_stage_seconds_total{{callback="{name}",stage="{stage_name}"}} '
+                    f'{_fmt(s.stage_seconds[stage_name])}'
+                )
+
+        lines += [
+            "# HELP dash_callback_payload_bytes_total Serialized response bytes returned by callbacks.",
+            "# TYPE dash_callback_payload_bytes_total counter",
+        ]
+        for name, s in items:
+            lines.append(f'dash_callback_payload_bytes_total{{callback="{name}"}} {s.payload_bytes_total}')
+
+        lines += [
+            "# HELP dash_callback_last_payload_bytes Size of the most recent callback response.",
+            "# TYPE dash_callback_last_payload_bytes gauge",
+        ]
+        for name, s in items:
+            lines.append(f'dash_callback_last_payload_bytes{{callback="{name}"}} {s.last_payload_bytes}')
+
+        lines += [
+            "# HELP dash_callback_exceptions_total Exceptions raised by callbacks.",
+            "# TYPE dash_callback_exceptions_total counter",
+        ]
+        for name, s in items:
+            lines.append(f'dash_callback_exceptions_total{{callback="{name}"}} {s.errors}')
+
+    lines += _render_collectors()
+    return "\n".join(lines) + "\n"
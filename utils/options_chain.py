@@ -0,0 +1,304 @@
+# utils/options_chain.py
+# One cached, timestamped options chain snapshot per underlying (Binance European options).
+#
+# The Options page used to re-download the chain for every control change (expiry list, all
+# expiries analysis, single expiry table). Now the chain is fetched once per underlying into a
+# ChainSnapshot (one row per contract) that every view slices by expiry / call-put. Reads are
+# stale-while-revalidate: a fresh snapshot is returned as is, a stale one is returned while one
+# background refresh runs, and only a missing snapshot blocks.
+#
+# Refreshes are diffed against the previous snapshot: the version only moves when a contract
+# was added, removed or changed, or the index price moved (every contract's greeks depend on
+# spot, so that marks them all changed), and ``changed`` lists the contracts that did. Anything
+# derived from a snapshot is memoized per version (``memoize``), and per-contract derived columns
+# (``derive``) are only recomputed for the changed contracts. Greeks and fits also age with time
+# to expiry, so derived values older than DERIVED_MAX_AGE_SECONDS are recomputed in full.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+import requests
+
+from utils import metrics
+from config.settings import options_chain_ttl_seconds
+
+EAPI_URL = "https://eapi.binance.com/eapi/v1"
+REQUEST_TIMEOUT = 10
+# Contract listings change at most a few times a day
+EXCHANGE_INFO_TTL_SECONDS = 15 * 60
+OPEN_INTEREST_WORKERS = 4
+# Memoized / derived values depend on time to expiry; recompute them in full after this long
+DERIVED_MAX_AGE_SECONDS = 60
+VALUE_COLUMNS = [
+    "mark_price", "mark_iv", "bid_iv", "ask_iv", "delta", "gamma", "vega", "theta",
+    "last_price", "bid", "ask", "volume", "open_interest",
+]
+
+
+def _get(session, path, **params):
+    response = session.get(f"{EAPI_URL}/{path}", params=params or None, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+class ChainSnapshot:
+    """Options chain of one underlying at ``fetched_at``; ``frame`` is indexed by contract symbol."""
+
+    __slots__ = ("underlying", "frame", "index_price", "fetched_at", "version", "changed", "removed")
+
+    def __init__(self, underlying, frame, index_price, fetched_at, version=1, changed=None, removed=()):
+        self.underlying = underlying
+        self.frame = frame
+        self.index_price = index_price
+        self.fetched_at = fetched_at
+        self.version = version
+        self.changed = frame.index if changed is None else changed
+        self.removed = pd.Index(removed)
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def expiries(self):
+        """Expiry dates (YYMMDD) sorted by expiry time."""
+        if self.frame.empty:
+            return []
+        return self.frame.sort_values("expiry_ts")["expiry"].drop_duplicates().tolist()
+
+    def slice(self, expiry=None, side=None):
+        """Contracts of one expiry and / or side ("C" / "P"), sorted by strike."""
+        frame = self.frame
+        mask = np.ones(len(frame), dtype=bool)
+        if expiry is not None:
+            mask &= (frame["expiry"] == str(expiry)).to_numpy()
+        if side is not None:
+            mask &= (frame["side"] == side).to_numpy()
+        return frame[mask].sort_values("strike")
+
+
+class OptionsChainCache:
+    """Per-underlying chain snapshots with diffed refreshes and per-version memoization."""
+
+    def __init__(self, ttl=options_chain_ttl_seconds, session=None):
+        self.ttl = ttl
+        self.session = session or requests.Session()
+        self._snapshots = {}
+        self._memo = {}        # (underlying, key) -> (version, computed_at, value)
+        self._derived = {}     # (underlying, name) -> (version, computed_at, DataFrame)
+        self._refreshing = set()
+        self._fetch_locks = {}
+        self._exchange_info = (0.0, None)
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="options-chain")
+        self.fetches = self.errors = 0
+        self.last_fetch_seconds = {}
+        self.last_changed = {}
+
+    # ---------------------------------------------------------------- public
+    def get(self, underlying):
+        """Current snapshot of ``underlying`` (stale-while-revalidate)."""
+        with self._lock:
+            snapshot = self._snapshots.get(underlying)
+        if snapshot is None:
+            return self.refresh(underlying)
+        if snapshot.age() > self.ttl:
+            self._refresh_in_background(underlying)
+        return snapshot
+
+    def peek(self, underlying):
+        with self._lock:
+            return self._snapshots.get(underlying)
+
+    def refresh(self, underlying):
+        """Fetch the chain now (blocking), diff it against the previous snapshot and store it."""
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(underlying, Lock())
+        with fetch_lock:
+            started = time.monotonic()
+            try:
+                frame, index_price = self._fetch(underlying)
+            except Exception:
+                self.errors += 1
+                raise
+            self.fetches += 1
+            self.last_fetch_seconds[underlying] = time.monotonic() - started
+            with self._lock:
+                previous = self._snapshots.get(underlying)
+                snapshot = self._diff(underlying, previous, frame, index_price)
+                self._snapshots[underlying] = snapshot
+                # drop memoized values of older versions
+                for key in [k for k, (version, _, _) in self._memo.items()
+                            if k[0] == underlying and version != snapshot.version]:
+                    del self._memo[key]
+            self.last_changed[underlying] = len(snapshot.changed)
+            return snapshot
+
+    def memoize(self, snapshot, key, compute):
+        """``compute()`` once per snapshot version (e.g. an analysis of the whole chain)."""
+        memo_key = (snapshot.underlying, key)
+        with self._lock:
+            cached = self._memo.get(memo_key)
+        if cached is not None and cached[0] == snapshot.version and self._young(cached[1]):
+            return cached[2]
+        value = compute()
+        with self._lock:
+            self._memo[memo_key] = (snapshot.version, time.time(), value)
+        return value
+
+    def derive(self, snapshot, name, compute):
+        """Per-contract derived columns, recomputed only for contracts changed since last time.
+
+        ``compute(frame)`` gets a subset of ``snapshot.frame`` and returns a DataFrame with the
+        same index. The full result is reused unchanged while the version does not move, and
+        recomputed in full once it is older than DERIVED_MAX_AGE_SECONDS.
+        """
+        derived_key = (snapshot.underlying, name)
+        with self._lock:
+            cached = self._derived.get(derived_key)
+        if cached is not None and not self._young(cached[1]):
+            cached = None
+        if cached is not None and cached[0] == snapshot.version:
+            return cached[2]
+        computed_at = time.time()
+        if cached is not None and cached[0] == snapshot.version - 1:
+            changed = snapshot.frame.index.intersection(snapshot.changed)
+            kept = cached[2].loc[cached[2].index.intersection(snapshot.frame.index.difference(changed))]
+            result = pd.concat([kept, compute(snapshot.frame.loc[changed])]) if len(changed) else kept
+            result = result.reindex(snapshot.frame.index)
+            computed_at = cached[1]  # the kept rows are as old as the cached result
+        else:
+            result = compute(snapshot.frame)
+        with self._lock:
+            self._derived[derived_key] = (snapshot.version, computed_at, result)
+        return result
+
+    # ---------------------------------------------------------------- internals
+    @staticmethod
+    def _young(computed_at):
+        return time.time() - computed_at <= DERIVED_MAX_AGE_SECONDS
+
+    def _refresh_in_background(self, underlying):
+        with self._lock:
+            if underlying in self._refreshing:
+                return
+            self._refreshing.add(underlying)
+
+        def run():
+            try:
+                self.refresh(underlying)
+            except Exception:
+                pass  # keep serving the stale snapshot
+            finally:
+                with self._lock:
+                    self._refreshing.discard(underlying)
+
+        self._executor.submit(run)
+
+    def _diff(self, underlying, previous, frame, index_price):
+        now = time.time()
+        if previous is None:
+            return ChainSnapshot(underlying, frame, index_price, now)
+        old = previous.frame.reindex(frame.index)[VALUE_COLUMNS]
+        new = frame[VALUE_COLUMNS]
+        same = (old == new) | (old.isna() & new.isna())
+        changed = frame.index[~same.all(axis=1).to_numpy()]
+        if index_price != previous.index_price:
+            changed = frame.index  # greeks of every contract depend on spot
+        removed = previous.frame.index.difference(frame.index)
+        version = previous.version + 1 if len(changed) or len(removed) else previous.version
+        return ChainSnapshot(underlying, frame, index_price, now, version,
+                             changed if version != previous.version else previous.changed,
+                             removed if version != previous.version else previous.removed)
+
+    def _contracts(self, underlying):
+        """Listed contracts of ``underlying`` from exchangeInfo (cached across underlyings)."""
+        with self._lock:
+            fetched_at, info = self._exchange_info
+        if info is None or time.time() - fetched_at > EXCHANGE_INFO_TTL_SECONDS:
+            info = pd.DataFrame(_get(self.session, "exchangeInfo").get("optionSymbols", []))
+            with self._lock:
+                self._exchange_info = (time.time(), info)
+        if info.empty:
+            return info
+        return info[info["underlying"] == f"{underlying}USDT"]
+
+    def _fetch(self, underlying):
+        contracts = self._contracts(underlying)
+        if contracts.empty:
+            return pd.DataFrame(columns=["expiry", "expiry_ts", "side", "strike"] + VALUE_COLUMNS), None
+
+        frame = pd.DataFrame({
+            "expiry": contracts["symbol"].str.split("-").str[1].to_numpy(),
+            "expiry_ts": contracts["expiryDate"].astype("int64").to_numpy(),
+            "side": np.where(contracts["side"] == "CALL", "C", "P"),
+            "strike": contracts["strikePrice"].astype(float).to_numpy(),
+        }, index=pd.Index(contracts["symbol"].to_numpy(), name="symbol"))
+
+        prefix = f"{underlying}-"
+        mark = pd.DataFrame(_get(self.session, "mark"))
+        mark = mark[mark["symbol"].str.startswith(prefix)].set_index("symbol")
+        ticker = pd.DataFrame(_get(self.session, "ticker"))
+        ticker = ticker[ticker["symbol"].str.startswith(prefix)].set_index("symbol")
+        columns = {
+            "mark_price": mark.get("markPrice"), "mark_iv": mark.get("markIV"),
+            "bid_iv": mark.get("bidIV"), "ask_iv": mark.get("askIV"),
+            "delta": mark.get("delta"), "gamma": mark.get("gamma"),
+            "vega": mark.get("vega"), "theta": mark.get("theta"),
+            "last_price": ticker.get("lastPrice"), "bid": ticker.get("bidPrice"),
+            "ask": ticker.get("askPrice"), "volume": ticker.get("volume"),
+        }
+        for name, values in columns.items():
+            frame[name] = pd.to_numeric(values, errors="coerce").reindex(frame.index) if values is not None else np.nan
+
+        def open_interest(expiry):
+            rows = _get(self.session, "openInterest", underlyingAsset=underlying, expiration=expiry)
+            return {row["symbol"]: float(row["sumOpenInterest"]) for row in rows}
+
+        oi = {}
+        with ThreadPoolExecutor(max_workers=OPEN_INTEREST_WORKERS) as pool:
+            for part in pool.map(open_interest, frame["expiry"].unique()):
+                oi.update(part)
+        frame["open_interest"] = frame.index.map(oi).astype(float)
+
+        index_price = float(_get(self.session, "index", underlying=f"{underlying}USDT")["indexPrice"])
+        return frame.sort_values(["expiry_ts", "strike", "side"]), index_price
+
+
+_cache = None
+_cache_lock = Lock()
+
+
+def get_chain_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OptionsChainCache()
+        return _cache
+
+
+def get_chain(underlying):
+    """Shortcut: current chain snapshot of ``underlying``."""
+    return get_chain_cache().get(underlying)
+
+
+def _collect():
+    cache = _cache
+    if cache is None:
+        return []
+    with cache._lock:
+        snapshots = dict(cache._snapshots)
+    return [
+        ("options_chain_fetches_total", "counter", "Options chain downloads.", [({}, cache.fetches)]),
+        ("options_chain_errors_total", "counter", "Failed options chain downloads.", [({}, cache.errors)]),
+        ("options_chain_contracts", "gauge", "Contracts in the current snapshot.",
+         [({"underlying": u}, len(s.frame)) for u, s in snapshots.items()]),
+        ("options_chain_version", "gauge", "Snapshot version (moves only when contracts change).",
+         [({"underlying": u}, s.version) for u, s in snapshots.items()]),
+        ("options_chain_changed_contracts", "gauge", "Contracts changed by the latest refresh.",
+         [({"underlying": u}, n) for u, n in cache.last_changed.items()]),
+    ]
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,112 @@
+# utils/price_feed.py
+# Continuously updated BTC/USD price held in memory.
+# Primary source is the Binance mini-ticker WebSocket (reconnecting with backoff); if it is
+# down or stale, the price is refreshed from CoinGecko in the background at most once per
+# FALLBACK_TTL_SECONDS, so callers (e.g. the whale monitor) only ever do a memory read.
+
+import json
+import time
+from threading import Thread, Lock
+
+import requests
+
+from utils.stream_ingest import ReconnectingWebSocket
+
+BINANCE_TICKER_URL = "wss://stream.binance.com:9443/ws/btcusdt@miniTicker"
+COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
+
+# Price older than this is considered stale and triggers a fallback refresh
+STALE_AFTER_SECONDS = 30
+# Minimum spacing of CoinGecko calls (also applied after failures / 429s)
+FALLBACK_TTL_SECONDS = 60
+
+
+def fetch_coingecko_btc_price():
+    """Fetch the current Bitcoin price from CoinGecko API (blocking, returns None on failure)."""
+    try:
+        response = requests.get(COINGECKO_URL, timeout=5)
+        if response.status_code == 200:
+            data = response.json()
+            if 'bitcoin' in data and 'usd' in data['bitcoin']:
+                return float(data['bitcoin']['usd'])
+        # 429 (rate limit) and other statuses fall through to None
+        return None
+    except requests.RequestException:
+        return None
+
+
+class PriceFeed:
+    """Holds the latest price of one symbol, fed by a WebSocket ticker with an HTTP fallback."""
+
+    def __init__(self, stream_url=BINANCE_TICKER_URL, fallback_fetch=fetch_coingecko_btc_price,
+                 stale_after=STALE_AFTER_SECONDS, fallback_ttl=FALLBACK_TTL_SECONDS):
+        self.stream_url = stream_url
+        self.fallback_fetch = fallback_fetch
+        self.stale_after = stale_after
+        self.fallback_ttl = fallback_ttl
+        self.price = None
+        self.updated_at = 0.0
+        self.source = None
+        self._last_fallback_attempt = 0.0
+        self._fallback_running = False
+        self._started = False
+        self._lock = Lock()
+
+    # ---------------------------------------------------------------- read
+    def get_price(self):
+        """Return the latest known price (or None) without blocking on the network."""
+        with self._lock:
+            price, age = self.price, time.time() - self.updated_at
+        if age > self.stale_after:
+            self._maybe_refresh_fallback()
+        return price
+
+    def age(self):
+        return time.time() - self.updated_at if self.updated_at else None
+
+    # ---------------------------------------------------------------- update
+    def _set_price(self, price, source):
+        with self._lock:
+            self.price = price
+            self.updated_at = time.time()
+            self.source = source
+
+    def _maybe_refresh_fallback(self):
+        with self._lock:
+            now = time.time()
+            if self._fallback_running or now - self._last_fallback_attempt < self.fallback_ttl:
+                return
+            self._fallback_running = True
+            self._last_fallback_attempt = now
+        Thread(target=self._refresh_fallback, daemon=True).start()
+
+    def _refresh_fallback(self):
+        try:
+            price = self.fallback_fetch()
+            if price is not None:
+                with self._lock:
+                    # don't overwrite a fresher ticker price that arrived meanwhile
+                    if time.time() - self.updated_at > self.stale_after:
+                        self.price, self.updated_at, self.source = price, time.time(), "fallback"
+        finally:
+            with self._lock:
+                self._fallback_running = False
+
+    def _on_message(self, message):
+        try:
+            data = json.loads(message)
+            self._set_price(float(data["c"]), "ticker")
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    def start(self):
+        """Start the ticker thread once; subsequent calls are no-ops."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        # reconnects with exponential backoff
+        ReconnectingWebSocket(self.stream_url, on_frame=self._on_message, name="btc-price-ticker").start()
+
+
+btc_price_feed = PriceFeed()
@@ -0,0 +1,67 @@
+# utils/ring_buffer.py
+# Fixed-size, array-backed ring buffer for numeric time series with a time-based retention window.
+
+import numpy as np
+import pandas as pd
+
+
+class TimeSeriesRingBuffer:
+    """Preallocated ring buffer of timestamped numeric rows.
+
+    - Memory is allocated once (``capacity`` rows); appends never grow it.
+    - Rows older than ``retention_seconds`` relative to the newest row are dropped.
+    - Timestamps are epoch seconds (float) and must be appended in non-decreasing order.
+    """
+
+    def __init__(self, columns, capacity, retention_seconds):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.columns = list(columns)
+        self.capacity = int(capacity)
+        self.retention_seconds = float(retention_seconds)
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        self._values = np.zeros((self.capacity, len(self.columns)), dtype=np.float64)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, values):
+        """Append one row; ``values`` is a sequence in the order of ``columns``."""
+        end = (self._start + self._size) % self.capacity
+        self._ts[end] = timestamp
+        self._values[end] = values
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            # buffer full: overwrite the oldest slot
+            self._start = (self._start + 1) % self.capacity
+        self._expire(timestamp - self.retention_seconds)
+
+    def _expire(self, cutoff):
+        # timestamps are ordered, so stale rows are always at the head (amortized O(1))
+        while self._size and self._ts[self._start] < cutoff:
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+
+    def arrays(self):
+        """Return (timestamps, values) in chronological order.
+
+        Arrays may be views into the buffer; copy them before releasing any lock guarding it.
+        """
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._ts[self._start:end], self._values[self._start:end]
+        wrap = end - self.capacity
+        return (
+            np.concatenate((self._ts[self._start:], self._ts[:wrap])),
+            np.concatenate((self._values[self._start:], self._values[:wrap])),
+        )
+
+    def to_frame(self):
+        """Return the buffer as a DataFrame with a ``timestamp`` column plus one column per value."""
+        ts, values = self.arrays()
+        df = pd.DataFrame(values, columns=self.columns)
+        df.insert(0, "timestamp", pd.to_datetime(ts, unit="s"))
+        return df
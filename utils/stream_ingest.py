@@ -0,0 +1,221 @@
+# utils/stream_ingest.py
+# Building blocks for WebSocket ingestion that keep the socket reader cheap:
+#   FrameQueue            bounded queue with drop-oldest policy and counters
+#   StreamWorkerPool      worker threads that parse / enrich frames off the queue
+#   ReconnectingWebSocket socket reader with exponential backoff reconnects
+# Queue depth, drops, lag and reconnects are exported through utils.metrics.
+
+import logging
+import random
+import time
+from collections import deque
+from threading import Condition, Lock, Thread
+
+import websocket
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 60
+# a connection that stayed up this long resets the backoff
+RECONNECT_RESET_AFTER_SECONDS = 60
+
+_streams = {}
+_streams_lock = Lock()
+
+
+class FrameQueue:
+    """Bounded FIFO of raw frames. When full, the oldest frame is dropped (and counted)."""
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self._frames = deque()
+        self._cond = Condition()
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.processing_seconds = 0.0
+
+    def put(self, frame):
+        with self._cond:
+            if len(self._frames) >= self.maxsize:
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append((time.monotonic(), frame))
+            self.received += 1
+            self._cond.notify()
+
+    def get(self, timeout=1.0):
+        """Return (enqueued_at, frame) or None after ``timeout`` seconds without frames."""
+        with self._cond:
+            if not self._frames:
+                self._cond.wait(timeout)
+                if not self._frames:
+                    return None
+            return self._frames.popleft()
+
+    def depth(self):
+        return len(self._frames)
+
+    def task_done(self, enqueued_at, started_at, ok=True):
+        finished = time.monotonic()
+        with self._cond:
+            self.processed += 1
+            if not ok:
+                self.errors += 1
+            self.last_lag = finished - enqueued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            self.processing_seconds += finished - started_at
+
+
+class StreamWorkerPool:
+    """Threads that pop frames from a FrameQueue and pass them to ``handler(frame)``."""
+
+    def __init__(self, queue, handler, workers=2, name="stream"):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.name = name
+        self._threads = []
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                continue
+            enqueued_at, frame = item
+            started_at = time.monotonic()
+            try:
+                self.handler(frame)
+                ok = True
+            except Exception:
+                logger.exception("%s: frame handler failed", self.name)
+                ok = False
+            self.queue.task_done(enqueued_at, started_at, ok)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = Thread(target=self._run, name=f"{self.name}-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+
+class ReconnectingWebSocket:
+    """Runs a WebSocketApp forever, reconnecting with exponential backoff and jitter."""
+
+    def __init__(self, url, on_frame, on_open=None, name="stream",
+                 min_backoff=RECONNECT_MIN_SECONDS, max_backoff=RECONNECT_MAX_SECONDS):
+        self.url = url
+        self.on_frame = on_frame
+        self.on_open = on_open
+        self.name = name
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.reconnects = 0
+        self.last_error = None
+
+    def _handle_open(self, ws):
+        self.connected = True
+        if self.on_open:
+            self.on_open(ws)
+
+    def _handle_error(self, ws, error):
+        self.last_error = str(error)
+        logger.error("%s: websocket error: %s", self.name, error)
+
+    def _run(self):
+        delay = self.min_backoff
+        while True:
+            started = time.monotonic()
+            ws = websocket.WebSocketApp(
+                self.url,
+                on_message=lambda ws, message: self.on_frame(message),
+                on_open=self._handle_open,
+                on_error=self._handle_error,
+            )
+            try:
+                ws.run_forever(ping_interval=30, ping_timeout=10)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("%s: websocket loop failed", self.name)
+            self.connected = False
+            self.reconnects += 1
+            if time.monotonic() - started > RECONNECT_RESET_AFTER_SECONDS:
+                delay = self.min_backoff
+            time.sleep(delay * (0.5 + random.random()))
+            delay = min(delay * 2, self.max_backoff)
+
+    def start(self):
+        thread = Thread(target=self._run, name=f"{self.name}-reader", daemon=True)
+        thread.start()
+        return thread
+
+
+def start_stream(name, url, handler, on_open=None, workers=2, maxsize=10_000, accept=None):
+    """Wire socket reader -> bounded queue -> worker pool and register it for metrics.
+
+    ``accept`` is an optional cheap predicate evaluated in the reader thread; frames for
+    which it returns False are not enqueued (e.g. while monitoring is switched off).
+    """
+    queue = FrameQueue(maxsize=maxsize)
+
+    def enqueue(frame):
+        if accept is None or accept():
+            queue.put(frame)
+
+    socket = ReconnectingWebSocket(url, on_frame=enqueue, on_open=on_open, name=name)
+    pool = StreamWorkerPool(queue, handler, workers=workers, name=name)
+    with _streams_lock:
+        _streams[name] = (queue, socket)
+    pool.start()
+    socket.start()
+    return queue, socket
+
+
+def stream_snapshot():
+    """One summary row per stream for the Diagnostics page."""
+    rows = []
+    with _streams_lock:
+        items = sorted(_streams.items())
+    for name, (queue, socket) in items:
+        rows.append({
+            "Stream": name,
+            "Connected": "yes" if socket.connected else "no",
+            "Reconnects": socket.reconnects,
+            "Queue Depth": queue.depth(),
+            "Received": queue.received,
+            "Dropped": queue.dropped,
+            "Processed": queue.processed,
+            "Errors": queue.errors,
+            "Last Lag (ms)": round(1000 * queue.last_lag, 1),
+            "Max Lag (ms)": round(1000 * queue.max_lag, 1),
+            "Avg Work (ms)": round(1000 * queue.processing_seconds / max(queue.processed, 1), 2),
+        })
+    return rows
+
+
+def _collect():
+    with _streams_lock:
+        items = sorted(_streams.items())
+    def series(fn):
+        return [({"stream": name}, fn(q, s)) for name, (q, s) in items]
+    return [
+        ("stream_queue_depth", "gauge", "Frames waiting in the ingest queue.", series(lambda q, s: q.depth())),
+        ("stream_frames_received_total", "counter", "Frames read from the socket.", series(lambda q, s: q.received)),
+        ("stream_frames_dropped_total", "counter", "Frames dropped because the queue was full.", series(lambda q, s: q.dropped)),
+        ("stream_frames_processed_total", "counter", "Frames handled by workers.", series(lambda q, s: q.processed)),
+        ("stream_processing_errors_total", "counter", "Frames whose handler raised.", series(lambda q, s: q.errors)),
+        ("stream_lag_seconds", "gauge", "Enqueue-to-processed delay of the latest frame.", series(lambda q, s: q.last_lag)),
+        ("stream_max_lag_seconds", "gauge", "Largest enqueue-to-processed delay seen.", series(lambda q, s: q.max_lag)),
+        ("stream_reconnects_total", "counter", "Socket reconnects.", series(lambda q, s: s.reconnects)),
+        ("stream_connected", "gauge", "1 if the socket is currently connected.", series(lambda q, s: int(s.connected))),
+    ]
+
+
+metrics.register_collector(_collect)